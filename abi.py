@@ -0,0 +1,102 @@
+# abi.py
+
+from functools import lru_cache
+
+from eth_utils import keccak
+
+# Error(string) and Panic(uint256), the two standard Solidity revert payloads.
+ERROR_SELECTOR = "08c379a0"
+PANIC_SELECTOR = "4e487b71"
+
+
+def function_selector(name, types):
+    return _selector(f"{name}({','.join(types)})")
+
+
+@lru_cache(maxsize=None)
+def _selector(signature):
+    return "0x" + keccak(text=signature)[:4].hex()
+
+
+def _encode_address(value):
+    return value.lower().replace("0x", "").rjust(64, "0")
+
+
+def _encode_bool(value):
+    return ("1" if value else "0").rjust(64, "0")
+
+
+def _encode_uint(value):
+    return format(int(value), "064x")
+
+
+def _encode_int(value):
+    return format(int(value) % (1 << 256), "064x")
+
+
+def _encode_bytes32(value):
+    return value.replace("0x", "").ljust(64, "0")
+
+
+def _encode_bytes(value):
+    data = value.encode().hex() if isinstance(value, str) and not value.startswith("0x") else value.replace("0x", "")
+    return format(len(data) // 2, "064x") + data.ljust((len(data) + 63) // 64 * 64, "0")
+
+
+DYNAMIC_TYPES = ("bytes", "string")
+
+
+def value_encoder(type_):
+    """
+    The encoder for one ABI type (address, bool, uintN, intN, bytes32, bytes, string). Static
+    types encode to 64 hex characters; bytes and string to their length-prefixed tail.
+    """
+    if type_ in DYNAMIC_TYPES:
+        return _encode_bytes
+    if type_ == "address":
+        return _encode_address
+    if type_ == "bool":
+        return _encode_bool
+    if type_.startswith("uint"):
+        return _encode_uint
+    if type_.startswith("int"):
+        return _encode_int
+    if type_ == "bytes32":
+        return _encode_bytes32
+    raise ValueError(f'Unsupported ABI type: "{type_}"')
+
+
+def encode_value(type_, value):
+    return value_encoder(type_)(value)
+
+
+def event_topic(name, types):
+    return "0x" + keccak(text=f"{name}({','.join(types)})").hex()
+
+
+def decode_words(data):
+    """Split return data into 256-bit words (as ints)."""
+    data = data.replace("0x", "")
+    return [int(data[i:i + 64], 16) for i in range(0, len(data), 64)]
+
+
+def to_signed(word):
+    return word - (1 << 256) if word >= 1 << 255 else word
+
+
+def word_to_address(word):
+    return "0x" + format(word, "040x")[-40:]
+
+
+def decode_revert(data):
+    """Human-readable reason from revert data, or None if there is no standard payload."""
+    if not data:
+        return None
+    data = data.replace("0x", "")
+    if data.startswith(ERROR_SELECTOR):
+        body = data[8:]
+        length = int(body[64:128], 16)
+        return bytes.fromhex(body[128:128 + length * 2]).decode(errors="replace")
+    if data.startswith(PANIC_SELECTOR):
+        return f"Panic(0x{int(data[8:72], 16):02x})"
+    return None
@@ -0,0 +1,223 @@
+# add_liquidity.py
+
+import asyncio
+from typing import Optional
+from cdp import Wallet
+from pydantic import BaseModel, Field
+
+# Import CdpTool
+from cdp_langchain.tools import CdpTool
+from langchain_core.tools import StructuredTool
+
+from limits import chain_slots
+from allowance import allowance_cache, spend_liquidity_allowances, wallet_address
+from approve_token import submit_approval
+from increase_liquidity import submit_increase_liquidity
+from mint_new_position import submit_mint_new_position
+from pools import MINT_POOL_FEE, get_pool_address
+from positions import get_position_index, read_position, resolve_token_id
+from rpc import RpcError
+from simulation import simulate_increase_liquidity, simulate_mint_new_position
+from tx_manager import get_transaction_manager
+from helpers import parse_token_amounts, emit_progress, TOKENS
+
+ADD_LIQUIDITY_DESCRIPTION = """
+Add liquidity in one step: approves whichever tokens still need an allowance and then either increases an existing Uniswap V3 position (when a token ID is given) or mints a new one.
+Prefer this tool over calling approve_token, mint_new_position and increase_liquidity one by one.
+
+**Usage Examples:**
+- "Add 1 VED and 10 STK to position 35."
+- "Create a new position with 50 VED + 5,000 STK."
+
+**Parameters:**
+- **tokenA_amount**: Amount and symbol of the first token (e.g., "100 VED").
+- **tokenB_amount**: Amount and symbol of the second token (e.g., "10,000 STK").
+- **token_id**: ID of an existing position to add to. Leave empty to mint a new position.
+
+**Important Notes:**
+- **Approvals**: Only missing approvals are sent, back to back, and confirmed together before the liquidity transaction. Nothing is sent when the liquidity transaction would fail anyway (no pool, unknown position, low balance).
+- **Network Support**: Supported only on 'base-sepolia' network.
+- **No Addresses Needed**: Contract and token addresses are predefined.
+"""
+
+# Small approvals are raised so the next few operations don't need another one (see approve_token).
+SMALL_APPROVAL_TOKENS = 100
+SMALL_APPROVAL_MULTIPLIER = 100
+
+class AddLiquidityInput(BaseModel):
+    """Input argument schema for the combined approve + mint/increase flow."""
+    tokenA_amount: str = Field(
+        ...,
+        description='The amount and symbol of the first token, e.g., "100 VED".'
+    )
+    tokenB_amount: str = Field(
+        ...,
+        description='The amount and symbol of the second token, e.g., "10000 STK".'
+    )
+    token_id: Optional[int] = Field(
+        None, description="The ID of an existing Uniswap V3 position. Omit to mint a new position."
+    )
+
+def approval_amount(symbol: str, amount_wei: int) -> int:
+    if amount_wei < SMALL_APPROVAL_TOKENS * 10 ** TOKENS[symbol]['decimals']:
+        return amount_wei * SMALL_APPROVAL_MULTIPLIER
+    return amount_wei
+
+def plan_approvals(wallet: Wallet, tokenA_amount: str, tokenB_amount: str):
+    """Return the (symbol, amount in wei) approvals needed before adding liquidity."""
+    amounts = parse_token_amounts([tokenA_amount, tokenB_amount])
+    missing = allowance_cache.missing(wallet_address(wallet), amounts, assume_sufficient=False)
+    return [(symbol, approval_amount(symbol, amount_wei)) for symbol, amount_wei in missing]
+
+def submit_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int]):
+    if token_id is None:
+        return submit_mint_new_position(wallet, tokenA_amount, tokenB_amount)
+    return submit_increase_liquidity(wallet, token_id, tokenA_amount, tokenB_amount)
+
+def simulate_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int]):
+    if token_id is None:
+        return simulate_mint_new_position(wallet, tokenA_amount, tokenB_amount)
+    return simulate_increase_liquidity(wallet, token_id, tokenA_amount, tokenB_amount)
+
+def check_liquidity_target(tokenA_amount: str, tokenB_amount: str, token_id: Optional[int]):
+    """An error message when the pool to mint in or the position to increase does not exist, else None."""
+    (symbolA, _), (symbolB, _) = parse_token_amounts([tokenA_amount, tokenB_amount])
+    if token_id is None:
+        if get_pool_address(TOKENS[symbolA]['address'], TOKENS[symbolB]['address'], MINT_POOL_FEE) is None:
+            return f"There is no {symbolA}/{symbolB} pool in the {MINT_POOL_FEE} fee tier to mint a position in. No transaction was sent."
+        return None
+    if get_position_index().get(token_id) is None:
+        try:
+            read_position(token_id)
+        except RpcError:
+            return f"Position {token_id} does not exist. Use list_positions to find one the wallet owns. No transaction was sent."
+    return None
+
+def preflight_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int], approvals):
+    """
+    Why the liquidity transaction would fail, checked before any approval is paid for; None if it
+    should go through. The dry run cannot pass before the approvals, so a missing allowance is
+    expected when approvals are planned.
+    """
+    error = check_liquidity_target(tokenA_amount, tokenB_amount, token_id)
+    if error:
+        return error
+    error = simulate_liquidity(wallet, tokenA_amount, tokenB_amount, token_id)
+    if error and not (approvals and error.code == "missing_allowance"):
+        return error
+    return None
+
+def record_approvals(wallet: Wallet, approvals):
+    owner = wallet_address(wallet)
+    for symbol, amount_wei in approvals:
+        allowance_cache.set(TOKENS[symbol]['address'], owner, amount_wei)
+
+def format_result(approvals, approval_hashes, token_id, tx_hash):
+    lines = [
+        f"✅ Approved {amount_wei / 10 ** TOKENS[symbol]['decimals']:g} {symbol}. Transaction hash: {approval_hash}"
+        for (symbol, amount_wei), approval_hash in zip(approvals, approval_hashes)
+    ]
+    if token_id is None:
+        lines.append(f"🎉 New liquidity position created! Transaction hash: {tx_hash}")
+    else:
+        lines.append(f"🛠 Liquidity increased for position {token_id}! Transaction hash: {tx_hash}")
+    return "\n".join(lines)
+
+def add_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int] = None) -> str:
+    """Approve what is missing, then mint or increase liquidity."""
+    try:
+        print("-"*20 + "Invoking add_liquidity" + "-"*20)
+
+        if token_id is not None:
+            token_id, error = resolve_token_id(wallet_address(wallet), token_id, tokenA_amount, tokenB_amount)
+            if error:
+                return f"❌ Adding liquidity failed: {error}"
+
+        manager = get_transaction_manager(wallet)
+        approvals = plan_approvals(wallet, tokenA_amount, tokenB_amount)
+        error = preflight_liquidity(wallet, tokenA_amount, tokenB_amount, token_id, approvals)
+        if error:
+            return f"❌ Adding liquidity failed: {error}"
+        # Approvals don't depend on each other: submit them all, then wait for the whole batch.
+        futures = [manager.submit(submit_approval, symbol, amount_wei) for symbol, amount_wei in approvals]
+        emit_progress("add_liquidity", "submitted", approvals=len(futures))
+        emit_progress("add_liquidity", "waiting for confirmation")
+        approval_hashes = [future.result().transaction.transaction_hash for future in futures]
+        record_approvals(wallet, approvals)
+
+        # The liquidity transaction is gas-estimated against current state, so it goes out once the
+        # allowances exist; with new allowances it is dry-run again first.
+        error = simulate_liquidity(wallet, tokenA_amount, tokenB_amount, token_id) if approvals else None
+        if error:
+            return f"❌ Adding liquidity failed: {error}"
+        result = manager.submit(submit_liquidity, tokenA_amount, tokenB_amount, token_id).result()
+        emit_progress("add_liquidity", "confirmed", tx_hash=result.transaction.transaction_hash)
+        spend_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
+
+        message = format_result(approvals, approval_hashes, token_id, result.transaction.transaction_hash)
+        print(message)
+        return message
+    except Exception as e:
+        emit_progress("add_liquidity", "failed", error=str(e))
+        return f"❌ Adding liquidity failed: {str(e)}"
+
+async def aadd_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int] = None) -> str:
+    """Approve what is missing, then mint or increase liquidity, without blocking the event loop."""
+    try:
+        print("-"*20 + "Invoking add_liquidity" + "-"*20)
+
+        if token_id is not None:
+            token_id, error = await asyncio.to_thread(resolve_token_id, wallet_address(wallet), token_id, tokenA_amount, tokenB_amount)
+            if error:
+                return f"❌ Adding liquidity failed: {error}"
+
+        manager = get_transaction_manager(wallet)
+        approvals = await asyncio.to_thread(plan_approvals, wallet, tokenA_amount, tokenB_amount)
+        error = await asyncio.to_thread(preflight_liquidity, wallet, tokenA_amount, tokenB_amount, token_id, approvals)
+        if error:
+            return f"❌ Adding liquidity failed: {error}"
+        async with chain_slots():
+            futures = [
+                await asyncio.to_thread(manager.submit, submit_approval, symbol, amount_wei)
+                for symbol, amount_wei in approvals
+            ]
+            emit_progress("add_liquidity", "submitted", approvals=len(futures))
+            emit_progress("add_liquidity", "waiting for confirmation")
+            confirmed = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+            approval_hashes = [invocation.transaction.transaction_hash for invocation in confirmed]
+            await asyncio.to_thread(record_approvals, wallet, approvals)
+
+            error = await asyncio.to_thread(simulate_liquidity, wallet, tokenA_amount, tokenB_amount, token_id) if approvals else None
+            if error:
+                return f"❌ Adding liquidity failed: {error}"
+            future = await asyncio.to_thread(manager.submit, submit_liquidity, tokenA_amount, tokenB_amount, token_id)
+            result = await asyncio.wrap_future(future)
+            emit_progress("add_liquidity", "confirmed", tx_hash=result.transaction.transaction_hash)
+        spend_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
+
+        message = format_result(approvals, approval_hashes, token_id, result.transaction.transaction_hash)
+        print(message)
+        return message
+    except Exception as e:
+        emit_progress("add_liquidity", "failed", error=str(e))
+        return f"❌ Adding liquidity failed: {str(e)}"
+
+# Create the tool instance
+def get_add_liquidity_tool(agentkit):
+    return CdpTool(
+        name="add_liquidity",
+        description=ADD_LIQUIDITY_DESCRIPTION,
+        cdp_agentkit_wrapper=agentkit,
+        args_schema=AddLiquidityInput,
+        func=add_liquidity,
+    )
+
+# Create the tool instance for the async graph
+def get_async_add_liquidity_tool(agentkit):
+    return StructuredTool.from_function(
+        name="add_liquidity",
+        description=ADD_LIQUIDITY_DESCRIPTION,
+        args_schema=AddLiquidityInput,
+        func=lambda tokenA_amount, tokenB_amount, token_id=None: add_liquidity(agentkit.wallet, tokenA_amount, tokenB_amount, token_id),
+        coroutine=lambda tokenA_amount, tokenB_amount, token_id=None: aadd_liquidity(agentkit.wallet, tokenA_amount, tokenB_amount, token_id),
+    )
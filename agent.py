@@ -1,92 +1,152 @@
 # Cell 1: Import required modules and load environment variables
-import import_ipynb
-import load_env
-from load_env import *
-
-# Import agent toolkit and initialize the CDP agent kit wrapper
-from cdp_langchain.agent_toolkits import CdpToolkit
-from cdp_langchain.utils import CdpAgentkitWrapper
+# config.py is a plain module (load_env.ipynb stays for the notebooks), so no import_ipynb at startup.
+from config import *
 
 # Import pretty print
-from helpers import print_message_nicely, ASCII_ART
-
-# Import custom actions
-from approve_token import get_approve_token_tool
-from increase_liquidity import get_increase_liquidity_tool
-from mint_new_position import get_mint_new_position_tool
-
-import os
-
-load_dotenv()
+from helpers import print_message_nicely, print_node_message, print_routing, set_node_output, ASCII_ART
 
-# Configure a file to persist the agent's CDP MPC Wallet Data.
-wallet_data_file = "wallet_data.txt"
-# Configure CDP Agentkit Langchain Extension.
-wallet_data = None
+# Import the streaming renderer
+from streaming import stream_conversation, astream_conversation
 
-if os.path.exists(wallet_data_file):
-    with open(wallet_data_file) as f:
-        wallet_data = f.read()
+# Import the rule-based pre-router
+from router import fast_route, route_stats
 
-values = {}
+# Per-hop timing and token counts, attached to every run as a callback handler
+from tracing import tracer, serve_metrics, METRICS_PORT
 
-mnemonic_phrase = os.getenv("MNEMONIC_PHRASE")
-if wallet_data is not None:
-    # If there is a persisted agentic wallet, load it and pass to the CDP Agentkit Wrapper.
-    values = {"cdp_wallet_data": wallet_data}
-else:
-    # If there is no persisted wallet, pass the mnemonic phrase to the CDP Agentkit Wrapper.
-    values = {"mnemonic_phrase": mnemonic_phrase}
+# Per-turn step/token budget and loop detection (also a callback handler, for the token count)
+from budget import turn_budget
 
-cdp = CdpAgentkitWrapper(**values)
+# Confirmation questions settled by rules instead of an assistant LLM hop
+from policy import confirmation_policy
 
-# persist the agent's CDP MPC Wallet Data.
-wallet_data = cdp.export_wallet()
-with open(wallet_data_file, "w") as f:
-    f.write(wallet_data)
+# Agents and their toolkits are built on first use
+from lazy import Lazy
 
-# Initialize CDP Agentkit Toolkit and get tools.    
-toolkit = CdpToolkit.from_cdp_agentkit_wrapper(cdp)
-tools_blockchain = toolkit.get_tools()
+import asyncio
+import sys
 
-# Adding custom actions to the tools list
-approve_token_tool = get_approve_token_tool(cdp)
-mint_new_position_tool = get_mint_new_position_tool(cdp)
-increase_liquidity_tool = get_increase_liquidity_tool(cdp)
+import os
 
-tools_blockchain = tools_blockchain + [approve_token_tool, mint_new_position_tool, increase_liquidity_tool]
+# Configure a file to persist the agent's CDP MPC Wallet Data.
+wallet_data_file = "wallet_data.txt"
 
-# Import LLM and create an instance using the Google GenAI model "gemini-2.0-flash"
-from langchain_google_genai import ChatGoogleGenerativeAI
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+def load_cdp_wrapper():
+    """Initialize the CDP agent kit wrapper; the wallet is only exported when it is new."""
+    from cdp_langchain.utils import CdpAgentkitWrapper
+
+    # Configure CDP Agentkit Langchain Extension.
+    wallet_data = None
+
+    if os.path.exists(wallet_data_file):
+        with open(wallet_data_file) as f:
+            wallet_data = f.read()
+
+    if wallet_data is not None:
+        # If there is a persisted agentic wallet, load it and pass to the CDP Agentkit Wrapper.
+        values = {"cdp_wallet_data": wallet_data}
+    else:
+        # If there is no persisted wallet, pass the mnemonic phrase to the CDP Agentkit Wrapper.
+        values = {"mnemonic_phrase": MNEMONIC_PHRASE}
+
+    cdp = CdpAgentkitWrapper(**values)
+
+    # persist the agent's CDP MPC Wallet Data if it changed.
+    exported = cdp.export_wallet()
+    if exported != wallet_data:
+        with open(wallet_data_file, "w") as f:
+            f.write(exported)
+    return cdp
+
+cdp = Lazy(load_cdp_wrapper)
+
+def load_blockchain_tools(async_tools=False):
+    """CDP toolkit plus our custom actions (the async graph uses their non-blocking variants)."""
+    from cdp_langchain.agent_toolkits import CdpToolkit
+    from approve_token import get_approve_token_tool, get_async_approve_token_tool
+    from increase_liquidity import get_increase_liquidity_tool, get_async_increase_liquidity_tool
+    from mint_new_position import get_mint_new_position_tool, get_async_mint_new_position_tool
+    from add_liquidity import get_add_liquidity_tool, get_async_add_liquidity_tool
+    from list_positions import get_list_positions_tool, get_async_list_positions_tool
+    from portfolio import get_portfolio_snapshot_tool, get_async_portfolio_snapshot_tool
+
+    wrapper = cdp.get()
+    # Initialize CDP Agentkit Toolkit and get tools.
+    toolkit = CdpToolkit.from_cdp_agentkit_wrapper(wrapper)
+
+    # Adding custom actions to the tools list
+    if async_tools:
+        custom_tools = [
+            get_async_approve_token_tool(wrapper),
+            get_async_mint_new_position_tool(wrapper),
+            get_async_increase_liquidity_tool(wrapper),
+            get_async_add_liquidity_tool(wrapper),
+            get_async_list_positions_tool(wrapper),
+            get_async_portfolio_snapshot_tool(wrapper),
+        ]
+    else:
+        custom_tools = [
+            get_approve_token_tool(wrapper),
+            get_mint_new_position_tool(wrapper),
+            get_increase_liquidity_tool(wrapper),
+            get_add_liquidity_tool(wrapper),
+            get_list_positions_tool(wrapper),
+            get_portfolio_snapshot_tool(wrapper),
+        ]
+    return toolkit.get_tools() + custom_tools
+
+def load_twitter_tools():
+    # For Twitter, use the ArcadeToolManager to load the X toolkit (assumes ARCADE_API_KEY is defined in the environment).
+    from langchain_arcade import ArcadeToolManager
+    tool_manager = ArcadeToolManager(api_key=ARCADE_API_KEY)
+    return tool_manager.get_tools(toolkits=["X"])
+
+tools_twitter = Lazy(load_twitter_tools)
+
+# One chat model per role (models.py): a fast model for routing, stronger ones for tool planning
+# and confirmations, each falling back to another provider on timeouts and rate limits.
+from models import get_model, model_ledger
+from prompts import prompt_prefixes
+# Built on first use like the agents below, so importing agent.py doesn't construct provider clients.
+router_llm = Lazy(lambda: get_model("router"))
+agent_llm = Lazy(lambda: get_model("agent"))
+assistant_llm = Lazy(lambda: get_model("assistant"))
+
+# Keep the prompt sent to every agent within a token budget on long sessions.
+from history import HistoryCompactor
+history = HistoryCompactor(
+    Lazy(lambda: get_model("summary")),
+    token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "4000")),
+    keep_last=int(os.getenv("HISTORY_KEEP_LAST", "6")),
+)
 
 # Import LangGraph’s helper to create react agents
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
+from checkpointer import get_checkpointer
 
-# Store buffered conversation history in memory.
-memory = MemorySaver()
+# Persist conversation history (SQLite by default, CHECKPOINTER=memory for the in-process MemorySaver).
+memory = get_checkpointer()
 
-# Cell 2: Create our three agents
+# Cell 2: Create our agents. Each one (and its toolkit) is built the first time the supervisor routes to it.
 
-# Create the blockchain agent using the blockchain toolkit.
-blockchain_agent = create_react_agent(llm, tools=tools_blockchain, checkpointer=memory)
+# Create the blockchain agent using the blockchain toolkit. The nodes pass each agent the whole
+# (compacted) conversation, so the agents keep no checkpoints of their own (checkpointer=False).
+blockchain_agent = Lazy(lambda: create_react_agent(agent_llm.get(), tools=prompt_prefixes.register("blockchain_agent", tools=load_blockchain_tools()).tools, checkpointer=False))
+twitter_agent = Lazy(lambda: create_react_agent(agent_llm.get(), tools=prompt_prefixes.register("twitter_agent", tools=tools_twitter.get()).tools, checkpointer=False))
 
-# For Twitter, use the ArcadeToolManager to load the X toolkit (assumes ARCADE_API_KEY is defined in the environment).
-from langchain_arcade import ArcadeToolManager
-tool_manager = ArcadeToolManager(api_key=ARCADE_API_KEY)
-tools_twitter = tool_manager.get_tools(toolkits=["X"])
-twitter_agent = create_react_agent(llm, tools=tools_twitter, checkpointer=memory)
+# React agents for the async graph.
+async_blockchain_agent = Lazy(lambda: create_react_agent(agent_llm.get(), tools=prompt_prefixes.register("async_blockchain_agent", tools=load_blockchain_tools(async_tools=True)).tools, checkpointer=False))
+async_twitter_agent = Lazy(lambda: create_react_agent(agent_llm.get(), tools=prompt_prefixes.register("async_twitter_agent", tools=tools_twitter.get()).tools, checkpointer=False))
 
-# Create the assistant agent.
-# This agent’s sole work is to review the full conversation state and generate a confirmation or general query response.
-# It no longer requires external internet access.
-assistant_agent_prompt = (
-    "You are an assistant agent whose job is to analyze the entire conversation state and, if a confirmation is needed, "
-    "generate a concise confirmation message starting with 'Yes, please'. Otherwise, generate a helpful response to clarify "
-    "or resolve any ambiguity."
-)
-assistant_agent = create_react_agent(llm, tools=[], checkpointer=memory)  # No extra tools are needed.
+def warm_up():
+    """Build every model and agent up front (python agent.py --eager)."""
+    for model in (router_llm, agent_llm, assistant_llm):
+        model.get()
+    for agent in (blockchain_agent, twitter_agent, async_blockchain_agent, async_twitter_agent):
+        agent.get()
+
+# The assistant agent's sole work is to review the full conversation state and generate a confirmation or
+# general query response. It calls the LLM directly (see assistant_node), so it needs no react agent or tools.
 
 # Cell 3: Define the supervisor's system prompt with explicit message naming and an example flow.
 # The team now includes the assistant_agent.
@@ -148,6 +208,11 @@ Task Delegation:
     Delegate tasks only when additional work is required. 
     If the current result fully addresses the request, instruct FINISH.
 
+Parallel Tasks:
+    If the request has parts that do not depend on each other (for example, fetching the price of ETH and searching recent tweets about DeFi), list them in `tasks`, one entry per part with the worker (blockchain_agent or twitter_agent) and a self-contained instruction.
+    They run at the same time and you see all of their results together before deciding the next step.
+    A part that needs another part's result (e.g. tweeting a transaction link) must wait for it, so it is not a parallel task. Leave `tasks` empty for a single step.
+
 General Assistance:
     If the human user is asking for general assistance or information, and no specific action is required, you can respond directly with the answer and respond with FINISH.
     Examples: 
@@ -188,51 +253,133 @@ Step 5: Completion
 Based on these rules and the example above, analyze the conversation history and respond with the next worker to act or with FINISH if the overall task is complete.
 """
 
+# The assistant's instructions are static, so they are built once and sent as the system message.
+ASSISTANT_SYSTEM_PROMPT = f"""
+You are the assistant agent of DeFi Guru. The conversation so far follows; every message starts with its sender in brackets, e.g. [User] or [blockchain_agent].
+
+If a confirmation is needed for the current action (e.g., fetching ETH or posting a tweet), infer from the context and user intent if confirmation can be given then, generate a concise confirmation message starting with 'Yes, please'. Otherwise, provide a clarifying response to the question so that further tasks could be done.
+
+If at some stage, important inputs are needed from the user and from the user intent its not clear, and further tasks cant be done without user intervention, only in this case you can make random choices(only so that tasks can be taken forward).
+
+After some task is done by blockchain_agent successfully, it needs to be posted on twitter so that DeFi guru gets fame and recognition. Respond that we need to tweet this to get fame. Also respond that the transaction link (eg. https://sepolia.basescan.org/tx/<txn_hash>, where you need to replace <txn_hash> with the actual transaction hash ) need to be included in the tweet.
+
+When you have doubt whether to create new liquidity or add liquidity to existing pool, always choose to add liquidity to existing pool. This is because the user has already provided the tokens and the user might have already added liquidity to the pool. So, adding liquidity to existing pool is the best choice.
+
+When you need some genuine input from the user and you cant deduce then respond that user input is needed and respond to supervisor to FINISH.
+
+Analyse the conversation context to deduce that if the user is asking for general assistance or information, and no specific action is required, you can respond with the answer and the relevant supported capabilities: {AGENT_CAPABILITIES} and respond that the supervisor can further respond with FINISH.
+
+Reply with your message only, without a sender prefix.
+"""
+
+# Both prompts are static prefixes: sent first and unchanged on every call, so providers can cache them.
+supervisor_prefix = prompt_prefixes.register("supervisor", system_prompt)
+prompt_prefixes.register("assistant_agent", ASSISTANT_SYSTEM_PROMPT)
+
+from context import ContextStore
+assistant_contexts = ContextStore(ASSISTANT_SYSTEM_PROMPT)
+
+# Informational answers are cached per prompt version and served without any LLM call.
+from response_cache import get_response_cache
+response_cache = get_response_cache(system_prompt, ASSISTANT_SYSTEM_PROMPT)
+
 # Cell 4: Define a pydantic model for the Router, the State type, and the supervisor_node function
 
-from typing import Literal
-from pydantic import BaseModel
+from typing import Annotated, Literal, Optional
+from pydantic import BaseModel, Field
 from langgraph.graph import MessagesState, END
 from langgraph.types import Command
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+# Independent sub-tasks fan out to the workers with Send and meet again in the join node.
+from fanout import Task, fan_out, join_node, merge_results, worker_result
 
 class Router(BaseModel):
     next: Literal["blockchain_agent", "twitter_agent", "assistant_agent", "FINISH"]
+    tasks: list[Task] = Field(default_factory=list, description="Independent sub-tasks to run in parallel; empty for a single step.")
 
 class State(MessagesState):
     next: str
-
-def supervisor_node(state: State) -> Command[Literal["blockchain_agent", "twitter_agent", "__end__"]]:
-    # Combine the system prompt with the conversation history
-    messages = [{"role": "system", "content": system_prompt}] + state["messages"]
-    # print(f"State in supervisor: {state}")
-    response = llm.with_structured_output(Router).invoke(messages)
-    goto = response.next
-    print("\n")
-    print(f"Routing to {goto}...")
-    # print("."*50)
-    # print("\n" + "."*50)
+    # Position in the plan, set only on the input of a parallel branch.
+    task: Optional[int]
+    results: Annotated[list, merge_results]
+
+def cached_response(messages):
+    """Answer a repeated informational question from the response cache, if possible."""
+    last = messages[-1]
+    if last.name != "User":
+        return None
+    answer = response_cache.get(last.content)
+    if answer is None:
+        return None
+    message = HumanMessage(content=answer, name="assistant_agent")
+    print_node_message(message)
+    return Command(goto=END, update={"messages": [message], "next": END})
+
+def budget_stop(state, config):
+    """End the turn without another LLM call once it loops or runs out of steps or tokens."""
+    thread_id = config.get("configurable", {}).get("thread_id", "default")
+    stop = turn_budget.check(thread_id, state["messages"])
+    if stop is None:
+        return None
+    message = turn_budget.resolution(state["messages"], stop)
+    print_node_message(message)
+    return Command(goto=END, update={"messages": [message], "next": END})
+
+def policy_confirmation(state):
+    """Confirm (or hand back to the user) a worker's question from confirmation_policy.json, without the LLM."""
+    decision = confirmation_policy.decide(state["messages"])
+    if decision is None:
+        return None
+    route_stats.record("policy")
+    message = HumanMessage(content=decision.content, name="assistant_agent")
+    print_node_message(message)
+    goto = decision.goto or END
+    print_routing(goto)
+    return Command(goto=goto, update={"messages": [message], "next": goto})
+
+def supervisor_node(state: State, config: RunnableConfig) -> Command[Literal["blockchain_agent", "twitter_agent", "__end__"]]:
+    cached = cached_response(state["messages"])
+    if cached is not None:
+        return cached
+    stopped = budget_stop(state, config)
+    if stopped is not None:
+        return stopped
+    confirmed = policy_confirmation(state)
+    if confirmed is not None:
+        return confirmed
+    # Settle the obvious cases from the routing rules without an LLM call.
+    goto = fast_route(state["messages"])
+    if goto is not None:
+        route_stats.record("fast")
+    else:
+        # Combine the system prompt with the conversation history
+        messages = supervisor_prefix.assemble(history.compact(state["messages"]))
+        # print(f"State in supervisor: {state}")
+        response = router_llm.get().with_structured_output(Router).invoke(messages)
+        route_stats.record("llm")
+        if len(response.tasks) > 1:
+            print_routing(" + ".join(task.worker for task in response.tasks))
+            return fan_out(state["messages"], response.tasks)
+        goto = response.next
+    print_routing(goto)
     if goto == "FINISH":
+        response_cache.remember(state["messages"])
         goto = END
     return Command(goto=goto, update={"next": goto})
 
 # Cell 5: Define nodes for the blockchain, twitter, and assistant agents.
 
-def blockchain_node(state: State) -> Command[Literal["supervisor"]]:
-    result = blockchain_agent.invoke(state)
+def blockchain_node(state: State) -> Command[Literal["supervisor", "join"]]:
+    result = blockchain_agent.get().invoke({"messages": history.compact(state["messages"])})
     content = result["messages"][-1].content
     message = HumanMessage(content=content, name="blockchain_agent")
-    print_message_nicely(message)
-    return Command(
-        update={
-            "messages": [message],
-            "next": "supervisor"
-        },
-        goto="supervisor",
-    )
+    print_node_message(message)
+    return worker_result(state, message)
 
-def twitter_node(state: State) -> Command[Literal["supervisor"]]:
-    result = twitter_agent.invoke(state)
+def twitter_node(state: State) -> Command[Literal["supervisor", "join"]]:
+    result = twitter_agent.get().invoke({"messages": history.compact(state["messages"])})
     content = result["messages"][-1].content
     message = HumanMessage(content=content, name="twitter_agent")
     prompt = (
@@ -241,44 +388,19 @@ def twitter_node(state: State) -> Command[Literal["supervisor"]]:
             "Just added liquidity to a new position with 1 VED and 10 STK! Exciting to be part of the DeFi space. Check out the transaction: https://sepolia.basescan.org/tx/0x67e903a1d8c952d29fb9e4b693586ca652bb7f98da94c8c761263baeac107202 #DeFi #Liquidity #Crypto",
             "🔥 DeFi Guru just made a power move! Just dropped a fresh liquidity position with 1 VED & 10 STK 🚀. See the action in real time: https://sepolia.basescan.org/tx/0x67e903a1d8c952d29fb9e4b693586ca652bb7f98da94c8c761263baeac107202. Ready to level up your crypto game? With DeFi Guru, your portfolio is always on point. #DeFi #Crypto #Liquidity #DeFiGuru".
         """)
-    print_message_nicely(message)
-    return Command(
-        update={
-            "messages": [message],
-            "next": "supervisor"
-        },
-        goto="supervisor",
-    )
-
-def assistant_node(state: State) -> Command[Literal["supervisor"]]:
-    # Build a conversation context string from all messages.
-    conversation_context = " ".join([msg.content for msg in state["messages"]])
-    # prompt = (
-    #     f"Given the full conversation context: '{conversation_context}', "
-    #     "if a confirmation is needed for the current action (e.g., fetching ETH, approving for erc20 token or posting a tweet), "
-    #     "firstly infer from the context and user intent and then, if not clear,"
-    #     "think about yourselves generate a concise confirmation message starting with 'Yes, please', Otherwise, provide your brief opinion to accomplish the task/goal."
-    # )
-    prompt = (
-        f""" Given the full conversation context: '{conversation_context}', if a confirmation is needed for the current action (e.g., fetching ETH or posting a tweet), infer from the context and user intent if confirmation can be given then, generate a concise confirmation message starting with 'Yes, please'. Otherwise, provide a clarifying response to the question so that further tasks could be done.
-
-        If at some stage, important inputs are needed from the user and from the user intent its not clear, and further tasks cant be done without user intervention, only in this case you can make random choices(only so that tasks can be taken forward).
-        
-        After some task is done by blockchain_agent successfully, it needs to be posted on twitter so that DeFi guru gets fame and recognition. Respond that we need to tweet this to get fame. Also respond that the transaction link (eg. https://sepolia.basescan.org/tx/<txn_hash>, where you need to replace <txn_hash> with the actual transaction hash ) need to be included in the tweet.
-
-        When you have doubt whether to create new liquidity or add liquidity to existing pool, always choose to add liquidity to existing pool. This is because the user has already provided the tokens and the user might have already added liquidity to the pool. So, adding liquidity to existing pool is the best choice.
-
-        When you need some genuine input from the user and you cant deduce then respond that user input is needed and respond to supervisor to FINISH. 
-
-        Analyse the conversation context to deduce that if the user is asking for general assistance or information, and no specific action is required, you can respond with the answer and the relevant supported capabilities: {AGENT_CAPABILITIES} and respond that the supervisor can further respond with FINISH.       
-        """
-    )
-    # IMPORTANT: Pass the prompt under the 'contents' key as required.
-    # result = llm.invoke({"contents": [prompt]})
-    result = llm.invoke(prompt)
+    print_node_message(message)
+    return worker_result(state, message)
+
+def assistant_node(state: State, config: RunnableConfig) -> Command[Literal["supervisor"]]:
+    # Only the messages added since the previous call are converted into the thread's context.
+    thread_id = config.get("configurable", {}).get("thread_id", "default")
+    context = assistant_contexts.get(thread_id)
+    context.update(state["messages"])
+    messages = context.to_messages(history.compact(context.messages, key=f"assistant-{thread_id}"))
+    result = assistant_llm.get().invoke(messages)
     content = result.content
     message = HumanMessage(content=content, name="assistant_agent")
-    print_message_nicely(message)
+    print_node_message(message)
     return Command(
         update={
             "messages": [message],
@@ -296,9 +418,76 @@ builder.add_node("supervisor", supervisor_node)
 builder.add_node("blockchain_agent", blockchain_node)
 builder.add_node("twitter_agent", twitter_node)
 builder.add_node("assistant_agent", assistant_node)
+builder.add_node("join", join_node)
 builder.add_edge(START, "supervisor")
 
-graph = builder.compile()
+graph = builder.compile(checkpointer=memory)
+
+# Cell 6b: Async variant of the graph for concurrent sessions (graph.ainvoke / graph.astream)
+
+async def async_supervisor_node(state: State, config: RunnableConfig) -> Command[Literal["blockchain_agent", "twitter_agent", "__end__"]]:
+    cached = cached_response(state["messages"])
+    if cached is not None:
+        return cached
+    stopped = budget_stop(state, config)
+    if stopped is not None:
+        return stopped
+    confirmed = policy_confirmation(state)
+    if confirmed is not None:
+        return confirmed
+    goto = fast_route(state["messages"])
+    if goto is not None:
+        route_stats.record("fast")
+    else:
+        messages = supervisor_prefix.assemble(await history.acompact(state["messages"]))
+        response = await router_llm.get().with_structured_output(Router).ainvoke(messages)
+        route_stats.record("llm")
+        if len(response.tasks) > 1:
+            print_routing(" + ".join(task.worker for task in response.tasks))
+            return fan_out(state["messages"], response.tasks)
+        goto = response.next
+    print_routing(goto)
+    if goto == "FINISH":
+        response_cache.remember(state["messages"])
+        goto = END
+    return Command(goto=goto, update={"next": goto})
+
+async def async_blockchain_node(state: State) -> Command[Literal["supervisor", "join"]]:
+    agent = await asyncio.to_thread(async_blockchain_agent.get)
+    messages = await history.acompact(state["messages"])
+    # The models take an LLM slot per call (models.py), so confirmations in between hold none.
+    result = await agent.ainvoke({"messages": messages})
+    message = HumanMessage(content=result["messages"][-1].content, name="blockchain_agent")
+    print_node_message(message)
+    return worker_result(state, message)
+
+async def async_twitter_node(state: State) -> Command[Literal["supervisor", "join"]]:
+    agent = await asyncio.to_thread(async_twitter_agent.get)
+    messages = await history.acompact(state["messages"])
+    result = await agent.ainvoke({"messages": messages})
+    message = HumanMessage(content=result["messages"][-1].content, name="twitter_agent")
+    print_node_message(message)
+    return worker_result(state, message)
+
+async def async_assistant_node(state: State, config: RunnableConfig) -> Command[Literal["supervisor"]]:
+    thread_id = config.get("configurable", {}).get("thread_id", "default")
+    context = assistant_contexts.get(thread_id)
+    context.update(state["messages"])
+    messages = context.to_messages(await history.acompact(context.messages, key=f"assistant-{thread_id}"))
+    result = await assistant_llm.get().ainvoke(messages)
+    message = HumanMessage(content=result.content, name="assistant_agent")
+    print_node_message(message)
+    return Command(update={"messages": [message], "next": "supervisor"}, goto="supervisor")
+
+async_builder = StateGraph(State)
+async_builder.add_node("supervisor", async_supervisor_node)
+async_builder.add_node("blockchain_agent", async_blockchain_node)
+async_builder.add_node("twitter_agent", async_twitter_node)
+async_builder.add_node("assistant_agent", async_assistant_node)
+async_builder.add_node("join", join_node)
+async_builder.add_edge(START, "supervisor")
+
+async_graph = async_builder.compile(checkpointer=memory)
 
 # # Optionally, display the graph using mermaid visualization
 # from IPython.display import Image, display
@@ -323,8 +512,10 @@ from langchain_core.messages import HumanMessage
 # Print the conversation nicely
 # print_conversation_nicely(result_state["messages"])
 
-def run_chat_mode(graph, config):
+def run_chat_mode(graph, config, stream=True):
     """Run the agent interactively based on user input."""
+    # While streaming, the renderer shows node output as it arrives instead of the nodes printing it.
+    set_node_output(not stream)
     print("\n" + "="*50)
     print("🤖 Welcome to DeFi Guru!".center(50))
     print("="*50)
@@ -342,14 +533,22 @@ def run_chat_mode(graph, config):
             print_message_nicely(initial_message)
             
             initial_messages = [initial_message]
-            result_state = graph.invoke(
-                {"messages": initial_messages}, 
-                config=config, 
-                stream_mode="values"
-            )
+            route_stats.reset()
+            if stream:
+                stream_conversation(graph, {"messages": initial_messages}, config)
+            else:
+                graph.invoke({"messages": initial_messages}, config=config)
 
             print("\n" + "-"*50)
             print("✅ Conversation complete for this request!")
+            print(route_stats.summary())
+            print(tracer.summary())
+            if turn_budget.summary():
+                print(turn_budget.summary())
+            if confirmation_policy.summary():
+                print(confirmation_policy.summary())
+            if model_ledger.summary():
+                print(model_ledger.summary())
             print("-"*50)
 
         except KeyboardInterrupt:
@@ -359,6 +558,49 @@ def run_chat_mode(graph, config):
             print(f"\n❌ An error occurred: {str(e)}")
             print("Please try again.")
 
+async def run_chat_mode_async(graph, config, stream=True):
+    """Run the async graph interactively; input is read off the event loop."""
+    set_node_output(not stream)
+    print("\n" + "="*50)
+    print("🤖 Welcome to DeFi Guru!".center(50))
+    print("="*50)
+    print("\nType 'exit' to end the conversation.")
+
+    while True:
+        try:
+            user_input = await asyncio.to_thread(input, "\n💬 Your message: ")
+            if user_input.lower() == 'exit':
+                print("\nGoodbye! Thanks for using DeFi Guru! 👋")
+                break
+
+            initial_message = HumanMessage(content=user_input, name="User")
+            print_message_nicely(initial_message)
+
+            route_stats.reset()
+            if stream:
+                await astream_conversation(graph, {"messages": [initial_message]}, config)
+            else:
+                await graph.ainvoke({"messages": [initial_message]}, config=config)
+
+            print("\n" + "-"*50)
+            print("✅ Conversation complete for this request!")
+            print(route_stats.summary())
+            print(tracer.summary())
+            if turn_budget.summary():
+                print(turn_budget.summary())
+            if confirmation_policy.summary():
+                print(confirmation_policy.summary())
+            if model_ledger.summary():
+                print(model_ledger.summary())
+            print("-"*50)
+
+        except (KeyboardInterrupt, EOFError):
+            print("\n\nGoodbye! Thanks for using DeFi Guru! 👋")
+            break
+        except Exception as e:
+            print(f"\n❌ An error occurred: {str(e)}")
+            print("Please try again.")
+
 def main():
     """Initialize and run the DeFi Guru."""
 
@@ -366,10 +608,22 @@ def main():
 
     try:
         # Your existing initialization code here
-        config = {"configurable": {"thread_id": "1", "user_id": "user@example.com"}}
+        config = {"configurable": {"thread_id": "1", "user_id": "user@example.com"}, "callbacks": [tracer, turn_budget]}
+        if METRICS_PORT:
+            serve_metrics(METRICS_PORT)
         
-        # Run the chat mode
-        run_chat_mode(graph, config)
+        if "--eager" in sys.argv:
+            warm_up()
+        # Start indexing positions while the user types the first message.
+        from positions import get_position_index
+        get_position_index()
+
+        # Run the chat mode (pass --async to use the asyncio graph, --no-stream to print whole messages)
+        stream = "--no-stream" not in sys.argv
+        if "--async" in sys.argv:
+            asyncio.run(run_chat_mode_async(async_graph, config, stream=stream))
+        else:
+            run_chat_mode(graph, config, stream=stream)
 
     except Exception as e:
         print(f"\n❌ Initialization error: {str(e)}")
@@ -0,0 +1,99 @@
+# allowance.py
+
+import os
+import threading
+import time
+
+from contracts import erc20
+from helpers import parse_token_amounts, TOKENS, CONTRACTS
+
+# Only our own transactions change these allowances, and those update the cache directly,
+# so a cached read stays valid for a while (seconds). Freshness is judged by the clock, so a
+# cache hit costs no eth_blockNumber round-trip.
+ALLOWANCE_MAX_AGE = float(os.getenv("ALLOWANCE_MAX_AGE", "600"))
+
+
+def read_allowance(token_address, owner, spender, block="latest"):
+    return int(erc20.at(token_address).allowance(owner, spender).call(block), 16)
+
+
+def wallet_address(wallet):
+    return wallet.default_address.address_id
+
+
+class AllowanceCache:
+    """
+    ERC20 allowances per (token, owner, spender), tagged with the time they were read.
+
+    Entries older than `max_age` seconds are read again. Our own approvals set the cached value
+    from the receipt; mints and liquidity increases spend part of it, so they drop the entry.
+    """
+
+    def __init__(self, max_age=ALLOWANCE_MAX_AGE, read=read_allowance, clock=time.monotonic):
+        self.max_age = max_age
+        self.read = read
+        self.clock = clock
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _key(self, token_address, owner, spender):
+        return token_address.lower(), owner.lower(), spender.lower()
+
+    def get(self, token_address, owner, spender=CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]):
+        key = self._key(token_address, owner, spender)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and self.clock() - entry[1] <= self.max_age:
+            return entry[0]
+        read_at = self.clock()
+        amount = self.read(token_address, owner, spender)
+        with self.lock:
+            self.entries[key] = (amount, read_at)
+        return amount
+
+    def set(self, token_address, owner, amount, spender=CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]):
+        with self.lock:
+            self.entries[self._key(token_address, owner, spender)] = (amount, self.clock())
+
+    def invalidate(self, token_address, owner, spender=CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]):
+        with self.lock:
+            self.entries.pop(self._key(token_address, owner, spender), None)
+
+    def missing(self, owner, amounts, assume_sufficient=True):
+        """
+        Return the (symbol, required amount in wei) pairs from `amounts` that the liquidity
+        contract is not yet allowed to spend. Allowances that cannot be read count as
+        sufficient unless `assume_sufficient` is False.
+        """
+        missing = []
+        for symbol, amount_wei in amounts:
+            try:
+                allowance = self.get(TOKENS[symbol]['address'], owner)
+            except Exception as e:
+                print(f"⚠️ Could not read {symbol} allowance: {str(e)}")
+                allowance = None if assume_sufficient else 0
+            if allowance is not None and allowance < amount_wei:
+                missing.append((symbol, amount_wei))
+        return missing
+
+
+allowance_cache = AllowanceCache()
+
+
+def format_missing_allowances(missing):
+    needed = ", ".join(f"{amount_wei / 10 ** TOKENS[symbol]['decimals']:g} {symbol}" for symbol, amount_wei in missing)
+    return f"Insufficient allowance for the liquidity contract. Approve at least {needed} with approve_token first."
+
+
+def check_liquidity_allowances(wallet, *token_amounts):
+    """Pre-flight for mint/increase: an error message if an approval is missing, else None."""
+    amounts = parse_token_amounts(token_amounts)
+    missing = allowance_cache.missing(wallet_address(wallet), amounts)
+    return format_missing_allowances(missing) if missing else None
+
+
+def spend_liquidity_allowances(wallet, *token_amounts):
+    """A confirmed mint/increase used part of the allowances, so they are read again next time."""
+    owner = wallet_address(wallet)
+    for symbol, _ in parse_token_amounts(token_amounts):
+        allowance_cache.invalidate(TOKENS[symbol]['address'], owner)
@@ -1,12 +1,18 @@
 # approve_token.py
+import asyncio
 from cdp import Wallet
 from typing import Type
 from pydantic import BaseModel, Field
 
 # Import CdpTool
 from cdp_langchain.tools import CdpTool
+from langchain_core.tools import StructuredTool
 
-from helpers import parse_token_amount, TOKENS, CONTRACTS, ERC20_ABI
+from limits import chain_slots
+from allowance import allowance_cache, wallet_address
+from tx_manager import get_transaction_manager
+from contracts import erc20
+from helpers import parse_token_amount, emit_progress, TOKENS, CONTRACTS
 
 APPROVE_TOKEN_DESCRIPTION = """
 Approve the Uniswap V3 Liquidity contract to spend a specified amount of your ERC20 tokens on your behalf. This is required before adding liquidity or performing actions involving token transfers by the contract if approval is not already done by the user.
@@ -19,7 +25,7 @@ Approve the Uniswap V3 Liquidity contract to spend a specified amount of your ER
 - **token_amount**: The amount and symbol of the token to approve (e.g., "1,000,000 STK").
 
 **Important Notes:**
-- **Existing Approval**: Check if sufficient allowance exists to avoid unnecessary transactions.
+- **Existing Approval**: The tool reads the current allowance first and skips the transaction if it is already sufficient.
 - If approval requesed for small amount of tokens (<100, eg. 1 STK) then approve for 100 times the amount to avoid multiple approvals in future.
 - **Token Support**: Only recognized tokens can be approved.
 - **Network Support**: Supported only on 'base-sepolia' network.
@@ -34,34 +40,70 @@ class ApproveTokenInput(BaseModel):
         description='The amount and symbol of the token to approve, e.g., "1000000 STK".'
     )
 
+def submit_approve_token(wallet: Wallet, token_amount: str):
+    """Submit the approval transaction and return the pending invocation."""
+    symbol, amount_wei = parse_token_amount(token_amount)
+    return submit_approval(wallet, symbol, amount_wei)
+
+def submit_approval(wallet: Wallet, symbol: str, amount_wei: int):
+    """Submit an approval of `amount_wei` of `symbol` for the liquidity contract."""
+    token_address = TOKENS[symbol]['address']
+    return erc20.at(token_address).approve(CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"], amount_wei).invoke(wallet)
+
+def has_sufficient_allowance(wallet: Wallet, token_amount: str) -> bool:
+    """Check the (cached) allowance so no approval is sent when one already covers the amount."""
+    symbol, amount_wei = parse_token_amount(token_amount)
+    return not allowance_cache.missing(wallet_address(wallet), [(symbol, amount_wei)], assume_sufficient=False)
+
+def record_approval(wallet: Wallet, token_amount: str):
+    """Update the allowance cache from our own confirmed approval."""
+    symbol, amount_wei = parse_token_amount(token_amount)
+    allowance_cache.set(TOKENS[symbol]['address'], wallet_address(wallet), amount_wei)
+
 def approve_token(wallet: Wallet, token_amount: str) -> str:
     """Approve tokens for the liquidity contract."""
     try:
         print("-"*20 + "Invoking approve_token"+ "-"*20)
 
-        symbol, amount_wei = parse_token_amount(token_amount)
-        token_address = TOKENS[symbol]['address']
-
-        # The address of your UniswapV3Liquidity contract
-        liquidity_contract_address = CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]
-
-        invocation = wallet.invoke_contract(
-            contract_address=token_address,
-            method='approve',
-            abi=ERC20_ABI,
-            args={
-                '_spender': liquidity_contract_address,
-                '_value': str(amount_wei),
-            },
-            asset_id='wei',  # Assuming 'wei' as the asset ID for ETH network
-        )
-        result = invocation.wait()
+        if has_sufficient_allowance(wallet, token_amount):
+            return f"✅ Sufficient allowance already exists for {token_amount}. No approval needed."
+
+        future = get_transaction_manager(wallet).submit(submit_approve_token, token_amount)
+        emit_progress("approve_token", "submitted")
+        emit_progress("approve_token", "waiting for confirmation")
+        result = future.result()
+        emit_progress("approve_token", "confirmed", tx_hash=result.transaction.transaction_hash)
+        record_approval(wallet, token_amount)
         
         # print("result:", result, "\n")
         print(f"✅ Approval successful! Transaction hash: {result.transaction.transaction_hash}")
 
         return f"✅ Approval successful! Transaction hash: {result.transaction.transaction_hash}"
     except Exception as e:
+        emit_progress("approve_token", "failed", error=str(e))
+        return f"❌ Approval failed: {str(e)}"
+
+async def aapprove_token(wallet: Wallet, token_amount: str) -> str:
+    """Approve tokens for the liquidity contract without blocking the event loop."""
+    try:
+        print("-"*20 + "Invoking approve_token"+ "-"*20)
+
+        if await asyncio.to_thread(has_sufficient_allowance, wallet, token_amount):
+            return f"✅ Sufficient allowance already exists for {token_amount}. No approval needed."
+
+        async with chain_slots():
+            future = await asyncio.to_thread(get_transaction_manager(wallet).submit, submit_approve_token, token_amount)
+            emit_progress("approve_token", "submitted")
+            emit_progress("approve_token", "waiting for confirmation")
+            result = await asyncio.wrap_future(future)
+            emit_progress("approve_token", "confirmed", tx_hash=result.transaction.transaction_hash)
+        await asyncio.to_thread(record_approval, wallet, token_amount)
+
+        print(f"✅ Approval successful! Transaction hash: {result.transaction.transaction_hash}")
+
+        return f"✅ Approval successful! Transaction hash: {result.transaction.transaction_hash}"
+    except Exception as e:
+        emit_progress("approve_token", "failed", error=str(e))
         return f"❌ Approval failed: {str(e)}"
 
 # Create the tool instance
@@ -72,4 +114,14 @@ def get_approve_token_tool(agentkit):
         cdp_agentkit_wrapper=agentkit,
         args_schema=ApproveTokenInput,
         func=approve_token,
-    )
\ No newline at end of file
+    )
+
+# Create the tool instance for the async graph
+def get_async_approve_token_tool(agentkit):
+    return StructuredTool.from_function(
+        name="approve_token",
+        description=APPROVE_TOKEN_DESCRIPTION,
+        args_schema=ApproveTokenInput,
+        func=lambda token_amount: approve_token(agentkit.wallet, token_amount),
+        coroutine=lambda token_amount: aapprove_token(agentkit.wallet, token_amount),
+    )
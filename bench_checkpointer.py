@@ -0,0 +1,71 @@
+# bench_checkpointer.py
+# Compares write and resume throughput of SQLiteCheckpointer against MemorySaver.
+#   python bench_checkpointer.py --threads 500 --turns 10
+
+import argparse
+import os
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import MessagesState, StateGraph, START, END
+
+from checkpointer import SQLiteCheckpointer
+
+
+def echo(state: MessagesState):
+    return {"messages": [AIMessage(content="ok: " + state["messages"][-1].content)]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("echo", echo)
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def write_threads(checkpointer, threads, turns):
+    graph = build_graph(checkpointer)
+    start = time.perf_counter()
+    for turn in range(turns):
+        for thread in range(threads):
+            config = {"configurable": {"thread_id": str(thread)}}
+            graph.invoke({"messages": [HumanMessage(content=f"approve {turn} STK", name="User")]}, config)
+    return time.perf_counter() - start
+
+
+def resume_threads(checkpointer, threads):
+    graph = build_graph(checkpointer)
+    start = time.perf_counter()
+    for thread in range(threads):
+        graph.get_state({"configurable": {"thread_id": str(thread)}})
+    return time.perf_counter() - start
+
+
+def main(args):
+    steps = args.threads * args.turns
+
+    memory = MemorySaver()
+    elapsed = write_threads(memory, args.threads, args.turns)
+    print(f"MemorySaver         write:  {steps / elapsed:10.1f} turns/s")
+    elapsed = resume_threads(memory, args.threads)
+    print(f"MemorySaver         resume: {args.threads / elapsed:10.1f} threads/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.sqlite")
+        elapsed = write_threads(SQLiteCheckpointer(path, keep_last=args.keep_last), args.threads, args.turns)
+        print(f"SQLiteCheckpointer  write:  {steps / elapsed:10.1f} turns/s")
+        # A fresh instance stands in for a restarted process; threads load on demand.
+        elapsed = resume_threads(SQLiteCheckpointer(path, keep_last=args.keep_last), args.threads)
+        print(f"SQLiteCheckpointer  resume: {args.threads / elapsed:10.1f} threads/s")
+        print(f"SQLite file size:           {os.path.getsize(path) / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark checkpointer write and resume throughput.")
+    parser.add_argument("--threads", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--keep-last", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,100 @@
+# bench_contracts.py
+# Per-call overhead of contract calls: full ABI dicts and per-call encoding (the old path)
+# against the bindings in contracts.py. Writes go through CDP, which encodes the calldata on its
+# side, so for them only the invoke_contract payload (ABI + args) shrinks; the calldata encoding
+# rows are what eth_call reads and dry runs pay.
+#   python bench_contracts.py --calls 20000
+
+import argparse
+import json
+import time
+
+from eth_utils import keccak
+
+from abi import encode_value
+from contracts import erc20, liquidity_contract
+from helpers import TOKENS, CONTRACTS, ERC20_ABI, UNISWAP_V3_LIQUIDITY_ABI
+
+MINT_TYPES = ["address", "address", "uint256", "uint256"]
+
+
+class RecordingWallet:
+    """Does what the CDP SDK does locally with a contract invocation: serialize the ABI and args."""
+
+    def invoke_contract(self, contract_address, method, abi, args, asset_id):
+        return len(json.dumps(abi)) + len(json.dumps(args))
+
+
+def legacy_invoke(wallet, tokenA, tokenB, amountA, amountB):
+    return wallet.invoke_contract(
+        contract_address=CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"],
+        method='mintNewPosition',
+        abi=UNISWAP_V3_LIQUIDITY_ABI,
+        args={
+            'token0Address': tokenA,
+            'token1Address': tokenB,
+            'amount0ToAdd': str(amountA),
+            'amount1ToAdd': str(amountB),
+        },
+        asset_id='wei',
+    )
+
+
+def bound_invoke(wallet, tokenA, tokenB, amountA, amountB):
+    return liquidity_contract.mintNewPosition(tokenA, tokenB, amountA, amountB).invoke(wallet)
+
+
+def legacy_encode(tokenA, tokenB, amountA, amountB):
+    # Look the function up in the ABI and hash its signature on every call.
+    entry = next(entry for entry in UNISWAP_V3_LIQUIDITY_ABI if entry.get("name") == "mintNewPosition")
+    types = [arg["type"] for arg in entry["inputs"]]
+    selector = "0x" + keccak(text=f"mintNewPosition({','.join(types)})")[:4].hex()
+    return selector + "".join(encode_value(t, v) for t, v in zip(types, [tokenA, tokenB, amountA, amountB]))
+
+
+def bound_encode(tokenA, tokenB, amountA, amountB):
+    return liquidity_contract.mintNewPosition(tokenA, tokenB, amountA, amountB).data
+
+
+def legacy_balance_of(token, owner):
+    entry = next(entry for entry in ERC20_ABI if entry.get("name") == "balanceOf")
+    selector = "0x" + keccak(text=f"balanceOf({entry['inputs'][0]['type']})")[:4].hex()
+    return selector + encode_value("address", hex(owner))
+
+
+def bound_balance_of(token, owner):
+    return erc20.at(token).balanceOf(hex(owner)).data
+
+
+def timed(fn, args, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(*args[:-1], args[-1] + i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    options = parser.parse_args()
+
+    wallet = RecordingWallet()
+    tokens = (TOKENS['VED']['address'], TOKENS['STK']['address'], 10 ** 18)
+    assert legacy_encode(*tokens, 5) == bound_encode(*tokens, 5)
+    assert legacy_balance_of(TOKENS['STK']['address'], 5) == bound_balance_of(TOKENS['STK']['address'], 5)
+
+    rows = [
+        ("write: invoke payload", timed(lambda *a: legacy_invoke(wallet, *a), tokens + (1,), options.calls),
+         timed(lambda *a: bound_invoke(wallet, *a), tokens + (1,), options.calls)),
+        ("read: calldata encoding", timed(legacy_encode, tokens + (1,), options.calls),
+         timed(bound_encode, tokens + (1,), options.calls)),
+        ("read: ERC20 at(address)", timed(legacy_balance_of, (TOKENS['STK']['address'], 1), options.calls),
+         timed(bound_balance_of, (TOKENS['STK']['address'], 1), options.calls)),
+    ]
+    print(f"{'':<26}{'dict ABI (µs)':>15}{'bindings (µs)':>15}{'speedup':>10}")
+    for name, legacy, bound in rows:
+        print(f"{name:<26}{legacy:>15.2f}{bound:>15.2f}{legacy / bound:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
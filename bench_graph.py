@@ -0,0 +1,462 @@
+# bench_graph.py
+# Offline benchmark of the agent graph in agent.py. Gemini, the CDP wallet, Arcade and the
+# Base Sepolia RPC are replaced by deterministic local fakes with configurable latency, and
+# scripted conversations are replayed through the real async graph. No network, no API keys.
+#   python bench_graph.py --conversations 200 --concurrency 20
+#   python bench_graph.py --llm-latency 0 --confirm-latency 0 --tool-latency 0 --max-overhead-ms 50   (CI)
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+import uuid
+from typing import Any
+
+# The fakes only need in-process state: nothing is written next to the real databases.
+os.environ.setdefault("CHECKPOINTER", "memory")
+os.environ.setdefault("RESPONSE_CACHE_DB", "")
+os.environ.setdefault("TOKEN_CACHE_DB", ":memory:")
+os.environ.setdefault("POSITION_INDEX_DB", ":memory:")
+os.environ.setdefault("READ_MODE", "batch")
+os.environ.setdefault("TRACE_FILE", "")
+# Every role gets its fallback tier; the fake Groq models below answer it.
+os.environ.setdefault("GROQ_API_KEY", "offline")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, Field
+
+from abi import function_selector
+from budget import turn_budget
+from loadtest import StubWallet, percentile
+from prompts import LocalPrefixCache
+from tracing import Tracer
+
+# Scripted conversations: the user's message, the workers the supervisor routes to in order
+# (a list is one parallel step), the tool call each worker's ReAct agent makes, questions a
+# worker asks before its tool call and the assistant's confirmation. "expect" overrides the
+# nodes the route implies when the graph settles a step without the LLM.
+SCENARIOS = {
+    "liquidity_tweet": {
+        "message": "Create a new liquidity position with 1 VED and 10 STK, then post a tweet about it with the transaction link.",
+        "route": ["blockchain_agent", "assistant_agent", "twitter_agent"],
+        "tools": {
+            "blockchain_agent": ("add_liquidity", {"tokenA_amount": "1 VED", "tokenB_amount": "10 STK"}),
+            "twitter_agent": ("X_PostTweet", {"tweet_text": "Just added 1 VED and 10 STK of liquidity! #DeFi"}),
+        },
+        "assistant": "Yes, please post the tweet and include the transaction link.",
+        # The confirmation policy hands the successful transaction straight to the twitter agent.
+        "expect": ["supervisor", "blockchain_agent", "supervisor", "twitter_agent", "supervisor"],
+    },
+    "confirmed_approve": {
+        "message": "I want to provide liquidity with my STK soon.",
+        "route": ["blockchain_agent", "assistant_agent", "blockchain_agent"],
+        "tools": {"blockchain_agent": ("approve_token", {"token_amount": "50 STK"})},
+        "ask": {"blockchain_agent": "First the liquidity contract needs an allowance. Do you want me to approve 50 STK?"},
+        "expect": ["supervisor", "blockchain_agent", "supervisor", "blockchain_agent", "supervisor"],
+    },
+    "approve": {
+        "message": "approve 100 STK",
+        "route": ["blockchain_agent"],
+        "tools": {"blockchain_agent": ("approve_token", {"token_amount": "100 STK"})},
+    },
+    "price_and_search": {
+        "message": "Show my portfolio and search recent tweets about DeFi.",
+        "route": [["blockchain_agent", "twitter_agent"]],
+        "tools": {
+            "blockchain_agent": ("portfolio_snapshot", {}),
+            "twitter_agent": ("X_SearchRecentTweetsByKeywords", {"keywords": ["DeFi"]}),
+        },
+    },
+    # A worker that keeps asking for confirmation: the turn budget's loop detection ends it.
+    "confirmation_loop": {
+        "message": "Help me earn some yield on my tokens.",
+        "route": ["blockchain_agent", "assistant_agent"] * 5,
+        "assistant": "Yes, please go ahead with whatever you think is best.",
+        "expect": ["supervisor", "blockchain_agent", "supervisor", "assistant_agent", "supervisor",
+                   "blockchain_agent", "supervisor"],
+    },
+    "capabilities": {
+        "message": "What are the capabilities of your agents?",
+        "route": ["assistant_agent"],
+        "assistant": "I can manage tokens and liquidity on Base Sepolia and post updates to X.",
+        # Repeats of an informational question are answered from the response cache.
+        "cacheable": True,
+    },
+}
+
+
+def next_step(route, done):
+    """The route entry after `done` worker replies, or None once the route is complete."""
+    for step in route:
+        if done <= 0:
+            return step
+        done -= len(step) if isinstance(step, list) else 1
+    return None
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Stands in for ChatGoogleGenerativeAI and ChatGroq. Each call sleeps for `latency` seconds and
+    answers from the scenario the conversation's first user message belongs to: Router decisions
+    for the supervisor, scripted tool calls for the ReAct agents and a fixed reply for the
+    assistant. With `fail_every`, every n-th call times out instead (to exercise the fallbacks).
+    Usage counts the tool schemas as input, and `prefix_cache` reports the cached part of it.
+    """
+
+    latency: float = 0.0
+    scenarios: dict = Field(default_factory=dict)
+    fail_every: int = 0
+    calls: int = 0
+    prefix_cache: Any = None
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _scenario(self, messages):
+        first = next((m for m in messages if isinstance(m, HumanMessage) and m.name == "User"), None)
+        for scenario in self.scenarios.values():
+            if first is not None and first.content == scenario["message"]:
+                return scenario
+        return {"route": [], "tools": {}}
+
+    def _reply(self, messages, tools):
+        scenario = self._scenario(messages)
+        names = [tool["function"]["name"] for tool in tools or []]
+        if "Router" in names:
+            last_user = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage) and m.name == "User")
+            step = next_step(scenario["route"], len(messages) - last_user - 1)
+            if isinstance(step, list):
+                tasks = [{"worker": worker, "instruction": f"Do your part of: {messages[last_user].content}"} for worker in step]
+                args = {"next": step[0], "tasks": tasks}
+            else:
+                args = {"next": step or "FINISH"}
+            return AIMessage(content="", tool_calls=[{"name": "Router", "args": args, "id": uuid.uuid4().hex}])
+        if names:
+            if isinstance(messages[-1], ToolMessage):
+                return AIMessage(content=f"Done: {messages[-1].content}")
+            confirmed = any(isinstance(m, HumanMessage) and str(m.content).startswith("Yes, please") for m in messages)
+            for worker, (name, args) in scenario.get("tools", {}).items():
+                if name in names:
+                    if worker in scenario.get("ask", {}) and not confirmed:
+                        return AIMessage(content=scenario["ask"][worker])
+                    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": uuid.uuid4().hex}])
+            return AIMessage(content="Nothing to do.")
+        if isinstance(messages[0], SystemMessage) and "assistant agent" in messages[0].content:
+            return AIMessage(content=scenario.get("assistant", "No further action is needed."))
+        return AIMessage(content="Summary of the earlier conversation.")
+
+    def _result(self, messages, tools):
+        message = self._reply(messages, tools)
+        schemas = json.dumps(tools, sort_keys=True) if tools else ""
+        prompt = sum(estimate_tokens(str(m.content)) for m in messages) + (estimate_tokens(schemas) if tools else 0)
+        completion = estimate_tokens(message.content or json.dumps(message.tool_calls))
+        message.usage_metadata = {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+        if self.prefix_cache is not None:
+            system = "".join(str(m.content) for m in messages[:1] if isinstance(m, SystemMessage))
+            details = self.prefix_cache.usage(schemas + system)
+            if details:
+                message.usage_metadata["input_token_details"] = details
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _fail(self):
+        self.calls += 1
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise TimeoutError("fake model timed out")
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        time.sleep(self.latency)
+        self._fail()
+        return self._result(messages, tools)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self._fail()
+        return self._result(messages, tools)
+
+
+class PostTweetInput(BaseModel):
+    tweet_text: str = Field(..., description="The text of the tweet.")
+
+
+class SearchTweetsInput(BaseModel):
+    keywords: list[str] = Field(..., description="Keywords the tweets must contain.")
+
+
+class FakeArcadeToolManager:
+    """Stands in for langchain_arcade.ArcadeToolManager with an X toolkit that answers after `latency` seconds."""
+
+    latency = 0.0
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+
+    def get_tools(self, toolkits=None):
+        latency = self.latency
+
+        def post_tweet(tweet_text):
+            return f"Tweet posted: https://x.com/defiguru/status/{uuid.uuid4().int % 10 ** 19}"
+
+        def search_tweets(keywords):
+            return json.dumps({"data": [{"id": str(i), "text": f"Tweet {i} about {' '.join(keywords)}"} for i in range(3)]})
+
+        def tool(name, description, args_schema, answer):
+            def run(**kwargs):
+                time.sleep(latency)
+                return answer(**kwargs)
+
+            async def arun(**kwargs):
+                await asyncio.sleep(latency)
+                return answer(**kwargs)
+
+            return StructuredTool.from_function(
+                name=name, description=description, args_schema=args_schema, func=run, coroutine=arun,
+            )
+
+        return [
+            tool("X_PostTweet", "Post a tweet to X (Twitter).", PostTweetInput, post_tweet),
+            tool("X_SearchRecentTweetsByKeywords", "Search recent tweets on X (Twitter) by keywords.",
+                 SearchTweetsInput, search_tweets),
+        ]
+
+
+GET_POOL_SELECTOR = function_selector("getPool", ["address", "address", "uint24"])
+
+
+class FakeChain:
+    """
+    Answers the JSON-RPC requests of rpc.py locally: a block number that advances with time,
+    empty logs, a pool for every getPool and a zero word for every other eth_call (no allowance,
+    simulations succeed).
+    """
+
+    POOL = "0x" + "0" * 24 + "00000000000000000000000000000000000000aa"
+
+    def __init__(self, latency=0.0, block_time=2.0):
+        self.latency = latency
+        self.block_time = block_time
+        self.requests = 0
+
+    def result(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(int(time.monotonic() / self.block_time))
+        if method == "eth_call":
+            if params[0]["data"].startswith(GET_POOL_SELECTOR):
+                return self.POOL
+            return "0x" + "0" * 64
+        if method == "eth_getLogs":
+            return []
+        return None
+
+    def post(self, payload, url=None, timeout=10):
+        self.requests += 1
+        time.sleep(self.latency)
+        if isinstance(payload, list):
+            return [{"jsonrpc": "2.0", "id": call["id"], "result": self.result(call["method"], call["params"])} for call in payload]
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": self.result(payload["method"], payload["params"])}
+
+
+def load_agent(args):
+    """Import agent.py with every external backend swapped for its fake."""
+    FakeArcadeToolManager.latency = args.tool_latency
+    # One simulated prefix cache per fake provider, as each provider caches only the prompts it was sent.
+    # Its hits are estimates of implicit provider caching; the ledger labels them "simulated".
+    google_cache = None if args.no_prefix_cache else LocalPrefixCache()
+    groq_cache = None if args.no_prefix_cache else LocalPrefixCache()
+    sys.modules["langchain_google_genai"] = types.SimpleNamespace(
+        ChatGoogleGenerativeAI=lambda model=None, **kwargs: FakeChatModel(
+            latency=args.llm_latency, scenarios=SCENARIOS, fail_every=args.llm_fail_every, prefix_cache=google_cache),
+    )
+    sys.modules["langchain_groq"] = types.SimpleNamespace(
+        ChatGroq=lambda model=None, **kwargs: FakeChatModel(latency=args.llm_latency, scenarios=SCENARIOS, prefix_cache=groq_cache),
+    )
+    sys.modules["langchain_arcade"] = types.SimpleNamespace(ArcadeToolManager=FakeArcadeToolManager)
+
+    import rpc
+    chain = FakeChain(args.rpc_latency)
+    rpc._post = chain.post
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import agent
+    from cdp_langchain.utils import CdpAgentkitWrapper
+    from lazy import Lazy
+    from tx_manager import TransactionManager, register_transaction_manager
+
+    wallet = StubWallet(args.confirm_latency)
+    register_transaction_manager(TransactionManager(wallet, poll_interval=0.05, fetch_receipts=wallet.fetch_receipts))
+    # model_construct skips the wrapper's validator, which would configure the CDP SDK and load the real wallet.
+    agent.cdp = Lazy(lambda: CdpAgentkitWrapper.model_construct(wallet=wallet, network_id="base-sepolia"))
+    agent.set_node_output(False)
+    return agent
+
+
+def expected_nodes(scenario):
+    if "expect" in scenario:
+        return scenario["expect"]
+    nodes = ["supervisor"]
+    for step in scenario["route"]:
+        nodes += sorted(step) + ["join", "supervisor"] if isinstance(step, list) else [step, "supervisor"]
+    return nodes
+
+
+def normalize(nodes):
+    """Parallel branches finish in any order; sort each group that ends in the join node."""
+    normalized, group = [], []
+    for node in nodes:
+        if node == "join":
+            normalized += sorted(group) + [node]
+        elif node == "supervisor":
+            normalized += group + [node]
+        else:
+            group.append(node)
+            continue
+        group = []
+    return normalized + group
+
+
+async def run_conversation(graph, scenario, tracer=None):
+    """Replay one scenario in a new thread; returns the nodes it visited, its replies and its wall time."""
+    callbacks = [turn_budget] + ([tracer] if tracer else [])
+    config = {"configurable": {"thread_id": uuid.uuid4().hex}, "callbacks": callbacks}
+    nodes, replies = [], []
+    start = time.perf_counter()
+    async for update in graph.astream({"messages": [HumanMessage(content=scenario["message"], name="User")]},
+                                      config, stream_mode="updates"):
+        for node, values in update.items():
+            nodes.append(node)
+            replies += [m.content for m in (values or {}).get("messages", [])]
+    return nodes, replies, time.perf_counter() - start
+
+
+def check(name, scenario, nodes, replies):
+    """Problems with a replayed conversation: a different route than scripted, or a failed tool."""
+    problems = []
+    cached = scenario.get("cacheable") and nodes == ["supervisor"]
+    if normalize(nodes) != expected_nodes(scenario) and not cached:
+        problems.append(f"{name}: visited {' -> '.join(nodes)}, expected {' -> '.join(expected_nodes(scenario))}")
+    problems += [f"{name}: {reply.splitlines()[0]}" for reply in replies if "❌" in reply]
+    return problems
+
+
+def overhead(spans):
+    """Graph time outside LLM and tool calls, and the number of top-level steps it was spread over."""
+    kinds = [(span["attributes"]["agent.span_kind"], span) for span in spans]
+    total = sum(span["endTimeUnixNano"] - span["startTimeUnixNano"] for kind, span in kinds if kind == "graph")
+    # Parallel branches overlap, so the backend time is the union of the LLM and tool intervals.
+    backend, covered_until = 0, 0
+    for start, end in sorted((span["startTimeUnixNano"], span["endTimeUnixNano"]) for kind, span in kinds if kind in ("llm", "tool")):
+        backend += max(0, end - max(start, covered_until))
+        covered_until = max(covered_until, end)
+    steps = sum(1 for kind, span in kinds if kind == "node" and span["attributes"].get("graph.top_level"))
+    return (total - backend) / 1e9, steps
+
+
+async def bench_scenarios(graph, names, repeats):
+    """Sequential replays: hops per conversation and graph overhead per step for each scenario."""
+    rows, problems = [], []
+    for name in names:
+        scenario = SCENARIOS[name]
+        # The first replay builds the agents and toolkits; it only counts for the hops.
+        nodes, replies, _ = await run_conversation(graph, scenario)
+        problems += check(name, scenario, nodes, replies)
+        hops = len(nodes)
+        per_step, walls = [], []
+        for _ in range(repeats):
+            tracer = Tracer(trace_file="")
+            nodes, replies, wall = await run_conversation(graph, scenario, tracer)
+            problems += check(name, scenario, nodes, replies)
+            extra, steps = overhead(tracer.last_trace)
+            per_step.append(extra / max(steps, 1))
+            walls.append(wall)
+        rows.append((name, hops, statistics.median(walls), statistics.median(per_step)))
+    return rows, sorted(set(problems))
+
+
+async def bench_memory(graph, names, threads):
+    """Traced memory retained per conversation thread (checkpoints, per-thread contexts, caches)."""
+    await run_conversation(graph, SCENARIOS[names[0]])
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(threads):
+        await run_conversation(graph, SCENARIOS[names[i % len(names)]])
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / threads
+
+
+async def bench_throughput(graph, names, conversations, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            return (await run_conversation(graph, SCENARIOS[names[i % len(names)]]))[2]
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(conversations)))
+    return latencies, time.perf_counter() - start
+
+
+async def main(args):
+    names = args.scenario or list(SCENARIOS)
+    agent = load_agent(args)
+    graph = agent.async_graph
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows, problems = await bench_scenarios(graph, names, args.repeats)
+        per_thread = await bench_memory(graph, names, args.memory_threads)
+        latencies, elapsed = await bench_throughput(graph, names, args.conversations, args.concurrency)
+
+    print(f"{'scenario':<18}{'hops':>6}{'wall (ms)':>12}{'overhead/step (ms)':>20}")
+    for name, hops, wall, per_step in rows:
+        print(f"{name:<18}{hops:>6}{wall * 1000:>12.1f}{per_step * 1000:>20.2f}")
+    print(f"\nmemory growth:  {per_thread / 1024:.1f} KiB per thread ({args.memory_threads} threads)")
+    print(f"conversations:  {len(latencies)}  concurrency: {args.concurrency}")
+    print(f"p50 latency:    {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"p99 latency:    {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"throughput:     {len(latencies) / elapsed:.1f} conversations/s")
+    if turn_budget.summary():
+        print(turn_budget.summary())
+    print(agent.model_ledger.summary())
+    print(agent.prompt_prefixes.summary())
+
+    worst = max(per_step for *_, per_step in rows)
+    if args.max_overhead_ms is not None and worst * 1000 > args.max_overhead_ms:
+        problems.append(f"graph overhead {worst * 1000:.2f} ms/step exceeds {args.max_overhead_ms} ms")
+    for problem in problems:
+        print(f"❌ {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the agent graph offline with fake LLM, wallet and Twitter backends.")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="replay only these scenarios")
+    parser.add_argument("--repeats", type=int, default=5, help="sequential replays per scenario")
+    parser.add_argument("--memory-threads", type=int, default=50, help="threads run to measure memory growth")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--llm-fail-every", type=int, default=0, help="every n-th call to a primary fake model times out")
+    parser.add_argument("--no-prefix-cache", action="store_true", help="fake providers without prompt-prefix caching (the baseline)")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="seconds per fake Twitter call")
+    parser.add_argument("--confirm-latency", type=float, default=0.2, help="seconds until a stub transaction confirms")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="seconds per fake JSON-RPC request")
+    parser.add_argument("--max-overhead-ms", type=float, help="fail when graph overhead per step exceeds this")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,74 @@
+# bench_startup.py
+# Reports import time per module and time-to-first-prompt of agent.py.
+#   python bench_startup.py            (all modules, then agent.py)
+#   python bench_startup.py --eager    (time-to-first-prompt with every agent built up front)
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+MODULES = [
+    # Our modules
+    "config", "helpers", "router", "history", "context", "streaming", "limits", "lazy",
+    "checkpointer", "response_cache", "rpc", "allowance",
+    "approve_token", "mint_new_position", "increase_liquidity", "add_liquidity", "server",
+    # Heavy dependencies
+    "langgraph.prebuilt", "langchain_google_genai", "cdp_langchain", "langchain_arcade", "import_ipynb",
+]
+
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+PROMPT = "Your message:"
+
+
+def import_time(module):
+    """Cumulative import time of `module` in a fresh interpreter, in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        match = IMPORTTIME_PATTERN.match(line)
+        if match and match.group(3) == module:
+            return int(match.group(2)) / 1000
+    return None
+
+
+def time_to_first_prompt(extra_args):
+    """Seconds from launching agent.py until the chat prompt is printed."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "agent.py", *extra_args],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    output = ""
+    while PROMPT not in output:
+        char = process.stdout.read(1)
+        if not char:
+            process.wait()
+            raise RuntimeError(f"agent.py exited before prompting:\n{output[-2000:]}")
+        output += char
+    elapsed = time.perf_counter() - start
+    process.communicate("exit\n")
+    return elapsed
+
+
+def main(args):
+    print(f"{'module':<28}{'import (ms)':>12}")
+    for module in MODULES:
+        elapsed = import_time(module)
+        print(f"{module:<28}{'n/a' if elapsed is None else f'{elapsed:.1f}':>12}")
+
+    extra_args = ["--eager"] if args.eager else []
+    print(f"\ntime to first prompt{' (eager)' if args.eager else ''}: {time_to_first_prompt(extra_args):.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark agent.py startup.")
+    parser.add_argument("--eager", action="store_true", help="build every agent before the first prompt")
+    main(parser.parse_args())
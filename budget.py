@@ -0,0 +1,160 @@
+# budget.py
+
+import hashlib
+import os
+import re
+import threading
+from collections import Counter
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+
+# Worker replies allowed per user turn. Each takes a supervisor and a worker step, so the
+# default stays below LangGraph's recursion limit of 25 and the turn ends cleanly instead.
+MAX_TURN_STEPS = int(os.getenv("MAX_TURN_STEPS", "10"))
+# LLM tokens (prompt + completion, all agents together) allowed per user turn.
+MAX_TURN_TOKENS = int(os.getenv("MAX_TURN_TOKENS", "60000"))
+# A reply seen this many times in one turn (same sender, same content) means the agents are going in circles.
+LOOP_REPEAT_LIMIT = int(os.getenv("LOOP_REPEAT_LIMIT", "2"))
+
+# Transaction hashes and addresses differ between otherwise identical replies.
+HEX_PATTERN = re.compile(r"0x[0-9a-f]{40,}", re.IGNORECASE)
+SPACE_PATTERN = re.compile(r"\s+")
+
+WORKERS = ("blockchain_agent", "twitter_agent")
+
+
+def signature(message):
+    """(sender, content hash) of a message, ignoring case, whitespace and hashes."""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    normalized = SPACE_PATTERN.sub(" ", HEX_PATTERN.sub("0x", content.lower())).strip()
+    return message.name, hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def current_turn(messages):
+    """The latest user message and the replies that followed it."""
+    last_user = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].name == "User"), None)
+    if last_user is None:
+        return None, messages
+    return messages[last_user], messages[last_user + 1:]
+
+
+def cycle_pattern(names):
+    """Canonical name of a cycle, e.g. "assistant_agent → blockchain_agent", whatever node it was entered at."""
+    rotations = [names[i:] + names[:i] for i in range(len(names))]
+    return " → ".join(min(rotations))
+
+
+class TurnBudget(BaseCallbackHandler):
+    """
+    Bounds the work one user turn can cause.
+
+    As a callback handler it adds up the LLM tokens each conversation thread spends; the
+    supervisor calls `check` before every hop. A turn that exceeds its step or token budget, or
+    whose latest reply repeats an earlier one, ends with a deterministic message instead of
+    another round of LLM calls. How often each stop reason and loop pattern occurs is counted.
+    """
+
+    def __init__(self, max_steps=MAX_TURN_STEPS, max_tokens=MAX_TURN_TOKENS, repeat_limit=LOOP_REPEAT_LIMIT):
+        self.max_steps = max_steps
+        self.max_tokens = max_tokens
+        self.repeat_limit = repeat_limit
+        self.lock = threading.Lock()
+        # thread id -> [turn key, tokens spent]
+        self.turns = {}
+        self.runs = {}
+        self.stats = Counter()
+
+    # Token accounting
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._track(run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._track(run_id, metadata)
+
+    def _track(self, run_id, metadata):
+        thread_id = (metadata or {}).get("thread_id")
+        if thread_id is not None:
+            with self.lock:
+                self.runs[run_id] = thread_id
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                tokens += usage.get("total_tokens", 0)
+        with self.lock:
+            thread_id = self.runs.pop(run_id, None)
+            if thread_id is not None:
+                self.turns.setdefault(thread_id, [None, 0])[1] += tokens
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self.lock:
+            self.runs.pop(run_id, None)
+
+    # Supervisor check
+
+    def tokens(self, thread_id):
+        with self.lock:
+            return self.turns.get(thread_id, [None, 0])[1]
+
+    def check(self, thread_id, messages):
+        """Return (reason, detail) if the turn has to stop now, else None."""
+        user, replies = current_turn(messages)
+        turn = user.id or user.content if user is not None else None
+        with self.lock:
+            entry = self.turns.setdefault(thread_id, [turn, 0])
+            if entry[0] != turn:
+                entry[:] = [turn, 0]
+            tokens = entry[1]
+
+        stop = None
+        seen = [signature(message) for message in replies]
+        if seen and seen.count(seen[-1]) >= self.repeat_limit:
+            previous = len(seen) - 1 - seen[-2::-1].index(seen[-1]) - 1
+            stop = ("loop", cycle_pattern([name for name, _ in seen[previous + 1:]]))
+        elif len(replies) >= self.max_steps:
+            stop = ("steps", f"{len(replies)} steps")
+        elif tokens >= self.max_tokens:
+            stop = ("tokens", f"{tokens} tokens")
+        if stop is not None:
+            with self.lock:
+                self.stats[stop] += 1
+        return stop
+
+    def resolution(self, messages, stop):
+        """The message a stopped turn ends with: why it stopped and the latest worker result."""
+        reason, detail = stop
+        if reason == "loop":
+            text = f"⚠️ Stopped: the agents were repeating themselves ({detail})."
+        elif reason == "steps":
+            text = f"⚠️ Stopped after {detail} (limit {self.max_steps})."
+        else:
+            text = f"⚠️ Stopped after using {detail} this turn (limit {self.max_tokens})."
+        _, replies = current_turn(messages)
+        latest = next((message for message in reversed(replies) if message.name in WORKERS), None)
+        if latest is not None:
+            text += f"\nLatest result from {latest.name}:\n{latest.content}"
+        text += "\nPlease confirm or rephrase your request to continue."
+        return HumanMessage(content=text, name="assistant_agent")
+
+    def summary(self):
+        if not self.stats:
+            return ""
+        parts = [f"{detail if reason == 'loop' else reason} ×{count}" for (reason, detail), count in self.stats.most_common()]
+        return "Stopped turns: " + ", ".join(parts)
+
+    def render(self):
+        """Stop counts in the Prometheus text format."""
+        lines = ["# HELP agent_turn_stops_total Turns stopped by the step/token budget or loop detection",
+                 "# TYPE agent_turn_stops_total counter"]
+        with self.lock:
+            for (reason, detail), count in sorted(self.stats.items()):
+                pattern = detail if reason == "loop" else ""
+                lines.append(f'agent_turn_stops_total{{reason="{reason}",pattern="{pattern}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+turn_budget = TurnBudget()
@@ -0,0 +1,16 @@
+# config.py
+# Plain-module counterpart of load_env.ipynb, so agent.py doesn't need import_ipynb to start.
+
+import os
+from dotenv import load_dotenv
+load_dotenv()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
+LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT")
+LANGSMITH_ENDPOINT = os.getenv("LANGSMITH_ENDPOINT")
+LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING")
+CDP_API_KEY_NAME = os.getenv("CDP_API_KEY_NAME")
+CDP_API_KEY_PRIVATE_KEY = os.getenv("CDP_API_KEY_PRIVATE_KEY")
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+ARCADE_API_KEY = os.getenv("ARCADE_API_KEY")
+MNEMONIC_PHRASE = os.getenv("MNEMONIC_PHRASE")
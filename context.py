@@ -0,0 +1,65 @@
+# context.py
+
+import os
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+# Threads whose context is kept; the least recently used one is dropped and rebuilt from the
+# graph state if that conversation comes back.
+CONTEXT_MAX_THREADS = int(os.getenv("CONTEXT_MAX_THREADS", "1000"))
+
+
+class ConversationContext:
+    """
+    Structured conversation context for one thread.
+
+    Messages are converted once, when first seen, and kept with their sender names so the
+    LLM can tell the user apart from the agents. The static system prompt is built once.
+    """
+
+    def __init__(self, static_prefix):
+        self.system_message = SystemMessage(content=static_prefix)
+        self.messages = []
+        self._seen_ids = set()
+
+    def update(self, messages):
+        """Append only the messages that were not seen on a previous call."""
+        for msg in messages:
+            key = msg.id or id(msg)
+            if key in self._seen_ids:
+                continue
+            self._seen_ids.add(key)
+            self.messages.append(self._convert(msg))
+        return self.messages
+
+    @staticmethod
+    def _convert(msg):
+        name = msg.name or msg.type
+        # Gemini drops the `name` field, so the sender is also kept in the content. Agent messages
+        # stay HumanMessages like everywhere else in the graph: the assistant did not write them.
+        return HumanMessage(content=f"[{name}] {msg.content}", name=name, id=msg.id)
+
+    def to_messages(self, messages=None):
+        return [self.system_message] + list(self.messages if messages is None else messages)
+
+
+class ContextStore:
+    """Keeps one ConversationContext per LangGraph thread, for the `max_threads` most recent threads."""
+
+    def __init__(self, static_prefix, max_threads=CONTEXT_MAX_THREADS):
+        self.static_prefix = static_prefix
+        self.max_threads = max_threads
+        self.lock = threading.Lock()
+        self._contexts = OrderedDict()
+
+    def get(self, thread_id):
+        with self.lock:
+            context = self._contexts.get(thread_id)
+            if context is None:
+                context = self._contexts[thread_id] = ConversationContext(self.static_prefix)
+            self._contexts.move_to_end(thread_id)
+            while len(self._contexts) > self.max_threads:
+                self._contexts.popitem(last=False)
+            return context
@@ -0,0 +1,158 @@
+# contracts.py
+
+import inspect
+import keyword
+import threading
+from collections import OrderedDict
+
+from abi import DYNAMIC_TYPES, function_selector, value_encoder
+from helpers import (
+    CONTRACTS, ERC20_ABI, FACTORY_ABI, MULTICALL3_ABI, POOL_ABI, POSITION_MANAGER_ABI, UNISWAP_V3_LIQUIDITY_ABI,
+)
+from multicall import MULTICALL3
+from rpc import eth_call
+
+# Bindings made by `ContractBinding.at`, kept per ABI for this many addresses (tokens, pools).
+BINDING_CACHE_SIZE = 256
+
+
+class PreparedCall:
+    """A contract function applied to its arguments, ready to send through CDP or eth_call."""
+
+    def __init__(self, function, address, values):
+        self.function = function
+        self.address = address
+        self.values = values
+
+    @property
+    def data(self):
+        return self.function.encode(*self.values)
+
+    @property
+    def args(self):
+        """Arguments in the shape wallet.invoke_contract expects (numbers as strings)."""
+        return {
+            name: value if type_ in ("address", "bool", "bytes32", "bytes", "string") else str(value)
+            for name, type_, value in zip(self.function.names, self.function.types, self.values)
+        }
+
+    @property
+    def request(self):
+        """(address, calldata), the shape multicall.reader.read takes."""
+        return self.address, self.data
+
+    def invoke(self, wallet):
+        """
+        Send the call through CDP. CDP takes the method, ABI and arguments and encodes the calldata
+        on its side, so a write only gains the one-entry ABI; the precomputed selector and encoders
+        serve `data`, i.e. eth_call reads and dry runs.
+        """
+        return wallet.invoke_contract(
+            contract_address=self.address,
+            method=self.function.name,
+            abi=self.function.abi,
+            args=self.args,
+            asset_id='wei',
+        )
+
+    def call(self, block="latest", sender=None):
+        return eth_call(self.address, self.data, block, sender)
+
+
+class ContractFunction:
+    """
+    One ABI function with its selector, argument encoders and Python signature worked out once.
+    Calling it returns a PreparedCall. The encoders are used for reads (eth_call, Multicall3) and
+    simulations; writes go through CDP, which encodes them itself.
+    """
+
+    def __init__(self, entry):
+        self.name = entry["name"]
+        self.names = [arg["name"] or f"arg{i}" for i, arg in enumerate(entry["inputs"])]
+        self.types = [arg["type"] for arg in entry["inputs"]]
+        self.selector = function_selector(self.name, self.types)
+        self.encoders = [value_encoder(type_) for type_ in self.types]
+        self.dynamic = any(type_ in DYNAMIC_TYPES for type_ in self.types)
+        # CDP only needs the entry for the called method, not the whole contract ABI.
+        self.abi = [entry]
+        # ABI names like "from" are Python keywords; those take a trailing underscore.
+        self.__signature__ = inspect.Signature([
+            inspect.Parameter(name + "_" if keyword.iskeyword(name) else name, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+            for name in self.names
+        ])
+        self.address = None
+
+    def bind(self, address):
+        bound = object.__new__(ContractFunction)
+        bound.__dict__.update(self.__dict__)
+        bound.address = address
+        return bound
+
+    def encode(self, *values):
+        if not self.dynamic:
+            return self.selector + "".join(encode(value) for encode, value in zip(self.encoders, values))
+        heads, tails, offset = [], [], 32 * len(values)
+        for type_, encode, value in zip(self.types, self.encoders, values):
+            if type_ in DYNAMIC_TYPES:
+                tail = encode(value)
+                heads.append(format(offset, "064x"))
+                tails.append(tail)
+                offset += len(tail) // 2
+            else:
+                heads.append(encode(value))
+        return self.selector + "".join(heads) + "".join(tails)
+
+    def __call__(self, *args, **kwargs):
+        values = self.__signature__.bind(*args, **kwargs).args if kwargs else args
+        if len(values) != len(self.names):
+            raise TypeError(f"{self.name}() takes {len(self.names)} arguments ({', '.join(self.names)})")
+        return PreparedCall(self, self.address, values)
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(f'{t} {n}' for t, n in zip(self.types, self.names))})"
+
+
+class ContractBinding:
+    """
+    Methods for every function of an ABI, e.g. `liquidity_contract.mintNewPosition(...)`.
+    Use `at(address)` to bind the same ABI to another deployment (e.g. each ERC20 token); those
+    bindings are cached per address.
+    """
+
+    def __init__(self, abi, address=None):
+        self.address = address
+        self.functions = {
+            entry["name"]: ContractFunction(entry) for entry in abi if entry.get("type") == "function"
+        }
+        for name, function in self.functions.items():
+            setattr(self, name, function.bind(address))
+        self._bindings = OrderedDict()
+        self._bindings_lock = threading.Lock()
+
+    def at(self, address):
+        key = address.lower()
+        with self._bindings_lock:
+            binding = self._bindings.get(key)
+            if binding is not None:
+                self._bindings.move_to_end(key)
+                return binding
+        binding = object.__new__(ContractBinding)
+        binding.address = address
+        binding.functions = self.functions
+        for name, function in self.functions.items():
+            setattr(binding, name, function.bind(address))
+        # Every binding of this ABI shares one cache.
+        binding._bindings, binding._bindings_lock = self._bindings, self._bindings_lock
+        with self._bindings_lock:
+            self._bindings[key] = binding
+            while len(self._bindings) > BINDING_CACHE_SIZE:
+                self._bindings.popitem(last=False)
+        return binding
+
+
+liquidity_contract = ContractBinding(UNISWAP_V3_LIQUIDITY_ABI, CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"])
+erc20 = ContractBinding(ERC20_ABI)
+factory = ContractBinding(FACTORY_ABI, CONTRACTS["BluedexV3Factory"])
+position_manager = ContractBinding(POSITION_MANAGER_ABI, CONTRACTS["NonfungiblePositionManager"])
+multicall3 = ContractBinding(MULTICALL3_ABI, MULTICALL3)
+pool_contract = ContractBinding(POOL_ABI)
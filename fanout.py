@@ -0,0 +1,51 @@
+# fanout.py
+
+from typing import Literal
+
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command, Send
+from pydantic import BaseModel, Field
+
+# Workers that can run side by side; the assistant always needs the whole conversation.
+PARALLEL_WORKERS = ("blockchain_agent", "twitter_agent")
+
+
+class Task(BaseModel):
+    """One independent part of a request, run in its own branch."""
+    worker: Literal["blockchain_agent", "twitter_agent"]
+    instruction: str = Field(..., description="Self-contained instruction for the worker, with every value it needs.")
+
+
+def merge_results(current, new):
+    """Reducer for State.results: branch results accumulate until the join node clears them (None)."""
+    if new is None:
+        return []
+    return (current or []) + new
+
+
+def fan_out(messages, tasks):
+    """
+    Send each task to its worker in parallel. A branch sees the conversation plus its own
+    instruction and reports back to the join node, which waits for all of them.
+    """
+    sends = [
+        Send(task.worker, {"messages": messages + [HumanMessage(content=task.instruction, name="supervisor")], "task": i})
+        for i, task in enumerate(tasks)
+    ]
+    return Command(goto=sends, update={"next": " + ".join(task.worker for task in tasks)})
+
+
+def worker_result(state, message):
+    """The Command a worker node ends with: back to the supervisor, or to the join node inside a branch."""
+    if state.get("task") is not None:
+        return Command(update={"results": [{"task": state["task"], "message": message}]}, goto="join")
+    return Command(update={"messages": [message], "next": "supervisor"}, goto="supervisor")
+
+
+def join_node(state) -> Command[Literal["supervisor"]]:
+    """Merge the branch results into the conversation in plan order and hand back to the supervisor."""
+    results = sorted(state.get("results") or [], key=lambda result: result["task"])
+    return Command(
+        update={"messages": [result["message"] for result in results], "results": None, "next": "supervisor"},
+        goto="supervisor",
+    )
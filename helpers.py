@@ -4,16 +4,10 @@ import re
 from decimal import Decimal
 from pydantic import BaseModel
 
-TOKENS = {
-    'STK': {
-        'address': '0x134B005F1502dcfe95C8b50Bf2e38B446FE7b9cC',
-        'decimals': 18,
-    },
-    'VED': {
-        'address': '0x0C0Db17101D6b1Db59E16b05f648D74f0Abc743a',
-        'decimals': 18,
-    },
-}
+from tokens import token_registry
+
+# symbol -> {"address", "decimals"}; loaded from tokens.json and extended as new tokens are seen.
+TOKENS = token_registry.tokens
 
 CONTRACTS = {
 #   // UNISWAP_V3_LIQUIDITY_CONTRACT: "0x0",
@@ -290,32 +284,190 @@ ERC20_ABI = [
         "stateMutability": "nonpayable",
         "type": "function"
     },
+    {
+        "constant": True,
+        "inputs": [
+            {"name": "_owner", "type": "address"},
+            {"name": "_spender", "type": "address"}
+        ],
+        "name": "allowance",
+        "outputs": [{"name": "remaining", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
 ]
 
+# The read-only functions the pool, position and portfolio reads use.
+FACTORY_ABI = [
+    {
+        "inputs": [
+            {"name": "tokenA", "type": "address"},
+            {"name": "tokenB", "type": "address"},
+            {"name": "fee", "type": "uint24"}
+        ],
+        "name": "getPool",
+        "outputs": [{"name": "pool", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+]
+
+POOL_ABI = [
+    {
+        "inputs": [],
+        "name": "slot0",
+        "outputs": [
+            {"name": "sqrtPriceX96", "type": "uint160"},
+            {"name": "tick", "type": "int24"},
+            {"name": "observationIndex", "type": "uint16"},
+            {"name": "observationCardinality", "type": "uint16"},
+            {"name": "observationCardinalityNext", "type": "uint16"},
+            {"name": "feeProtocol", "type": "uint8"},
+            {"name": "unlocked", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "feeGrowthGlobal0X128",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "feeGrowthGlobal1X128",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "tick", "type": "int24"}],
+        "name": "ticks",
+        "outputs": [
+            {"name": "liquidityGross", "type": "uint128"},
+            {"name": "liquidityNet", "type": "int128"},
+            {"name": "feeGrowthOutside0X128", "type": "uint256"},
+            {"name": "feeGrowthOutside1X128", "type": "uint256"},
+            {"name": "tickCumulativeOutside", "type": "int56"},
+            {"name": "secondsPerLiquidityOutsideX128", "type": "uint160"},
+            {"name": "secondsOutside", "type": "uint32"},
+            {"name": "initialized", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+]
+
+POSITION_MANAGER_ABI = [
+    {
+        "inputs": [{"name": "tokenId", "type": "uint256"}],
+        "name": "positions",
+        "outputs": [
+            {"name": "nonce", "type": "uint96"},
+            {"name": "operator", "type": "address"},
+            {"name": "token0", "type": "address"},
+            {"name": "token1", "type": "address"},
+            {"name": "fee", "type": "uint24"},
+            {"name": "tickLower", "type": "int24"},
+            {"name": "tickUpper", "type": "int24"},
+            {"name": "liquidity", "type": "uint128"},
+            {"name": "feeGrowthInside0LastX128", "type": "uint256"},
+            {"name": "feeGrowthInside1LastX128", "type": "uint256"},
+            {"name": "tokensOwed0", "type": "uint128"},
+            {"name": "tokensOwed1", "type": "uint128"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+]
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [{"name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+]
+
+# "5 STK", "1,000,000 STK", "0.5 VED" or an amount followed by a token address.
+TOKEN_AMOUNT_PATTERN = re.compile(r'^(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?\s*(0x[0-9a-fA-F]{40}|[A-Za-z0-9]+)$')
+
 def parse_token_amount(input_str):
     """
-    Parse amounts like '5 STK' and convert to Wei.
+    Parse amounts like '5 STK' or '1,000,000 STK' and convert to Wei.
     """
-    regex = r'^(\d+(\.\d+)?)\s*([A-Za-z0-9]+)$'
-    match = re.match(regex, input_str.strip())
-    if not match:
-        raise ValueError(f'Invalid token amount format: "{input_str}". Expected format like "5 STK".')
+    return parse_token_amounts([input_str])[0]
 
-    amount = match.group(1)
-    symbol = match.group(3).upper()
-
-    if symbol not in TOKENS:
-        raise ValueError(f'Unsupported token symbol: "{symbol}". Supported tokens are {list(TOKENS.keys())}')
-
-    decimals = TOKENS[symbol]['decimals']
-    amount_wei = int(Decimal(amount) * (10 ** decimals))
+def parse_token_amounts(input_strs):
+    """
+    Parse many amounts at once; returns (symbol, amount in wei) pairs in input order.
+    Each distinct token is resolved once.
+    """
+    symbols = {}
+    parsed = []
+    for input_str in input_strs:
+        match = TOKEN_AMOUNT_PATTERN.match(input_str.strip())
+        if not match:
+            raise ValueError(f'Invalid token amount format: "{input_str}". Expected format like "5 STK".')
+        key = match.group(3)
+        if key not in symbols:
+            symbols[key] = token_registry.resolve(key)
+        if symbols[key] is None:
+            raise ValueError(f'Unsupported token symbol: "{key.upper()}". Supported tokens are {list(TOKENS.keys())}')
+        amount = Decimal(match.group(1).replace(",", "") + (match.group(2) or ""))
+        parsed.append((symbols[key], int(amount.scaleb(TOKENS[symbols[key]]['decimals']))))
+    return parsed
 
-    return symbol, amount_wei
+def emit_progress(tool, status, **data):
+    """
+    Report tool progress (e.g. "tx submitted") to the graph's "custom" stream.
+    Does nothing when the tool runs outside a streaming graph.
+    """
+    event = {"tool": tool, "status": status, **data}
+    try:
+        # Also a callback event, so tracing.Tracer can time the chain confirmation.
+        from langchain_core.callbacks import dispatch_custom_event
+        dispatch_custom_event("tool_progress", event)
+    except Exception:
+        pass
+    try:
+        from langgraph.config import get_stream_writer
+        writer = get_stream_writer()
+    except Exception:
+        return
+    writer(event)
 
 def get_deadline(offset_seconds=600):
     import time
     return int(time.time()) + offset_seconds
 
+# Nodes print their own output unless a streaming renderer is already showing it.
+_node_output = {"enabled": True}
+
+def set_node_output(enabled):
+    _node_output["enabled"] = enabled
+
+def print_node_message(msg):
+    if _node_output["enabled"]:
+        print_message_nicely(msg)
+
+def print_routing(goto):
+    if _node_output["enabled"]:
+        print("\n")
+        print(f"Routing to {goto}...")
+
 # First, define your pretty print function
 def print_message_nicely(msg):
     print("\n" + "-"*50)
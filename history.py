@@ -0,0 +1,138 @@
+# history.py
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import HumanMessage
+
+from lazy import Lazy
+
+TX_HASH_PATTERN = re.compile(r"0x[0-9a-fA-F]{64}")
+
+# Rolling summaries kept; an evicted conversation is summarized again from its messages if it comes back.
+HISTORY_MAX_SUMMARIES = int(os.getenv("HISTORY_MAX_SUMMARIES", "1000"))
+
+# Summaries are internal bookkeeping; keep their tokens out of the "messages" stream.
+NOSTREAM = {"tags": ["nostream"]}
+
+SUMMARY_PROMPT = """
+Summarize the following conversation between a user and the DeFi Guru agents in a few sentences.
+Keep token symbols, amounts, token ids, addresses and the outcome of every action. Drop greetings and repetition.
+
+Previous summary:
+{summary}
+
+New messages:
+{transcript}
+"""
+
+
+def estimate_tokens(messages):
+    """Rough token count (4 characters per token plus per-message overhead)."""
+    total = 0
+    for msg in messages:
+        content = msg.content if isinstance(msg.content, str) else str(msg.content)
+        total += len(content) // 4 + 4
+    return total
+
+
+def format_transcript(messages):
+    return "\n".join(f"{msg.name or msg.type}: {msg.content}" for msg in messages)
+
+
+class HistoryCompactor:
+    """
+    Keeps the prompt sent to the supervisor and worker agents within a token budget.
+
+    The first user message, the latest user message and the last `keep_last` messages are kept
+    word for word. Everything older is folded into a rolling summary that is extended only with
+    the messages evicted since the previous call. Transaction hashes found in evicted messages
+    are carried over verbatim. Summaries are kept for the `max_summaries` most recent conversations.
+    """
+
+    def __init__(self, llm, token_budget=4000, keep_last=6, max_summaries=HISTORY_MAX_SUMMARIES):
+        self._llm = llm
+        self.token_budget = token_budget
+        self.keep_last = keep_last
+        self.max_summaries = max_summaries
+        self.lock = threading.Lock()
+        # Rolling summaries per conversation, least recently used first: key -> (messages covered, summary, tx hashes)
+        self._summaries = OrderedDict()
+
+    @property
+    def llm(self):
+        """The summary model; `llm` may be a Lazy so the model is built on the first summary."""
+        return self._llm.get() if isinstance(self._llm, Lazy) else self._llm
+
+    def _summary_prompt(self, summary, messages):
+        return SUMMARY_PROMPT.format(summary=summary or "(none)", transcript=format_transcript(messages))
+
+    def _pending(self, messages, key):
+        """Return (key, evicted messages, cut) when the window has to move, else None."""
+        if len(messages) <= self.keep_last + 1 or estimate_tokens(messages) <= self.token_budget:
+            return None
+        key = key or messages[0].id or id(messages[0])
+        cut = len(messages) - self.keep_last
+        covered, _, _ = self._summaries.get(key, (1, "", []))
+        return key, messages[covered:cut], cut
+
+    def _record(self, key, evicted, summary, cut):
+        with self.lock:
+            _, _, tx_hashes = self._summaries.get(key, (1, "", []))
+            for msg in evicted:
+                for tx_hash in TX_HASH_PATTERN.findall(str(msg.content)):
+                    if tx_hash not in tx_hashes:
+                        tx_hashes.append(tx_hash)
+            self._summaries[key] = (cut, summary, tx_hashes)
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+
+    def _assemble(self, messages, key):
+        with self.lock:
+            entry = self._summaries.get(key)
+            if entry is None:
+                # Evicted by other conversations in the meantime; this call goes out uncompacted.
+                return messages
+            self._summaries.move_to_end(key)
+        covered, summary, tx_hashes = entry
+        first = messages[0]
+        content = f"Summary of the earlier conversation: {summary}"
+        if tx_hashes:
+            content += "\nTransaction hashes: " + ", ".join(tx_hashes)
+        # A stable id lets add_messages replace the summary instead of appending it.
+        summary_message = HumanMessage(content=content, name="summary", id=f"summary-{key}")
+
+        compacted = [first, summary_message]
+        tail = messages[covered:]
+        latest_user = next((msg for msg in reversed(messages) if msg.name == "User"), None)
+        if latest_user is not None and latest_user is not first and latest_user not in tail:
+            compacted.append(latest_user)
+        return compacted + tail
+
+    def compact(self, messages, key=None):
+        messages = list(messages)
+        pending = self._pending(messages, key)
+        if pending is None:
+            return messages
+        key, evicted, cut = pending
+        # Only the messages evicted since the last call are summarized.
+        if evicted:
+            previous = self._summaries.get(key, (1, "", []))[1]
+            summary = self.llm.invoke(self._summary_prompt(previous, evicted), config=NOSTREAM).content
+            self._record(key, evicted, summary, cut)
+        return self._assemble(messages, key)
+
+    async def acompact(self, messages, key=None):
+        messages = list(messages)
+        pending = self._pending(messages, key)
+        if pending is None:
+            return messages
+        key, evicted, cut = pending
+        if evicted:
+            previous = self._summaries.get(key, (1, "", []))[1]
+            summary = (await self.llm.ainvoke(self._summary_prompt(previous, evicted), config=NOSTREAM)).content
+            self._record(key, evicted, summary, cut)
+        return self._assemble(messages, key)
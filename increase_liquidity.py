@@ -1,12 +1,22 @@
 # increase_liquidity.py
 
+import asyncio
+from typing import Optional
 from cdp import Wallet
 from pydantic import BaseModel, Field
 
 # Import CdpTool
 from cdp_langchain.tools import CdpTool
+from langchain_core.tools import StructuredTool
 
-from helpers import parse_token_amount, TOKENS, CONTRACTS, UNISWAP_V3_LIQUIDITY_ABI
+from limits import chain_slots
+from allowance import check_liquidity_allowances, spend_liquidity_allowances, wallet_address
+from positions import resolve_token_id
+from pools import increase_quote_line
+from simulation import simulate_increase_liquidity
+from tx_manager import get_transaction_manager
+from contracts import liquidity_contract
+from helpers import parse_token_amounts, emit_progress, TOKENS
 
 INCREASE_LIQUIDITY_DESCRIPTION = """
 Add liquidity to an existing Uniswap V3 position identified by a token ID, increasing your stake and potential fee share.
@@ -14,23 +24,25 @@ Add liquidity to an existing Uniswap V3 position identified by a token ID, incre
 **Usage Examples:**
 - "Increase liquidity for token ID 35 with 100 VED and 10,000 STK."
 - "Add liquidity to position 42: 50 VED + 5,000 STK."
+- "Add 10 VED and 1,000 STK to my VED/STK position."
 
 **Parameters:**
-- **token_id**: ID of your existing Uniswap V3 position.(e`g., 35).
+- **token_id**: ID of your existing Uniswap V3 position (e.g., 35). Leave empty to use the wallet's largest position for the token pair.
 - **tokenA_amount**: Amount and symbol of the first token (e.g., "100 VED").
 - **tokenB_amount**: Amount and symbol of the second token (e.g., "10,000 STK").
 
 **Important Notes:**
-- **Token Approval Required**: Approve the liquidity contract to spend both tokens using `approve_token` if not already approved. Assume approval is done by default and if txn fails with error might mean that approval is not done for the token pair. Use approve_token tool to approve the token pair.
-- **Valid Token ID**: `token_id` must correspond to a position you own. Valid tokenids are: 35-40. If not provided, it will take 35 by default.
+- **Token Approval Required**: The tool checks both allowances before sending the transaction. If one is missing it says which token to approve; use `approve_token` for it and call this tool again.
+- **Valid Token ID**: `token_id` must correspond to a position you own for the same token pair. Use `list_positions` to see the wallet's positions.
+- **Dry Run**: The transaction is simulated before it is sent; a `[bad_token_id]` result means the position does not exist or is not owned by the wallet.
 - **Network Support**: Supported only on 'base-sepolia' network.
 - **No Addresses Needed**: Contract and token addresses are predefined.
 """
 
 class IncreaseLiquidityInput(BaseModel):
     """Input argument schema for increasing liquidity."""
-    token_id: int = Field(
-        ..., description="The ID of the existing Uniswap V3 position."
+    token_id: Optional[int] = Field(
+        None, description="The ID of the existing Uniswap V3 position. Omit to use the wallet's largest position for the token pair."
     )
     tokenA_amount: str = Field(
         ...,
@@ -41,37 +53,82 @@ class IncreaseLiquidityInput(BaseModel):
         description='The amount and symbol of the second token, e.g., "10000 STK".'
     )
 
-def increase_liquidity(wallet: Wallet, token_id: int, tokenA_amount: str, tokenB_amount: str) -> str:
+def submit_increase_liquidity(wallet: Wallet, token_id: int, tokenA_amount: str, tokenB_amount: str):
+    """Submit the increase liquidity transaction and return the pending invocation."""
+    (symbolA, amountA), (symbolB, amountB) = parse_token_amounts([tokenA_amount, tokenB_amount])
+    tokenA_address = TOKENS[symbolA]['address']
+    tokenB_address = TOKENS[symbolB]['address']
+
+    return liquidity_contract.increaseLiquidityCurrentRange(
+        tokenA_address, tokenB_address, token_id, amountA, amountB
+    ).invoke(wallet)
+
+def increase_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int] = None) -> str:
     """Increase liquidity of an existing position."""
     try:
         print("-"*20 + "Invoking increase liquidity"+ "-"*20)
-        symbolA, amountA = parse_token_amount(tokenA_amount)
-        symbolB, amountB = parse_token_amount(tokenB_amount)
-        tokenA_address = TOKENS[symbolA]['address']
-        tokenB_address = TOKENS[symbolB]['address']
-
-        # The address of your UniswapV3Liquidity contract
-        liquidity_contract_address = CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]
-
-        invocation = wallet.invoke_contract(
-            contract_address=liquidity_contract_address,
-            method='increaseLiquidityCurrentRange',
-            abi=UNISWAP_V3_LIQUIDITY_ABI,
-            args={
-                'token0Address': tokenA_address,
-                'token1Address': tokenB_address,
-                'tokenId': str(token_id),
-                'amount0ToAdd': str(amountA),  # Convert to string
-                'amount1ToAdd': str(amountB),  # Convert to string
-            },
-            asset_id='wei',
-        )
-        result = invocation.wait()
+
+        token_id, error = resolve_token_id(wallet_address(wallet), token_id, tokenA_amount, tokenB_amount)
+        if error:
+            return f"❌ Increasing liquidity failed: {error}"
+
+        missing = check_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
+        if missing:
+            return f"❌ Increasing liquidity failed: {missing}"
+
+        # Dry-run against current state so a doomed transaction is never sent.
+        error = simulate_increase_liquidity(wallet, token_id, tokenA_amount, tokenB_amount)
+        if error:
+            return f"❌ Increasing liquidity failed: {error}"
+        # Predict liquidity and refunds from the pool price so the reply can say what was used.
+        quote = increase_quote_line(token_id, tokenA_amount, tokenB_amount)
+
+        future = get_transaction_manager(wallet).submit(submit_increase_liquidity, token_id, tokenA_amount, tokenB_amount)
+        emit_progress("increase_liquidity", "submitted")
+        emit_progress("increase_liquidity", "waiting for confirmation")
+        result = future.result()
+        emit_progress("increase_liquidity", "confirmed", tx_hash=result.transaction.transaction_hash)
+        spend_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
         # print("result:", result, "\n")
-        print(f"🛠 Liquidity increased! Transaction hash: {result.transaction.transaction_hash}")
+        print(f"🛠 Liquidity increased for position {token_id}! Transaction hash: {result.transaction.transaction_hash}")
         
-        return f"🛠 Liquidity increased! Transaction hash: {result.transaction.transaction_hash}"
+        message = f"🛠 Liquidity increased for position {token_id}! Transaction hash: {result.transaction.transaction_hash}"
+        return f"{message}\n{quote}" if quote else message
+    except Exception as e:
+        emit_progress("increase_liquidity", "failed", error=str(e))
+        return f"❌ Increasing liquidity failed: {str(e)}"
+
+async def aincrease_liquidity(wallet: Wallet, tokenA_amount: str, tokenB_amount: str, token_id: Optional[int] = None) -> str:
+    """Increase liquidity of an existing position without blocking the event loop."""
+    try:
+        print("-"*20 + "Invoking increase liquidity"+ "-"*20)
+
+        token_id, error = await asyncio.to_thread(resolve_token_id, wallet_address(wallet), token_id, tokenA_amount, tokenB_amount)
+        if error:
+            return f"❌ Increasing liquidity failed: {error}"
+
+        missing = await asyncio.to_thread(check_liquidity_allowances, wallet, tokenA_amount, tokenB_amount)
+        if missing:
+            return f"❌ Increasing liquidity failed: {missing}"
+
+        error = await asyncio.to_thread(simulate_increase_liquidity, wallet, token_id, tokenA_amount, tokenB_amount)
+        if error:
+            return f"❌ Increasing liquidity failed: {error}"
+        quote = await asyncio.to_thread(increase_quote_line, token_id, tokenA_amount, tokenB_amount)
+
+        async with chain_slots():
+            future = await asyncio.to_thread(get_transaction_manager(wallet).submit, submit_increase_liquidity, token_id, tokenA_amount, tokenB_amount)
+            emit_progress("increase_liquidity", "submitted")
+            emit_progress("increase_liquidity", "waiting for confirmation")
+            result = await asyncio.wrap_future(future)
+            emit_progress("increase_liquidity", "confirmed", tx_hash=result.transaction.transaction_hash)
+        spend_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
+        print(f"🛠 Liquidity increased for position {token_id}! Transaction hash: {result.transaction.transaction_hash}")
+
+        message = f"🛠 Liquidity increased for position {token_id}! Transaction hash: {result.transaction.transaction_hash}"
+        return f"{message}\n{quote}" if quote else message
     except Exception as e:
+        emit_progress("increase_liquidity", "failed", error=str(e))
         return f"❌ Increasing liquidity failed: {str(e)}"
 
 # Create the tool instance
@@ -82,4 +139,14 @@ def get_increase_liquidity_tool(agentkit):
         cdp_agentkit_wrapper=agentkit,
         args_schema=IncreaseLiquidityInput,
         func=increase_liquidity,
-    )
\ No newline at end of file
+    )
+
+# Create the tool instance for the async graph
+def get_async_increase_liquidity_tool(agentkit):
+    return StructuredTool.from_function(
+        name="increase_liquidity",
+        description=INCREASE_LIQUIDITY_DESCRIPTION,
+        args_schema=IncreaseLiquidityInput,
+        func=lambda tokenA_amount, tokenB_amount, token_id=None: increase_liquidity(agentkit.wallet, tokenA_amount, tokenB_amount, token_id),
+        coroutine=lambda tokenA_amount, tokenB_amount, token_id=None: aincrease_liquidity(agentkit.wallet, tokenA_amount, tokenB_amount, token_id),
+    )
@@ -0,0 +1,21 @@
+# lazy.py
+
+import threading
+
+
+class Lazy:
+    """Builds a value on first use and keeps it; safe to call from several threads."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.value = None
+        self.loaded = False
+
+    def get(self):
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self.value = self.factory()
+                    self.loaded = True
+        return self.value
@@ -0,0 +1,36 @@
+# limits.py
+
+import asyncio
+import os
+import threading
+import weakref
+
+# Per-process caps on in-flight work, shared by every session served by this worker.
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "16"))
+MAX_CONCURRENT_CHAIN_CALLS = int(os.getenv("MAX_CONCURRENT_CHAIN_CALLS", "8"))
+
+
+class LoopSemaphore:
+    """A semaphore per running event loop.
+
+    The CLI, server and load test each call asyncio.run, and an asyncio.Semaphore
+    is bound to the first loop that waits on it. Creating one lazily for each loop
+    keeps the cap per worker loop without "bound to a different event loop" errors.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+
+llm_slots = LoopSemaphore(MAX_CONCURRENT_LLM_CALLS)
+chain_slots = LoopSemaphore(MAX_CONCURRENT_CHAIN_CALLS)
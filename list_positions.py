@@ -0,0 +1,78 @@
+# list_positions.py
+
+import asyncio
+from typing import Optional
+from cdp import Wallet
+from pydantic import BaseModel, Field
+
+# Import CdpTool
+from cdp_langchain.tools import CdpTool
+from langchain_core.tools import StructuredTool
+
+from allowance import wallet_address
+from positions import format_position, get_position_index, position_owners
+from helpers import TOKENS
+from tokens import token_registry
+
+LIST_POSITIONS_DESCRIPTION = """
+List the wallet's Uniswap V3 liquidity positions (token ID, token pair, fee tier, tick range and liquidity), optionally only those for one token pair.
+Use it to find the token ID before calling increase_liquidity or add_liquidity.
+
+**Usage Examples:**
+- "Which liquidity positions do I have?"
+- "Show my VED/STK positions."
+
+**Parameters:**
+- **tokenA**: Symbol of the first token (e.g., "VED"). Optional.
+- **tokenB**: Symbol of the second token (e.g., "STK"). Optional.
+
+**Important Notes:**
+- **Network Support**: Supported only on 'base-sepolia' network.
+"""
+
+class ListPositionsInput(BaseModel):
+    """Input argument schema for listing positions."""
+    tokenA: Optional[str] = Field(None, description='Symbol of the first token, e.g., "VED".')
+    tokenB: Optional[str] = Field(None, description='Symbol of the second token, e.g., "STK".')
+
+def list_positions(wallet: Wallet, tokenA: Optional[str] = None, tokenB: Optional[str] = None) -> str:
+    """List the wallet's positions from the local position index."""
+    try:
+        index = get_position_index()
+        index.refresh()
+        owners = position_owners(wallet_address(wallet))
+        if tokenA and tokenB:
+            symbolA, symbolB = token_registry.resolve(tokenA), token_registry.resolve(tokenB)
+            if symbolA is None or symbolB is None:
+                return f"❌ Listing positions failed: unknown token {tokenA if symbolA is None else tokenB}"
+            positions = index.for_pair(TOKENS[symbolA]['address'], TOKENS[symbolB]['address'], owners)
+        else:
+            positions = index.by_owners(*owners)
+        if not positions:
+            return f"No liquidity positions found for this wallet{index.sync_note()}."
+        return f"Liquidity positions{index.sync_note()}:\n" + "\n".join(format_position(position) for position in positions)
+    except Exception as e:
+        return f"❌ Listing positions failed: {str(e)}"
+
+async def alist_positions(wallet: Wallet, tokenA: Optional[str] = None, tokenB: Optional[str] = None) -> str:
+    return await asyncio.to_thread(list_positions, wallet, tokenA, tokenB)
+
+# Create the tool instance
+def get_list_positions_tool(agentkit):
+    return CdpTool(
+        name="list_positions",
+        description=LIST_POSITIONS_DESCRIPTION,
+        cdp_agentkit_wrapper=agentkit,
+        args_schema=ListPositionsInput,
+        func=list_positions,
+    )
+
+# Create the tool instance for the async graph
+def get_async_list_positions_tool(agentkit):
+    return StructuredTool.from_function(
+        name="list_positions",
+        description=LIST_POSITIONS_DESCRIPTION,
+        args_schema=ListPositionsInput,
+        func=lambda tokenA=None, tokenB=None: list_positions(agentkit.wallet, tokenA, tokenB),
+        coroutine=lambda tokenA=None, tokenB=None: alist_positions(agentkit.wallet, tokenA, tokenB),
+    )
@@ -0,0 +1,116 @@
+# loadtest.py
+# Load test for server.py: the real async graph behind SessionManager, with the fake LLMs, CDP
+# wallet, Arcade and RPC from bench_graph.py, so it runs without API keys.
+#   python loadtest.py --conversations 200 --concurrency 50
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+class StubTransaction:
+    def __init__(self, confirm_at):
+        self.confirm_at = confirm_at
+        self.transaction_hash = "0x" + uuid.uuid4().hex * 2
+
+
+class StubInvocation:
+    def __init__(self, latency):
+        self.transaction = StubTransaction(time.monotonic() + latency)
+
+    def reload(self):
+        return self
+
+
+class StubAddress:
+    address_id = "0x" + "1" * 40
+
+
+class StubWallet:
+    """Stands in for a CDP wallet; every transaction confirms after `latency` seconds."""
+
+    default_address = StubAddress()
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.transactions = {}
+
+    def invoke_contract(self, **kwargs):
+        invocation = StubInvocation(self.latency)
+        self.transactions[invocation.transaction.transaction_hash] = invocation.transaction
+        return invocation
+
+    def fetch_receipts(self, tx_hashes):
+        """Stub receipt source for the transaction manager: confirmed once the latency has passed."""
+        now = time.monotonic()
+        return {
+            tx_hash: {"status": "0x1"} if now >= self.transactions[tx_hash].confirm_at else None
+            for tx_hash in tx_hashes
+        }
+
+
+async def run_conversation(client, message):
+    session_id = (await client.post("/sessions")).json()["session_id"]
+    start = time.perf_counter()
+    async with client.stream("POST", f"/sessions/{session_id}/messages", json={"message": message}) as response:
+        async for line in response.aiter_lines():
+            if line and json.loads(line)["type"] == "error":
+                raise RuntimeError(line)
+    return time.perf_counter() - start
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def main(args):
+    # Imported here: bench_graph itself imports the stub wallet from this module.
+    from bench_graph import SCENARIOS, load_agent
+    from server import create_app
+
+    agent = load_agent(args)
+    app = create_app(agent.async_graph, max_concurrent=args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    gate = asyncio.Semaphore(args.concurrency)
+    messages = itertools.cycle([SCENARIOS[name]["message"] for name in args.scenario or SCENARIOS])
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        async def one(message):
+            async with gate:
+                return await run_conversation(client, message)
+
+        start = time.perf_counter()
+        # The tools print their own progress; keep it out of the report.
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies = await asyncio.gather(*(one(next(messages)) for _ in range(args.conversations)))
+        elapsed = time.perf_counter() - start
+
+    print(f"conversations: {len(latencies)}  concurrency: {args.concurrency}")
+    print(f"p50 latency:   {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"p99 latency:   {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"mean latency:  {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"throughput:    {len(latencies) / elapsed:.1f} conversations/s")
+    print(f"session locks: {len(app.state.sessions._locks)} left")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the DeFi Guru server with stub backends.")
+    parser.add_argument("--scenario", action="append", help="bench_graph.py scenarios to send (default: all, in turn)")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--llm-fail-every", type=int, default=0, help="every n-th call to a primary fake model times out")
+    parser.add_argument("--no-prefix-cache", action="store_true", help="fake providers without prompt-prefix caching")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="seconds per fake Twitter call")
+    parser.add_argument("--confirm-latency", type=float, default=0.5, help="seconds until a stub transaction confirms")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="seconds per fake JSON-RPC request")
+    asyncio.run(main(parser.parse_args()))
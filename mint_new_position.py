@@ -1,12 +1,20 @@
 # mint_new_position.py
 
+import asyncio
 from cdp import Wallet
 from pydantic import BaseModel, Field
 
 # Import CdpTool
 from cdp_langchain.tools import CdpTool
+from langchain_core.tools import StructuredTool
 
-from helpers import parse_token_amount, TOKENS, CONTRACTS, UNISWAP_V3_LIQUIDITY_ABI
+from limits import chain_slots
+from allowance import check_liquidity_allowances, spend_liquidity_allowances
+from pools import mint_quote_line
+from simulation import simulate_mint_new_position
+from tx_manager import get_transaction_manager
+from contracts import liquidity_contract
+from helpers import parse_token_amounts, emit_progress, TOKENS
 
 MINT_NEW_POSITION_DESCRIPTION = """
 Create a new liquidity position on Uniswap V3 using a pair of tokens. This adds liquidity to the pool for the specified token pair.
@@ -20,11 +28,11 @@ Create a new liquidity position on Uniswap V3 using a pair of tokens. This adds
 - **tokenB_amount**: Amount and symbol of the second token (e.g., "10,000 STK").
 
 **Important Notes:**
-- **Token Approval Required**: Approve the liquidity contract to spend both tokens using `approve_token` if not already approved. Assume approval is done by default and if txn fails with error might mean that approval is not done for the token pair. Use approve_token tool to approve the token pair.
+- **Token Approval Required**: The tool checks both allowances before sending the transaction. If one is missing it says which token to approve; use `approve_token` for it and call this tool again.
 - **Sufficient Balance**: Ensure you have enough of both tokens.
 - **Network Support**: Supported only on 'base-sepolia' network.
 - **No Addresses Needed**: Contract and token addresses are predefined.
-- If miniting new position fails then it could also mean that liquidity pool is already created for the token pair. Use one of the default token ids to increase the liquidity using increase_liquidity tool.
+- **Dry Run**: The transaction is simulated before it is sent. If the result says `[pool_exists]`, the pool for the token pair is already created; add to an existing position with the increase_liquidity tool instead.
 """
 
 class MintNewPositionInput(BaseModel):
@@ -38,39 +46,73 @@ class MintNewPositionInput(BaseModel):
         description='The amount and symbol of the second token, e.g., "10000 STK".'
     )
 
+def submit_mint_new_position(wallet: Wallet, tokenA_amount: str, tokenB_amount: str):
+    """Submit the mint transaction and return the pending invocation."""
+    (symbolA, amountA), (symbolB, amountB) = parse_token_amounts([tokenA_amount, tokenB_amount])
+
+    tokenA_address = TOKENS[symbolA]['address']
+    tokenB_address = TOKENS[symbolB]['address']
+
+    return liquidity_contract.mintNewPosition(tokenA_address, tokenB_address, amountA, amountB).invoke(wallet)
+
 def mint_new_position(wallet: Wallet, tokenA_amount: str, tokenB_amount: str) -> str:
     """Mint a new liquidity position."""
     try:
         print("-"*20 + "Invoking mint_new_position" + "-"*20)
 
-        symbolA, amountA = parse_token_amount(tokenA_amount)
-        symbolB, amountB = parse_token_amount(tokenB_amount)
-
-        tokenA_address = TOKENS[symbolA]['address']
-        tokenB_address = TOKENS[symbolB]['address']
-
-        # The address of your UniswapV3Liquidity contract
-        liquidity_contract_address = CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]
-        print("liquidity_contract_address", liquidity_contract_address)
-
-        invocation = wallet.invoke_contract(
-            contract_address=liquidity_contract_address,
-            method='mintNewPosition',
-            abi=UNISWAP_V3_LIQUIDITY_ABI,
-            args={
-                'token0Address': tokenA_address,
-                'token1Address': tokenB_address,
-                'amount0ToAdd': str(amountA),  # Convert to string
-                'amount1ToAdd': str(amountB),  # Convert to string
-            },
-            asset_id='wei',
-        )
-        result = invocation.wait()
+        missing = check_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
+        if missing:
+            return f"❌ Minting new position failed: {missing}"
+
+        # Dry-run against current state so a doomed transaction is never sent.
+        error = simulate_mint_new_position(wallet, tokenA_amount, tokenB_amount)
+        if error:
+            return f"❌ Minting new position failed: {error}"
+        # Predict liquidity and refunds from the pool price so the reply can say what was used.
+        quote = mint_quote_line(tokenA_amount, tokenB_amount)
+
+        future = get_transaction_manager(wallet).submit(submit_mint_new_position, tokenA_amount, tokenB_amount)
+        emit_progress("mint_new_position", "submitted")
+        emit_progress("mint_new_position", "waiting for confirmation")
+        result = future.result()
+        emit_progress("mint_new_position", "confirmed", tx_hash=result.transaction.transaction_hash)
+        spend_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
         # print("result", result, "\n")
         print(f"🎉 New liquidity position created! Transaction hash: {result.transaction.transaction_hash}")
 
-        return f"🎉 New liquidity position created! Transaction hash: {result.transaction.transaction_hash}"
+        message = f"🎉 New liquidity position created! Transaction hash: {result.transaction.transaction_hash}"
+        return f"{message}\n{quote}" if quote else message
     except Exception as e:
+        emit_progress("mint_new_position", "failed", error=str(e))
+        return f"❌ Minting new position failed: {str(e)}"
+
+async def amint_new_position(wallet: Wallet, tokenA_amount: str, tokenB_amount: str) -> str:
+    """Mint a new liquidity position without blocking the event loop."""
+    try:
+        print("-"*20 + "Invoking mint_new_position" + "-"*20)
+
+        missing = await asyncio.to_thread(check_liquidity_allowances, wallet, tokenA_amount, tokenB_amount)
+        if missing:
+            return f"❌ Minting new position failed: {missing}"
+
+        error = await asyncio.to_thread(simulate_mint_new_position, wallet, tokenA_amount, tokenB_amount)
+        if error:
+            return f"❌ Minting new position failed: {error}"
+        quote = await asyncio.to_thread(mint_quote_line, tokenA_amount, tokenB_amount)
+
+        async with chain_slots():
+            future = await asyncio.to_thread(get_transaction_manager(wallet).submit, submit_mint_new_position, tokenA_amount, tokenB_amount)
+            emit_progress("mint_new_position", "submitted")
+            emit_progress("mint_new_position", "waiting for confirmation")
+            result = await asyncio.wrap_future(future)
+            emit_progress("mint_new_position", "confirmed", tx_hash=result.transaction.transaction_hash)
+        spend_liquidity_allowances(wallet, tokenA_amount, tokenB_amount)
+        print(f"🎉 New liquidity position created! Transaction hash: {result.transaction.transaction_hash}")
+
+        message = f"🎉 New liquidity position created! Transaction hash: {result.transaction.transaction_hash}"
+        return f"{message}\n{quote}" if quote else message
+    except Exception as e:
+        emit_progress("mint_new_position", "failed", error=str(e))
         return f"❌ Minting new position failed: {str(e)}"
 
 # Create the tool instance
@@ -81,4 +123,14 @@ def get_mint_new_position_tool(agentkit):
         cdp_agentkit_wrapper=agentkit,
         args_schema=MintNewPositionInput,
         func=mint_new_position,
-    )
\ No newline at end of file
+    )
+
+# Create the tool instance for the async graph
+def get_async_mint_new_position_tool(agentkit):
+    return StructuredTool.from_function(
+        name="mint_new_position",
+        description=MINT_NEW_POSITION_DESCRIPTION,
+        args_schema=MintNewPositionInput,
+        func=lambda tokenA_amount, tokenB_amount: mint_new_position(agentkit.wallet, tokenA_amount, tokenB_amount),
+        coroutine=lambda tokenA_amount, tokenB_amount: amint_new_position(agentkit.wallet, tokenA_amount, tokenB_amount),
+    )
@@ -0,0 +1,333 @@
+# models.py
+
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+from limits import llm_slots
+from prompts import tool_schemas
+
+# "provider:model" per role, primary first, then fallbacks (comma separated), e.g.
+# MODEL_ROUTER="google:gemini-2.0-flash-lite,groq:llama-3.1-8b-instant".
+ROLE_DEFAULTS = {
+    # Structured-output routing is the most frequent call and only picks one of four labels.
+    "router": "google:gemini-2.0-flash-lite,groq:llama-3.1-8b-instant",
+    # Tool planning in the ReAct agents.
+    "agent": "google:gemini-2.0-flash,groq:llama-3.3-70b-versatile",
+    "assistant": "google:gemini-2.0-flash,groq:llama-3.3-70b-versatile",
+    # History summaries (history.py).
+    "summary": "google:gemini-2.0-flash-lite,google:gemini-2.0-flash",
+}
+# Inner model calls report nothing: the tiered model's own run already has the callbacks and
+# tokens, and inheriting them from the node's context would record every call twice.
+INNER_CONFIG = {"callbacks": []}
+# Seconds before a call counts as timed out and the next model in the tier is tried.
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+# Retries inside one provider before falling back; their own backoff would only add latency.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+# Fallbacks whose key is missing are left out of the tier.
+PROVIDER_KEYS = {"google": "GOOGLE_API_KEY", "groq": "GROQ_API_KEY"}
+
+# USD per million (input, output) tokens, for the ledger's cost estimate.
+PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+# Share of the input price charged for input tokens read from the provider's prompt cache.
+CACHED_INPUT_RATE = {"google": 0.25, "groq": 0.5}
+
+# Errors that mean "try the next model" rather than "the request is wrong".
+FALLBACK_ERRORS = {
+    "TimeoutError", "TimeoutException", "ReadTimeout", "ConnectTimeout", "APITimeoutError",
+    "DeadlineExceeded", "ResourceExhausted", "ServiceUnavailable", "TooManyRequests", "RateLimitError",
+    "APIConnectionError", "InternalServerError",
+}
+
+
+def _google(model):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+
+
+def _groq(model):
+    from langchain_groq import ChatGroq
+    return ChatGroq(model=model, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+
+
+# Available providers; new ones only need a constructor here (and a key in PROVIDER_KEYS).
+PROVIDERS = {
+    "google": _google,
+    "groq": _groq,
+}
+
+
+def should_fall_back(error):
+    """Timeouts, rate limits and unavailable providers; the error's class name or HTTP status decides."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    if any(cls.__name__ in FALLBACK_ERRORS for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status in (429, 500, 502, 503, 504)
+
+
+def parse_tier(spec):
+    """[(provider, model)] from "provider:model,provider:model"."""
+    tier = []
+    for entry in spec.split(","):
+        provider, _, model = entry.strip().partition(":")
+        if provider not in PROVIDERS:
+            raise ValueError(f'Unsupported model provider: "{provider}". Supported providers are {list(PROVIDERS.keys())}')
+        tier.append((provider, model))
+    return tier
+
+
+class ModelLedger:
+    """Calls, fallbacks, errors, latency, tokens and estimated cost per role and model."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = defaultdict(lambda: {"calls": 0, "fallbacks": 0, "errors": 0, "seconds": 0.0, "input": 0,
+                                         "cached": 0, "simulated": 0, "output": 0, "static_bytes": 0, "dynamic_bytes": 0, "cost": 0.0})
+
+    def record(self, role, model, seconds, usage=None, fallback=False, sent=(0, 0)):
+        """`sent` is the (static prefix, dynamic suffix) bytes of the prompt."""
+        usage = usage or {}
+        provider, _, name = model.partition(":")
+        input_price, output_price = PRICES.get(name, (0.0, 0.0))
+        details = usage.get("input_token_details") or {}
+        cached = details.get("cache_read", 0)
+        uncached = usage.get("input_tokens", 0) - cached
+        with self.lock:
+            row = self.rows[(role, model)]
+            row["calls"] += 1
+            row["fallbacks"] += fallback
+            row["seconds"] += seconds
+            row["input"] += usage.get("input_tokens", 0)
+            row["cached"] += cached
+            # Cache reads made up by prompts.LocalPrefixCache in the offline benchmark, not by a provider.
+            row["simulated"] += cached if details.get("simulated") else 0
+            row["output"] += usage.get("output_tokens", 0)
+            row["static_bytes"] += sent[0]
+            row["dynamic_bytes"] += sent[1]
+            row["cost"] += (
+                (uncached + cached * CACHED_INPUT_RATE.get(provider, 1.0)) * input_price
+                + usage.get("output_tokens", 0) * output_price
+            ) / 1e6
+
+    def error(self, role, model, seconds):
+        with self.lock:
+            row = self.rows[(role, model)]
+            row["errors"] += 1
+            row["seconds"] += seconds
+
+    def summary(self):
+        with self.lock:
+            rows = sorted(self.rows.items())
+        if not rows:
+            return ""
+        lines = ["Models:"]
+        for (role, model), row in rows:
+            average = row["seconds"] / max(row["calls"] + row["errors"], 1)
+            calls = max(row["calls"], 1)
+            cached = f"{row['cached']} cached"
+            if row["simulated"]:
+                cached += ", simulated" if row["simulated"] == row["cached"] else f", {row['simulated']} simulated"
+            extra = "".join([
+                f", {row['fallbacks']} as fallback" if row["fallbacks"] else "",
+                f", {row['errors']} failed" if row["errors"] else "",
+            ])
+            lines.append(f"   {role}: {model} ×{row['calls']}{extra}, {average * 1000:.0f} ms avg, "
+                         f"{row['input']}+{row['output']} tokens ({cached}), "
+                         f"{row['static_bytes'] / calls / 1024:.1f}+{row['dynamic_bytes'] / calls / 1024:.1f} KB/hop, "
+                         f"${row['cost']:.4f}")
+        return "\n".join(lines)
+
+    def render(self):
+        """The ledger in the Prometheus text format."""
+        metrics = [
+            ("agent_model_calls_total", "LLM calls per role and model", "calls"),
+            ("agent_model_fallbacks_total", "Calls served by a fallback model", "fallbacks"),
+            ("agent_model_errors_total", "Failed LLM calls (timeouts, rate limits, ...)", "errors"),
+            ("agent_model_seconds_total", "Time spent in LLM calls", "seconds"),
+            ("agent_model_input_tokens_total", "Prompt tokens sent", "input"),
+            ("agent_model_cached_tokens_total", "Prompt tokens read from the provider's prefix cache", "cached"),
+            ("agent_model_simulated_cached_tokens_total", "Cached prompt tokens made up by the offline benchmark's LocalPrefixCache", "simulated"),
+            ("agent_model_static_bytes_total", "Prompt bytes in static prefixes (system prompt, tool schemas)", "static_bytes"),
+            ("agent_model_dynamic_bytes_total", "Prompt bytes in dynamic suffixes (the conversation)", "dynamic_bytes"),
+            ("agent_model_cost_usd_total", "Estimated LLM cost in USD", "cost"),
+        ]
+        lines = []
+        with self.lock:
+            for name, help_text, key in metrics:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (role, model), row in sorted(self.rows.items()):
+                    lines.append(f'{name}{{role="{role}",model="{model}"}} {row[key]:g}')
+        return "\n".join(lines) + "\n"
+
+
+model_ledger = ModelLedger()
+
+
+class TieredChatModel(BaseChatModel):
+    """
+    The chat model of one role: calls its primary model and moves on to the next in the tier
+    when a call times out, is rate limited or the provider is unavailable. Tools and structured
+    output are bound per model at call time, so every provider formats them its own way. Each
+    call is recorded in the ledger under the role and the model that served it, with the bytes of
+    its static prompt prefix (system prompt, tool schemas) and of its dynamic suffix.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    role: str
+    names: list[str]
+    models: list[Any]
+    ledger: Any = None
+    timeout: Optional[float] = None
+    # (model index, tool ids, kwargs) -> (tools, bound model, schema bytes): converting ~30 tool schemas per call is not free.
+    _bound: dict = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self):
+        return "tiered"
+
+    @property
+    def _identifying_params(self):
+        return {"role": self.role, "models": self.names}
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_provider"], _, params["ls_model_name"] = self.names[0].partition(":")
+        return params
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(bound_tools=list(tools), **kwargs)
+
+    def _runnable(self, i, bound_tools, kwargs):
+        """The i-th model with the tools bound, and the size of their schemas."""
+        kwargs = {key: value for key, value in kwargs.items() if key != "ls_structured_output_format"}
+        if not bound_tools:
+            return (self.models[i].bind(**kwargs) if kwargs else self.models[i]), 0
+        key = (i, tuple(map(id, bound_tools)), repr(sorted(kwargs.items())))
+        cached = self._bound.get(key)
+        if cached is None:
+            # The tools are kept with the binding so their ids stay unique while cached.
+            cached = self._bound[key] = (
+                bound_tools, self.models[i].bind_tools(bound_tools, **kwargs), len(tool_schemas(bound_tools).encode()),
+            )
+        return cached[1], cached[2]
+
+    @staticmethod
+    def _sent(messages, tool_bytes):
+        """(static, dynamic) prompt bytes: leading system messages and tool schemas, then the rest."""
+        static = tool_bytes
+        dynamic = 0
+        in_prefix = True
+        for message in messages:
+            size = len(str(message.content).encode())
+            in_prefix = in_prefix and isinstance(message, SystemMessage)
+            if in_prefix:
+                static += size
+            else:
+                dynamic += size
+        return static, dynamic
+
+    def _record(self, name, start, message, fallback, sent):
+        if self.ledger is not None:
+            self.ledger.record(self.role, name, time.perf_counter() - start, getattr(message, "usage_metadata", None), fallback, sent)
+
+    def _failed(self, name, start, error, last):
+        if self.ledger is not None:
+            self.ledger.error(self.role, name, time.perf_counter() - start)
+        if last or not should_fall_back(error):
+            raise error
+
+    def _generate(self, messages, stop=None, run_manager=None, bound_tools=None, **kwargs):
+        for i, name in enumerate(self.names):
+            start = time.perf_counter()
+            try:
+                model, tool_bytes = self._runnable(i, bound_tools, kwargs)
+                message = model.invoke(messages, INNER_CONFIG, stop=stop)
+            except Exception as e:
+                self._failed(name, start, e, i == len(self.models) - 1)
+                continue
+            self._record(name, start, message, i > 0, self._sent(messages, tool_bytes))
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, bound_tools=None, **kwargs):
+        for i, name in enumerate(self.names):
+            start = time.perf_counter()
+            try:
+                model, tool_bytes = self._runnable(i, bound_tools, kwargs)
+                call = model.ainvoke(messages, INNER_CONFIG, stop=stop)
+                # The slot covers only the request itself, not the tool calls and confirmations around it.
+                async with llm_slots():
+                    message = await asyncio.wait_for(call, self.timeout) if self.timeout else await call
+            except Exception as e:
+                self._failed(name, start, e, i == len(self.models) - 1)
+                continue
+            self._record(name, start, message, i > 0, self._sent(messages, tool_bytes))
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, bound_tools=None, **kwargs):
+        for i, name in enumerate(self.names):
+            start, message, tool_bytes = time.perf_counter(), None, 0
+            try:
+                model, tool_bytes = self._runnable(i, bound_tools, kwargs)
+                for chunk in model.stream(messages, INNER_CONFIG, stop=stop):
+                    message = chunk if message is None else message + chunk
+                    generation = ChatGenerationChunk(message=chunk)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.content if isinstance(chunk.content, str) else "", chunk=generation)
+                    yield generation
+            except Exception as e:
+                # Once tokens are out, switching models would mix two answers.
+                self._failed(name, start, e, i == len(self.models) - 1 or message is not None)
+                continue
+            self._record(name, start, message, i > 0, self._sent(messages, tool_bytes))
+            return
+
+    async def _astream(self, messages, stop=None, run_manager=None, bound_tools=None, **kwargs):
+        for i, name in enumerate(self.names):
+            start, message, tool_bytes = time.perf_counter(), None, 0
+            try:
+                model, tool_bytes = self._runnable(i, bound_tools, kwargs)
+                async with llm_slots():
+                    async for chunk in model.astream(messages, INNER_CONFIG, stop=stop):
+                        message = chunk if message is None else message + chunk
+                        generation = ChatGenerationChunk(message=chunk)
+                        if run_manager:
+                            await run_manager.on_llm_new_token(chunk.content if isinstance(chunk.content, str) else "", chunk=generation)
+                        yield generation
+            except Exception as e:
+                self._failed(name, start, e, i == len(self.models) - 1 or message is not None)
+                continue
+            self._record(name, start, message, i > 0, self._sent(messages, tool_bytes))
+            return
+
+
+def get_model(role, spec=None, ledger=model_ledger):
+    """The tiered chat model for `role`, from MODEL_<ROLE> or ROLE_DEFAULTS."""
+    spec = spec or os.getenv(f"MODEL_{role.upper()}", ROLE_DEFAULTS[role])
+    tier = parse_tier(spec)
+    # The primary is always built; fallbacks only when their provider is configured.
+    tier = tier[:1] + [(provider, model) for provider, model in tier[1:] if os.getenv(PROVIDER_KEYS.get(provider, ""), "")]
+    return TieredChatModel(
+        role=role,
+        names=[f"{provider}:{model}" for provider, model in tier],
+        models=[PROVIDERS[provider](model) for provider, model in tier],
+        ledger=ledger,
+        timeout=LLM_TIMEOUT,
+    )
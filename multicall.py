@@ -0,0 +1,136 @@
+# multicall.py
+
+import os
+import threading
+import time
+
+from abi import function_selector
+from rpc import RpcError, eth_call, rpc_batch
+
+# Multicall3 has the same address on every chain it is deployed to, Base Sepolia included.
+MULTICALL3 = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+# "multicall" packs the reads into one aggregate3 eth_call; "batch" sends a JSON-RPC batch of eth_calls.
+READ_MODE = os.getenv("READ_MODE", "multicall")
+# Base produces a block every ~2 seconds; within that window a cached read is still current.
+BLOCK_TIME = float(os.getenv("BLOCK_TIME", "2.0"))
+# Blocks of results kept around for callers that pin an older block.
+READ_CACHE_BLOCKS = int(os.getenv("READ_CACHE_BLOCKS", "4"))
+
+AGGREGATE3_SELECTOR = function_selector("aggregate3", ["(address,bool,bytes)[]"])
+GET_BLOCK_NUMBER = function_selector("getBlockNumber", [])
+
+
+def _word(value):
+    return format(value, "064x")
+
+
+def _encode_bytes(data):
+    data = data.replace("0x", "")
+    padded = data.ljust((len(data) + 63) // 64 * 64, "0")
+    return _word(len(data) // 2) + padded
+
+
+def encode_aggregate3(calls):
+    """aggregate3(Call3[]) calldata for (target, calldata) pairs, each allowed to fail."""
+    tuples = [
+        target.lower().replace("0x", "").rjust(64, "0") + _word(1) + _word(0x60) + _encode_bytes(data)
+        for target, data in calls
+    ]
+    offsets, position = [], 32 * len(tuples)
+    for encoded in tuples:
+        offsets.append(_word(position))
+        position += len(encoded) // 2
+    return AGGREGATE3_SELECTOR + _word(0x20) + _word(len(calls)) + "".join(offsets) + "".join(tuples)
+
+
+def decode_aggregate3(data):
+    """(success, return data) pairs from aggregate3's Result[]."""
+    data = data.replace("0x", "")
+
+    def word(offset):
+        return int(data[offset * 2:offset * 2 + 64], 16)
+
+    array = word(0)
+    count = word(array)
+    results = []
+    for i in range(count):
+        start = array + 32 + word(array + 32 + 32 * i)
+        success = word(start) == 1
+        data_start = start + word(start + 32)
+        length = word(data_start)
+        results.append((success, "0x" + data[(data_start + 32) * 2:(data_start + 32 + length) * 2]))
+    return results
+
+
+class ReadAggregator:
+    """
+    Batches view calls into one round-trip and caches the results per block.
+
+    Identical (target, calldata) calls are sent once, and calls already answered for the latest
+    block are served from the cache, so the reads of one graph step never repeat. The block number
+    travels in the same request (Multicall3's getBlockNumber), so caching costs no extra round-trip.
+    """
+
+    def __init__(self, mode=READ_MODE, block_time=BLOCK_TIME, keep_blocks=READ_CACHE_BLOCKS):
+        self.mode = mode
+        self.block_time = block_time
+        self.keep_blocks = keep_blocks
+        self.results = {}
+        self.latest_block = None
+        self.latest_seen_at = 0.0
+        self.round_trips = 0
+        self.lock = threading.Lock()
+
+    def read(self, calls):
+        """
+        Return data (hex) for each (target, calldata) call in order, or None for a call that
+        reverted, together with the block the results belong to.
+        """
+        calls = [(target.lower(), data) for target, data in calls]
+        with self.lock:
+            fresh = self.latest_block is not None and time.monotonic() - self.latest_seen_at < self.block_time
+            cached = self.results.get(self.latest_block, {}) if fresh else {}
+            pending = list(dict.fromkeys(call for call in calls if call not in cached))
+            if not pending:
+                return [cached[call] for call in calls], self.latest_block
+
+        block, values = self._fetch(pending)
+        with self.lock:
+            if self.latest_block is None or block >= self.latest_block:
+                self.latest_block, self.latest_seen_at = block, time.monotonic()
+            answers = self.results.setdefault(block, {})
+            if block == self.latest_block:
+                # Reads cached earlier in this block are still valid.
+                answers.update({call: value for call, value in cached.items() if call not in answers})
+            answers.update(zip(pending, values))
+            for old in sorted(self.results)[:-self.keep_blocks]:
+                del self.results[old]
+            return [answers[call] for call in calls], block
+
+    def _fetch(self, calls):
+        self.round_trips += 1
+        if self.mode == "multicall":
+            # Errors here (rate limits, timeouts) are raised to the caller; they say nothing about Multicall3.
+            data = eth_call(MULTICALL3, encode_aggregate3([(MULTICALL3, GET_BLOCK_NUMBER)] + calls))
+            if data not in (None, "", "0x"):
+                results = decode_aggregate3(data)
+                block = int(results[0][1], 16)
+                return block, [data if success else None for success, data in results[1:]]
+            # A call to an address without code succeeds with empty return data: Multicall3 is not
+            # deployed on this RPC_URL's chain, so every later read uses a JSON-RPC batch.
+            print(f"⚠️ No Multicall3 contract at {MULTICALL3}, using JSON-RPC batches")
+            self.mode = "batch"
+        responses = rpc_batch([("eth_blockNumber", [])] + [
+            ("eth_call", [{"to": target, "data": data}, "latest"]) for target, data in calls
+        ])
+        if isinstance(responses[0], RpcError):
+            raise responses[0]
+        return int(responses[0], 16), [None if isinstance(result, RpcError) else result for result in responses[1:]]
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+            self.latest_block = None
+
+
+reader = ReadAggregator()
@@ -0,0 +1,171 @@
+# policy.py
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from budget import WORKERS, current_turn
+from router import TWITTER_PATTERN
+from tokens import token_registry
+
+# Which worker questions are answered locally, edited by hand like tokens.json.
+CONFIRMATION_POLICY_FILE = os.getenv(
+    "CONFIRMATION_POLICY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "confirmation_policy.json"),
+)
+
+# Only explicit requests for a go-ahead count; "Anything else?" is not a confirmation question.
+QUESTION_PATTERN = re.compile(
+    r"\b(do you want|would you like|want me to|shall i|should i|please confirm|can you confirm|ok to proceed|proceed\?)",
+    re.IGNORECASE,
+)
+# A number, then a space and a symbol or token address ("10,000 STK"). Digits inside "0xabc" or "v3" do not start one.
+AMOUNT_PATTERN = re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?\s+(0x[0-9a-fA-F]{40}|[A-Za-z][A-Za-z0-9]{1,9})\b")
+# "token ID 35 with ...", "position 4 using ...", "#12": identifiers, never amounts.
+ID_PREFIX_PATTERN = re.compile(r"(\bid|\bposition|\bnft|#)\s*$", re.IGNORECASE)
+# A symbol the registry does not know still names a token when written as a ticker ("5 WETH").
+TICKER_PATTERN = re.compile(r"^[A-Z][A-Z0-9]{1,9}$")
+TX_HASH_PATTERN = re.compile(r"0x[0-9a-fA-F]{64}")
+TX_LINK = "https://sepolia.basescan.org/tx/{}"
+
+
+class Decision:
+    """
+    A confirmation decided without the LLM: the message to add (as the assistant), where the
+    conversation goes next (None ends the turn and leaves it to the user) and the rule that fired.
+    """
+
+    def __init__(self, content, goto, rule):
+        self.content = content
+        self.goto = goto
+        self.rule = rule
+
+
+class ConfirmationPolicy:
+    """
+    Answers the workers' confirmation questions from declarative rules instead of an assistant LLM hop.
+
+    Each tool has the keywords that identify it in a worker's question. Tools on `auto_approve`
+    are confirmed, tools on `always_ask` go back to the user, and every other tool is confirmed
+    when each amount mentioned stays within `max_auto_amount` for its token. `prefer` settles
+    questions offering two tools (e.g. a new position or the existing one). With
+    `tweet_after_success`, a successful transaction goes straight to the twitter agent when the
+    user asked for a tweet. Anything the rules do not cover returns None, and the supervisor
+    falls back to the LLM.
+    """
+
+    def __init__(self, path=CONFIRMATION_POLICY_FILE):
+        with open(path) as f:
+            policy = json.load(f)
+        self.tools = policy["tools"]
+        self.auto_approve = set(policy.get("auto_approve", []))
+        self.always_ask = set(policy.get("always_ask", []))
+        self.prefer = policy.get("prefer", {})
+        self.tweet_after_success = policy.get("tweet_after_success", False)
+        self.max_auto_amount = {}
+        for symbol, amount in policy.get("max_auto_amount", {}).items():
+            self.max_auto_amount[token_registry.symbol(symbol) or symbol.upper()] = Decimal(str(amount))
+        # Keywords compiled once per tool; order in the file decides which tool a message names first.
+        self.patterns = {
+            tool: re.compile(r"\b(" + "|".join(re.escape(keyword) for keyword in rule["keywords"]) + r")\b", re.IGNORECASE)
+            for tool, rule in self.tools.items()
+        }
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def amounts(self, text):
+        """
+        (symbol, amount) for every token amount mentioned in `text`. A unit counts when it
+        resolves through the token registry (symbol, alias or address) or has a threshold; an
+        unknown ticker like "WETH" is kept as written, so `verdict` asks about it. Token IDs and
+        position numbers are skipped.
+        """
+        found = []
+        for match in AMOUNT_PATTERN.finditer(text):
+            if ID_PREFIX_PATTERN.search(text, 0, match.start()):
+                continue
+            whole, fraction, unit = match.groups()
+            symbol = token_registry.symbol(unit)
+            if symbol is None and (unit.upper() in self.max_auto_amount or TICKER_PATTERN.match(unit)):
+                symbol = unit.upper()
+            if symbol is not None:
+                found.append((symbol, Decimal(whole.replace(",", "") + (fraction or ""))))
+        return found
+
+    def tools_named(self, worker, text):
+        tools = [tool for tool, pattern in self.patterns.items()
+                 if self.tools[tool]["worker"] == worker and pattern.search(text)]
+        for tool, preferred in self.prefer.items():
+            if tool in tools and preferred in tools:
+                tools = [preferred] + [other for other in tools if other not in (tool, preferred)]
+        return tools
+
+    def verdict(self, tool, amounts):
+        """
+        "confirm", "ask" or None (can't tell) for one tool and the amounts in the question. An
+        amount in a token without a `max_auto_amount` is always asked about.
+        """
+        if tool in self.always_ask:
+            return "ask"
+        if tool in self.auto_approve:
+            return "confirm"
+        if not amounts:
+            return None
+        within = all(symbol in self.max_auto_amount and amount <= self.max_auto_amount[symbol] for symbol, amount in amounts)
+        return "confirm" if within else "ask"
+
+    def _record(self, decision):
+        with self.lock:
+            self.stats[decision.rule] += 1
+        return decision
+
+    def decide(self, messages):
+        """A Decision for the latest worker reply, or None when the LLM has to decide."""
+        user, replies = current_turn(messages)
+        if user is None or not replies or replies[-1].name not in WORKERS:
+            return None
+        last = replies[-1]
+        content = last.content if isinstance(last.content, str) else str(last.content)
+
+        tx_hash = TX_HASH_PATTERN.search(content)
+        if last.name == "blockchain_agent" and tx_hash and "❌" not in content:
+            wants_tweet = TWITTER_PATTERN.search(user.content) is not None
+            tweeted = any(message.name == "twitter_agent" for message in replies)
+            if self.tweet_after_success and wants_tweet and not tweeted and self.verdict("X_PostTweet", []) == "confirm":
+                summary = content.strip().splitlines()[0]
+                return self._record(Decision(
+                    f"Yes, please post a tweet about this: {summary} Include the transaction link {TX_LINK.format(tx_hash.group(0))}",
+                    "twitter_agent", "tweet_after_success",
+                ))
+            return None
+
+        if not QUESTION_PATTERN.search(content):
+            return None
+        tools = self.tools_named(last.name, content)
+        if not tools:
+            return None
+        amounts = self.amounts(content)
+        verdicts = [self.verdict(tool, amounts) for tool in tools]
+        if "ask" in verdicts:
+            tool = tools[verdicts.index("ask")]
+            return self._record(Decision(
+                f"This needs your confirmation ({tool}):\n{content}", None, f"ask:{tool}",
+            ))
+        if verdicts[0] != "confirm":
+            return None
+        tool = tools[0]
+        detail = f" ({', '.join(f'{amount:f} {symbol}' for symbol, amount in amounts)})" if amounts else ""
+        return self._record(Decision(
+            f"Yes, please {self.tools[tool]['confirmation']}{detail}.", last.name, f"confirm:{tool}",
+        ))
+
+    def summary(self):
+        if not self.stats:
+            return ""
+        return "Policy decisions: " + ", ".join(f"{rule} ×{count}" for rule, count in self.stats.most_common())
+
+
+confirmation_policy = ConfirmationPolicy()
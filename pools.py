@@ -0,0 +1,138 @@
+# pools.py
+
+import os
+
+from abi import decode_words, to_signed, word_to_address
+from contracts import factory, pool_contract
+from helpers import parse_token_amounts, TOKENS
+from positions import get_position_index
+from multicall import reader
+from v3math import MAX_TICK, MIN_TICK, nearest_usable_tick, price_from_sqrt_price, quote_deposit
+
+# mintNewPosition opens a full-range position in the fee tier below (see the liquidity contract).
+MINT_POOL_FEE = int(os.getenv("MINT_POOL_FEE", "3000"))
+TICK_SPACINGS = {100: 1, 500: 10, 3000: 60, 10000: 200}
+
+ZERO_ADDRESS = "0x" + "0" * 40
+SLOT0_CALL = pool_contract.slot0().data
+
+# Pool addresses never change once a pool exists.
+_pool_addresses = {}
+
+
+def sort_tokens(token_a, token_b):
+    return (token_a, token_b) if token_a.lower() < token_b.lower() else (token_b, token_a)
+
+
+def full_range(fee):
+    spacing = TICK_SPACINGS[fee]
+    return nearest_usable_tick(MIN_TICK, spacing), nearest_usable_tick(MAX_TICK, spacing)
+
+
+def get_pool_call(token_a, token_b, fee):
+    token0, token1 = sort_tokens(token_a, token_b)
+    return factory.getPool(token0, token1, fee).request
+
+
+def get_pool_addresses(pairs):
+    """Pool address (or None) for each (token_a, token_b, fee), with unknown pools looked up in one read."""
+    keys = [(*sorted((token_a.lower(), token_b.lower())), fee) for token_a, token_b, fee in pairs]
+    unknown = list(dict.fromkeys(key for key in keys if key not in _pool_addresses))
+    if unknown:
+        results, _ = reader.read([get_pool_call(*key) for key in unknown])
+        for key, data in zip(unknown, results):
+            address = word_to_address(decode_words(data)[0]) if data else ZERO_ADDRESS
+            if address != ZERO_ADDRESS:
+                _pool_addresses[key] = address
+    return [_pool_addresses.get(key) for key in keys]
+
+
+def get_pool_address(token_a, token_b, fee):
+    return get_pool_addresses([(token_a, token_b, fee)])[0]
+
+
+def decode_slot0(data):
+    words = decode_words(data)
+    return words[0], to_signed(words[1])
+
+
+def read_slot0(pool_address):
+    """Current sqrtPriceX96 and tick of a pool."""
+    (data,), _ = reader.read([(pool_address, SLOT0_CALL)])
+    if data is None:
+        raise ValueError(f"slot0 reverted for pool {pool_address}")
+    return decode_slot0(data)
+
+
+def quote_liquidity(tokenA_amount, tokenB_amount, fee=MINT_POOL_FEE, tick_lower=None, tick_upper=None):
+    """
+    Predict the liquidity, token usage and refunds of a deposit at the pool's current price.
+    Returns None when the pool does not exist yet (the first deposit sets the price).
+    """
+    (symbolA, amountA), (symbolB, amountB) = parse_token_amounts([tokenA_amount, tokenB_amount])
+    tokenA, tokenB = TOKENS[symbolA]['address'], TOKENS[symbolB]['address']
+    pool_address = get_pool_address(tokenA, tokenB, fee)
+    if pool_address is None:
+        return None
+    sqrt_price_x96, tick = read_slot0(pool_address)
+    if tick_lower is None:
+        tick_lower, tick_upper = full_range(fee)
+
+    a_is_token0 = sort_tokens(tokenA, tokenB)[0] == tokenA
+    amount0, amount1 = (amountA, amountB) if a_is_token0 else (amountB, amountA)
+    quote = quote_deposit(sqrt_price_x96, tick_lower, tick_upper, amount0, amount1)
+    used = {symbolA: quote["amount0" if a_is_token0 else "amount1"], symbolB: quote["amount1" if a_is_token0 else "amount0"]}
+    refund = {symbolA: quote["refund0" if a_is_token0 else "refund1"], symbolB: quote["refund1" if a_is_token0 else "refund0"]}
+    symbol0, symbol1 = (symbolA, symbolB) if a_is_token0 else (symbolB, symbolA)
+    price = price_from_sqrt_price(sqrt_price_x96, TOKENS[symbol0]['decimals'], TOKENS[symbol1]['decimals'])
+    return {
+        "liquidity": quote["liquidity"],
+        "used": used,
+        "refund": refund,
+        "price": f"1 {symbol0} = {price:.6g} {symbol1}",
+        "in_range": tick_lower <= tick < tick_upper,
+    }
+
+
+def format_quote(quote):
+    """One line for the tool result, so the agent can relay what the deposit actually does."""
+    if quote is None:
+        return ""
+
+    def amounts(values):
+        return " and ".join(f"{wei / 10 ** TOKENS[symbol]['decimals']:g} {symbol}" for symbol, wei in values.items())
+
+    line = f"📐 Expected liquidity {quote['liquidity']}, using {amounts(quote['used'])} at {quote['price']}"
+    # Rounding leaves a few wei behind on every deposit; only mention real leftovers (> 0.1%).
+    refunds = {
+        symbol: wei for symbol, wei in quote['refund'].items()
+        if wei * 1000 > wei + quote['used'][symbol]
+    }
+    if refunds:
+        line += f"; {amounts(refunds)} will not be used (pool ratio)"
+    if not quote["in_range"]:
+        line += "; the range is out of the current price, so only one token is used"
+    return line + "."
+
+
+def mint_quote_line(tokenA_amount, tokenB_amount):
+    """The quote line for mintNewPosition, or "" if it cannot be computed."""
+    try:
+        return format_quote(quote_liquidity(tokenA_amount, tokenB_amount))
+    except Exception as e:
+        print(f"⚠️ Liquidity quote skipped: {str(e)}")
+        return ""
+
+
+def increase_quote_line(token_id, tokenA_amount, tokenB_amount):
+    """The quote line for increaseLiquidityCurrentRange, using the position's fee tier and range."""
+    try:
+        position = get_position_index().get(token_id)
+        if position is None or position["fee"] is None:
+            return ""
+        return format_quote(quote_liquidity(
+            tokenA_amount, tokenB_amount, position["fee"], position["tick_lower"], position["tick_upper"]
+        ))
+    except Exception as e:
+        print(f"⚠️ Liquidity quote skipped: {str(e)}")
+        return ""
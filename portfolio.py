@@ -0,0 +1,196 @@
+# portfolio.py
+
+import asyncio
+from cdp import Wallet
+from pydantic import BaseModel
+
+# Import CdpTool
+from cdp_langchain.tools import CdpTool
+from langchain_core.tools import StructuredTool
+
+from abi import decode_words, to_signed
+from allowance import allowance_cache, wallet_address
+from contracts import erc20, multicall3, pool_contract, position_manager
+from helpers import TOKENS, CONTRACTS
+from multicall import reader
+from pools import SLOT0_CALL, decode_slot0, get_pool_addresses
+from tokens import token_registry
+from positions import format_position, get_position_index, position_owners
+from v3math import fee_growth_inside, fees_owed, position_amounts
+
+PORTFOLIO_SNAPSHOT_DESCRIPTION = """
+Show the wallet's portfolio in one step: ETH and token balances, the allowances granted to the liquidity contract, and every Uniswap V3 position with its current token amounts and uncollected fees.
+
+**Usage Examples:**
+- "What's in my wallet?"
+- "Show my portfolio."
+
+**Important Notes:**
+- All balances, allowances, positions and pool prices are read together in a single request against the same block (the position index syncs new logs first when it is due).
+- **Network Support**: Supported only on 'base-sepolia' network.
+"""
+
+class PortfolioSnapshotInput(BaseModel):
+    """Input argument schema for the portfolio snapshot (no arguments)."""
+
+def snapshot_calls(owner, tokens, positions):
+    spender = CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"]
+    calls = [multicall3.getEthBalance(owner).request]
+    for _, token in tokens:
+        contract = erc20.at(token['address'])
+        calls.append(contract.balanceOf(owner).request)
+        calls.append(contract.allowance(owner, spender).request)
+    for position in positions:
+        calls.append(position_manager.positions(position["token_id"]).request)
+    return calls
+
+FEE_GROWTH_GLOBAL_CALLS = (pool_contract.feeGrowthGlobal0X128().data, pool_contract.feeGrowthGlobal1X128().data)
+
+def pool_calls_for(pools, positions):
+    """slot0 and fee growth per pool, and ticks() at both ends of each position's range."""
+    calls = []
+    for pool in dict.fromkeys(pool for pool in pools if pool):
+        calls += [(pool, SLOT0_CALL)] + [(pool, data) for data in FEE_GROWTH_GLOBAL_CALLS]
+    for position, pool in zip(positions, pools):
+        if pool:
+            calls += [(pool, pool_contract.ticks(position["tick_lower"]).data),
+                      (pool, pool_contract.ticks(position["tick_upper"]).data)]
+    return calls
+
+def uncollected_fees(words, pool, answers):
+    """
+    Fees owed to a position now: tokensOwed from its last checkpoint plus what accrued since, from
+    the pool's fee growth inside the range (as Position.update would compute on the next poke).
+    Returns (None, None) when a pool value is missing, e.g. a reverted read.
+    """
+    tick_lower, tick_upper, liquidity = to_signed(words[5]), to_signed(words[6]), words[7]
+    slot0 = answers.get((pool, SLOT0_CALL))
+    globals_ = [answers.get((pool, data)) for data in FEE_GROWTH_GLOBAL_CALLS]
+    lower = answers.get((pool, pool_contract.ticks(tick_lower).data))
+    upper = answers.get((pool, pool_contract.ticks(tick_upper).data))
+    if not (slot0 and all(globals_) and lower and upper):
+        return None, None
+    _, tick = decode_slot0(slot0)
+    lower, upper = decode_words(lower), decode_words(upper)
+    fees = []
+    for i in (0, 1):
+        inside = fee_growth_inside(tick, tick_lower, tick_upper, int(globals_[i], 16), lower[2 + i], upper[2 + i])
+        fees.append(words[10 + i] + fees_owed(liquidity, inside, words[8 + i]))
+    return fees[0], fees[1]
+
+def take_snapshot(owner):
+    """
+    Balances, allowances and positions of `owner` from a single aggregated read. Pool addresses
+    are looked up once and then cached. Before the read, the position index syncs new logs at
+    most every POSITION_INDEX_SYNC_INTERVAL seconds (eth_blockNumber and eth_getLogs), so a
+    snapshot is one round-trip when the index is fresh and a few more when it is not.
+    """
+    index = get_position_index()
+    index.refresh()
+    positions = [position for position in index.by_owners(*position_owners(owner)) if position["token0"]]
+    pools = get_pool_addresses([(position["token0"], position["token1"], position["fee"]) for position in positions])
+    pool_calls = pool_calls_for(pools, positions)
+
+    # The registry can grow while we read; work from a fixed list of tokens.
+    tokens = list(TOKENS.items())
+    calls = snapshot_calls(owner, tokens, positions)
+    results, block = reader.read(calls + pool_calls)
+    results, pool_results = results[:len(calls)], results[len(calls):]
+    answers = {(pool.lower(), data): result for (pool, data), result in zip(pool_calls, pool_results)}
+
+    snapshot = {"block": block, "eth": int(results[0], 16) if results[0] else None, "tokens": {}, "positions": [],
+                "positions_note": index.sync_note()}
+    for i, (symbol, token) in enumerate(tokens):
+        balance, allowance = results[1 + 2 * i], results[2 + 2 * i]
+        snapshot["tokens"][symbol] = {
+            "balance": int(balance, 16) if balance else None,
+            "allowance": int(allowance, 16) if allowance else None,
+        }
+        if allowance:
+            allowance_cache.set(token['address'], owner, int(allowance, 16))
+
+    offset = 1 + 2 * len(tokens)
+    rows = []
+    for position, pool, data in zip(positions, pools, results[offset:]):
+        if not data:
+            continue
+        words = decode_words(data)
+        pool = pool.lower() if pool else None
+        slot0 = answers.get((pool, SLOT0_CALL))
+        fees0, fees1 = uncollected_fees(words, pool, answers)
+        rows.append({
+            **position,
+            "tick_lower": to_signed(words[5]),
+            "tick_upper": to_signed(words[6]),
+            "liquidity": words[7],
+            "fees0": fees0,
+            "fees1": fees1,
+            "sqrt_price_x96": decode_slot0(slot0)[0] if slot0 else None,
+        })
+    priced = [row for row in rows if row["sqrt_price_x96"]]
+    if priced:
+        # Every position is valued in one vectorized pass.
+        amounts0, amounts1 = position_amounts(
+            [row["sqrt_price_x96"] for row in priced],
+            [row["tick_lower"] for row in priced],
+            [row["tick_upper"] for row in priced],
+            [row["liquidity"] for row in priced],
+        )
+        for row, amount0, amount1 in zip(priced, amounts0, amounts1):
+            row["amount0"], row["amount1"] = amount0, amount1
+    snapshot["positions"] = rows
+    return snapshot
+
+def format_snapshot(snapshot):
+    def amount(wei, symbol):
+        if wei is None:
+            return "unavailable"
+        decimals = TOKENS[symbol]['decimals'] if symbol in TOKENS else 18
+        return f"{wei / 10 ** decimals:g} {symbol}"
+
+    lines = [f"📊 Portfolio at block {snapshot['block']}", f"- ETH: {amount(snapshot['eth'], 'ETH')}"]
+    for symbol, token in snapshot["tokens"].items():
+        lines.append(f"- {symbol}: {amount(token['balance'], symbol)} (approved for liquidity: {amount(token['allowance'], symbol)})")
+    if not snapshot["positions"]:
+        lines.append(f"No liquidity positions{snapshot.get('positions_note', '')}.")
+    elif snapshot.get("positions_note"):
+        lines.append(f"Positions so far{snapshot['positions_note']}:")
+    for row in snapshot["positions"]:
+        symbol0 = token_registry.symbol_for_address(row["token0"])
+        symbol1 = token_registry.symbol_for_address(row["token1"])
+        line = f"- Position {format_position(row)}"
+        if "amount0" in row:
+            line += f"; holds {amount(row['amount0'], symbol0)} + {amount(row['amount1'], symbol1)}"
+        line += f"; uncollected fees {amount(row['fees0'], symbol0)} + {amount(row['fees1'], symbol1)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def portfolio_snapshot(wallet: Wallet) -> str:
+    """Portfolio of the wallet from one aggregated read (after the position index's own sync)."""
+    try:
+        return format_snapshot(take_snapshot(wallet_address(wallet)))
+    except Exception as e:
+        return f"❌ Portfolio snapshot failed: {str(e)}"
+
+async def aportfolio_snapshot(wallet: Wallet) -> str:
+    return await asyncio.to_thread(portfolio_snapshot, wallet)
+
+# Create the tool instance
+def get_portfolio_snapshot_tool(agentkit):
+    return CdpTool(
+        name="portfolio_snapshot",
+        description=PORTFOLIO_SNAPSHOT_DESCRIPTION,
+        cdp_agentkit_wrapper=agentkit,
+        args_schema=PortfolioSnapshotInput,
+        func=portfolio_snapshot,
+    )
+
+# Create the tool instance for the async graph
+def get_async_portfolio_snapshot_tool(agentkit):
+    return StructuredTool.from_function(
+        name="portfolio_snapshot",
+        description=PORTFOLIO_SNAPSHOT_DESCRIPTION,
+        args_schema=PortfolioSnapshotInput,
+        func=lambda: portfolio_snapshot(agentkit.wallet),
+        coroutine=lambda: aportfolio_snapshot(agentkit.wallet),
+    )
@@ -0,0 +1,406 @@
+# positions.py
+
+import os
+import sqlite3
+import threading
+import time
+
+from abi import decode_words, event_topic, to_signed, word_to_address
+from contracts import position_manager
+from helpers import parse_token_amounts, CONTRACTS, TOKENS
+from rpc import block_number, get_code, get_logs, rpc_batch
+from tokens import token_registry
+
+POSITION_MANAGER = CONTRACTS["NonfungiblePositionManager"]
+# Positions minted through the liquidity contract are held by it on the depositor's behalf.
+LIQUIDITY_CONTRACT = CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"].lower()
+
+TRANSFER_TOPIC = event_topic("Transfer", ["address", "address", "uint256"])
+INCREASE_LIQUIDITY_TOPIC = event_topic("IncreaseLiquidity", ["uint256", "uint128", "uint256", "uint256"])
+DECREASE_LIQUIDITY_TOPIC = event_topic("DecreaseLiquidity", ["uint256", "uint128", "uint256", "uint256"])
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+POSITION_INDEX_DB = os.getenv("POSITION_INDEX_DB", "positions.sqlite")
+# First block to index. By default the position manager's deployment block, looked up once.
+POSITION_INDEX_START_BLOCK = int(os.getenv("POSITION_INDEX_START_BLOCK")) if os.getenv("POSITION_INDEX_START_BLOCK") else None
+POSITION_INDEX_CHUNK = int(os.getenv("POSITION_INDEX_CHUNK", "10000"))
+# At most this many chunks are read inside a tool call; a longer catch-up continues in the background.
+POSITION_INDEX_MAX_CHUNKS = int(os.getenv("POSITION_INDEX_MAX_CHUNKS", "5"))
+# Lookups re-sync at most this often.
+POSITION_INDEX_SYNC_INTERVAL = float(os.getenv("POSITION_INDEX_SYNC_INTERVAL", "15"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    token_id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    token0 TEXT,
+    token1 TEXT,
+    fee INTEGER,
+    tick_lower INTEGER,
+    tick_upper INTEGER,
+    liquidity TEXT NOT NULL,
+    updated_block INTEGER NOT NULL,
+    depositor TEXT
+);
+CREATE INDEX IF NOT EXISTS positions_owner ON positions (owner);
+CREATE INDEX IF NOT EXISTS positions_pair ON positions (token0, token1);
+CREATE TABLE IF NOT EXISTS position_index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def fetch_position_logs(from_block, to_block):
+    """Transfer, IncreaseLiquidity and DecreaseLiquidity logs of the position manager."""
+    topics = [[TRANSFER_TOPIC, INCREASE_LIQUIDITY_TOPIC, DECREASE_LIQUIDITY_TOPIC]]
+    return get_logs(POSITION_MANAGER, topics, from_block, to_block)
+
+
+def read_transaction_senders(tx_hashes):
+    """Sender of each transaction, looked up in one batch; failed lookups are left out."""
+    results = rpc_batch([("eth_getTransactionByHash", [tx_hash]) for tx_hash in tx_hashes])
+    return {tx_hash: result["from"].lower() for tx_hash, result in zip(tx_hashes, results) if isinstance(result, dict)}
+
+
+def find_deploy_block(address, latest, get_code=get_code):
+    """
+    First block at which `address` has code: a binary search over eth_getCode (~25 calls) instead
+    of scanning the whole chain for logs. A block whose code cannot be read (e.g. pruned state)
+    counts as deployed, so an error only makes the index start earlier.
+    """
+    low, high = 0, latest
+    while low < high:
+        mid = (low + high) // 2
+        try:
+            deployed = get_code(address, mid) not in (None, "", "0x")
+        except Exception:
+            deployed = True
+        if deployed:
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
+def read_position(token_id):
+    """token0, token1, fee and tick range from positions(tokenId)."""
+    words = decode_words(position_manager.positions(token_id).call())
+    return {
+        "token0": word_to_address(words[2]),
+        "token1": word_to_address(words[3]),
+        "fee": words[4],
+        "tick_lower": to_signed(words[5]),
+        "tick_upper": to_signed(words[6]),
+    }
+
+
+def pair_key(token_a, token_b):
+    return tuple(sorted((token_a.lower(), token_b.lower())))
+
+
+def holder(position):
+    """The wallet a position belongs to: its owner, or its depositor while the liquidity contract holds it."""
+    return position.get("depositor") if position["owner"] == LIQUIDITY_CONTRACT else position["owner"]
+
+
+class PositionIndex:
+    """
+    Local index of Uniswap V3 positions built from NonfungiblePositionManager logs.
+
+    Positions are persisted in SQLite and mirrored in dictionaries keyed by tokenId, owner and
+    token pair for constant-time lookups; `by_owner` is keyed by `holder`, so positions the
+    liquidity contract holds belong to the wallet that minted or deposited them. The first sync
+    starts at `start_block` (by default the position manager's deployment block), later ones only
+    read the logs after the last indexed block. `refresh` reads a few chunks at most and leaves a
+    longer catch-up to a background thread. The log, position, sender, block and deployment
+    sources can be swapped for recorded data.
+    """
+
+    def __init__(self, path=POSITION_INDEX_DB, start_block=POSITION_INDEX_START_BLOCK,
+                 fetch_logs=fetch_position_logs, read_position=read_position, read_senders=read_transaction_senders,
+                 latest_block=block_number, find_start_block=lambda latest: find_deploy_block(POSITION_MANAGER, latest)):
+        self.start_block = start_block
+        self.fetch_logs = fetch_logs
+        self.read_position = read_position
+        self.read_senders = read_senders
+        self.latest_block = latest_block
+        self.find_start_block = find_start_block
+        self.lock = threading.Lock()
+        self.last_synced_at = 0.0
+        self.caught_up = False
+        self.backfill = None
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(positions)")}
+        if columns and "depositor" not in columns:
+            # Indexed before depositors were recorded: rebuild from the start block.
+            self.conn.executescript("DROP TABLE positions; DROP TABLE position_index_meta;")
+        self.conn.executescript(SCHEMA)
+
+        self.by_id = {}
+        self.by_owner = {}
+        self.by_pair = {}
+        rows = self.conn.execute(
+            "SELECT token_id, owner, token0, token1, fee, tick_lower, tick_upper, liquidity, updated_block, depositor"
+            " FROM positions"
+        ).fetchall()
+        for row in rows:
+            token_id, owner, token0, token1, fee, tick_lower, tick_upper, liquidity, updated_block, depositor = row
+            self._index({
+                "token_id": token_id, "owner": owner, "token0": token0, "token1": token1, "fee": fee,
+                "tick_lower": tick_lower, "tick_upper": tick_upper, "liquidity": int(liquidity),
+                "updated_block": updated_block, "depositor": depositor,
+            })
+
+    # In-memory indexes
+
+    def _index(self, position):
+        self._unindex(position["token_id"])
+        self.by_id[position["token_id"]] = position
+        if holder(position):
+            self.by_owner.setdefault(holder(position), set()).add(position["token_id"])
+        if position["token0"]:
+            self.by_pair.setdefault(pair_key(position["token0"], position["token1"]), set()).add(position["token_id"])
+
+    def _unindex(self, token_id):
+        position = self.by_id.pop(token_id, None)
+        if position is None:
+            return
+        self.by_owner.get(holder(position), set()).discard(token_id)
+        if position["token0"]:
+            self.by_pair.get(pair_key(position["token0"], position["token1"]), set()).discard(token_id)
+
+    # Sync
+
+    @property
+    def last_block(self):
+        """The last indexed block, or None before the first sync."""
+        row = self.conn.execute("SELECT value FROM position_index_meta WHERE key = 'last_block'").fetchone()
+        return int(row[0]) if row else None
+
+    def sync(self, to_block=None, max_chunks=None):
+        """
+        Index the logs from the last indexed block up to `to_block` (default: latest), reading at
+        most `max_chunks` chunks. Returns True once the index has reached `to_block`.
+        """
+        with self.lock:
+            to_block = self.latest_block() if to_block is None else to_block
+            if self.last_block is not None:
+                from_block = self.last_block + 1
+            else:
+                if self.start_block is None:
+                    self.start_block = self.find_start_block(to_block)
+                from_block = self.start_block
+            chunks = 0
+            while from_block <= to_block and (max_chunks is None or chunks < max_chunks):
+                chunk_end = min(from_block + POSITION_INDEX_CHUNK - 1, to_block)
+                logs = self.fetch_logs(from_block, chunk_end)
+                self._apply(sorted(logs, key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16))), chunk_end)
+                from_block = chunk_end + 1
+                chunks += 1
+            self.caught_up = from_block > to_block
+            self.last_synced_at = time.monotonic()
+            return self.caught_up
+
+    def start_backfill(self):
+        """Catch up in a daemon thread; lookups meanwhile answer from what is indexed so far."""
+        with self.lock:
+            if self.backfill is not None and self.backfill.is_alive():
+                return self.backfill
+            self.backfill = threading.Thread(target=self._backfill, name="position-index-backfill", daemon=True)
+            self.backfill.start()
+            return self.backfill
+
+    def _backfill(self):
+        try:
+            while not self.sync(max_chunks=POSITION_INDEX_MAX_CHUNKS):
+                pass
+        except Exception as e:
+            print(f"⚠️ Position index backfill failed: {str(e)}")
+
+    @property
+    def backfilling(self):
+        return self.backfill is not None and self.backfill.is_alive()
+
+    def _apply(self, logs, last_block):
+        touched = {}
+        minted = {}
+        for log in logs:
+            topic = log["topics"][0]
+            block = int(log["blockNumber"], 16)
+            if topic == TRANSFER_TOPIC:
+                sender = word_to_address(int(log["topics"][1], 16))
+                receiver = word_to_address(int(log["topics"][2], 16))
+                token_id = int(log["topics"][3], 16)
+                if receiver == ZERO_ADDRESS:
+                    touched[token_id] = None
+                    continue
+                position = touched.get(token_id) or self.by_id.get(token_id)
+                if position is None or sender == ZERO_ADDRESS:
+                    position = {"token_id": token_id, "token0": None, "token1": None, "fee": None,
+                                "tick_lower": None, "tick_upper": None, "liquidity": 0}
+                # The liquidity contract keeps positions for whoever put them there: the previous
+                # owner on a transfer, the sender of the mint transaction on a mint.
+                depositor = None
+                if receiver == LIQUIDITY_CONTRACT:
+                    if sender == ZERO_ADDRESS:
+                        minted[token_id] = log["transactionHash"]
+                    else:
+                        depositor = sender
+                position = {**position, "owner": receiver, "updated_block": block, "depositor": depositor}
+                touched[token_id] = position
+            elif topic in (INCREASE_LIQUIDITY_TOPIC, DECREASE_LIQUIDITY_TOPIC):
+                token_id = int(log["topics"][1], 16)
+                position = touched.get(token_id) or self.by_id.get(token_id)
+                if position is None:
+                    continue
+                delta = decode_words(log["data"])[0]
+                liquidity = position["liquidity"] + (delta if topic == INCREASE_LIQUIDITY_TOPIC else -delta)
+                touched[token_id] = {**position, "liquidity": liquidity, "updated_block": block}
+
+        minted = {token_id: tx_hash for token_id, tx_hash in minted.items() if touched.get(token_id)}
+        if minted:
+            try:
+                senders = self.read_senders(sorted(set(minted.values())))
+            except Exception as e:
+                senders = {}
+                print(f"⚠️ Could not read who minted positions {sorted(minted)}: {str(e)}")
+            for token_id, tx_hash in minted.items():
+                if touched[token_id]["owner"] == LIQUIDITY_CONTRACT:
+                    touched[token_id]["depositor"] = senders.get(tx_hash)
+
+        # The token pair is not in the logs; read it once for each new position.
+        for token_id, position in touched.items():
+            if position is not None and position["token0"] is None:
+                try:
+                    position.update(self.read_position(token_id))
+                except Exception as e:
+                    print(f"⚠️ Could not read position {token_id}: {str(e)}")
+
+        self.conn.execute("BEGIN")
+        try:
+            for token_id, position in touched.items():
+                if position is None:
+                    self.conn.execute("DELETE FROM positions WHERE token_id = ?", (token_id,))
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (token_id, position["owner"], position["token0"], position["token1"], position["fee"],
+                     position["tick_lower"], position["tick_upper"], str(position["liquidity"]),
+                     position["updated_block"], position.get("depositor")),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO position_index_meta VALUES ('last_block', ?)", (str(last_block),)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        for token_id, position in touched.items():
+            if position is None:
+                self._unindex(token_id)
+            else:
+                self._index(position)
+
+    def refresh(self):
+        """
+        Sync unless the index was synced in the last POSITION_INDEX_SYNC_INTERVAL seconds or is
+        backfilling. Reads at most POSITION_INDEX_MAX_CHUNKS chunks and hands a longer catch-up to
+        the background, so a tool call never waits for a full scan.
+        """
+        if self.backfilling or time.monotonic() - self.last_synced_at < POSITION_INDEX_SYNC_INTERVAL:
+            return
+        try:
+            if not self.sync(max_chunks=POSITION_INDEX_MAX_CHUNKS):
+                self.start_backfill()
+        except Exception as e:
+            print(f"⚠️ Position index sync failed: {str(e)}")
+
+    def sync_note(self):
+        """A caveat for answers given while the index is still catching up, else ""."""
+        if self.caught_up:
+            return ""
+        if self.last_block is None:
+            return " (the position index has not synced yet; try again shortly)"
+        return f" (the position index is still syncing, at block {self.last_block}; try again shortly)"
+
+    # Lookups
+
+    def get(self, token_id):
+        return self.by_id.get(token_id)
+
+    def by_owners(self, *owners):
+        token_ids = set()
+        for owner in owners:
+            token_ids |= self.by_owner.get(owner.lower(), set())
+        return [self.by_id[token_id] for token_id in sorted(token_ids)]
+
+    def for_pair(self, token_a, token_b, owners=None):
+        token_ids = self.by_pair.get(pair_key(token_a, token_b), set())
+        positions = [self.by_id[token_id] for token_id in sorted(token_ids)]
+        if owners is not None:
+            owners = {owner.lower() for owner in owners}
+            positions = [position for position in positions if holder(position) in owners]
+        return positions
+
+    def best_for_pair(self, token_a, token_b, owners=None):
+        """The position with the most liquidity for a token pair, or None."""
+        positions = self.for_pair(token_a, token_b, owners)
+        return max(positions, key=lambda position: position["liquidity"], default=None)
+
+
+_position_index = None
+_position_index_lock = threading.Lock()
+
+
+def get_position_index():
+    """The shared index; created on first use (or at startup), which starts its backfill."""
+    global _position_index
+    with _position_index_lock:
+        if _position_index is None:
+            _position_index = PositionIndex()
+            _position_index.start_backfill()
+    return _position_index
+
+
+def position_owners(wallet_address):
+    """The holders whose positions are the wallet's (see `holder`)."""
+    return [wallet_address.lower()]
+
+
+def format_position(position):
+    token0 = token_registry.symbol_for_address(position["token0"] or "", position["token0"])
+    token1 = token_registry.symbol_for_address(position["token1"] or "", position["token1"])
+    return (f"#{position['token_id']}: {token0}/{token1}, fee {position['fee']}, "
+            f"ticks [{position['tick_lower']}, {position['tick_upper']}], liquidity {position['liquidity']}")
+
+
+def resolve_token_id(owner, token_id, tokenA_amount, tokenB_amount):
+    """
+    Pick the position to add to. Without a token ID this is the wallet's position with the most
+    liquidity for the token pair. Returns (token_id, error message).
+    """
+    index = get_position_index()
+    index.refresh()
+    (symbolA, _), (symbolB, _) = parse_token_amounts([tokenA_amount, tokenB_amount])
+    tokenA, tokenB = TOKENS[symbolA]['address'], TOKENS[symbolB]['address']
+    owners = position_owners(owner)
+
+    if token_id is None:
+        position = index.best_for_pair(tokenA, tokenB, owners)
+        if position is None:
+            if not index.caught_up:
+                return None, f"No {symbolA}/{symbolB} position found for this wallet yet{index.sync_note()}, or pass the token ID."
+            return None, f"No {symbolA}/{symbolB} position found for this wallet. Mint a new position instead."
+        return position["token_id"], None
+
+    position = index.get(token_id)
+    # An unknown ID may just be newer than the index; the dry run has the final say.
+    if position is not None:
+        if holder(position) not in owners:
+            return None, f"Position {token_id} is not owned by this wallet."
+        if position["token0"] and pair_key(position["token0"], position["token1"]) != pair_key(tokenA, tokenB):
+            return None, f"Position {token_id} is not a {symbolA}/{symbolB} position: {format_position(position)}."
+    return token_id, None
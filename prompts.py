@@ -0,0 +1,125 @@
+# prompts.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from langchain_core.messages import SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Providers only cache prefixes above a minimum size (Gemini's implicit caching starts at 1024 tokens).
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+# How long a cached prefix lives without being used again (Groq and Gemini keep them for minutes).
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", "300"))
+
+
+def estimate_tokens(text):
+    """Rough token count, 4 characters per token (as in history.py)."""
+    return len(text) // 4
+
+
+def prompt_version(*parts):
+    """Hash of a prefix's text and tool schemas; any edit gives a new version."""
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()[:12]
+
+
+def tool_schemas(tools):
+    """The tools as the JSON schemas sent with every call, in a stable order."""
+    return json.dumps([convert_to_openai_tool(tool) for tool in tools], sort_keys=True) if tools else ""
+
+
+class StaticPrefix:
+    """
+    The part of a prompt that is the same on every call: a system prompt and/or the tools bound
+    with it. Calls send it first and byte for byte identical, followed by the dynamic suffix (the
+    conversation), so providers that cache prompt prefixes implicitly can bill it as cached input after
+    the first call. Nothing here asks a provider to cache: requests are the same as without a prefix.
+    """
+
+    def __init__(self, name, text="", tools=()):
+        self.name = name
+        self.text = text
+        self.tools = list(tools)
+        self.schemas = tool_schemas(self.tools)
+        self.version = prompt_version(text, self.schemas)
+        # Built once; the id only identifies the version locally and is not sent to the provider.
+        self.message = SystemMessage(content=text, id=f"prefix-{name}-{self.version}") if text else None
+        self.bytes = len(text.encode()) + len(self.schemas.encode())
+        self.tokens = estimate_tokens(text) + estimate_tokens(self.schemas)
+
+    def assemble(self, messages):
+        """The static prefix followed by the dynamic suffix."""
+        return ([self.message] if self.message is not None else []) + list(messages)
+
+
+class PromptPrefixes:
+    """The static prefixes in use, by name, with their versions and sizes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prefixes = {}
+
+    def register(self, name, text="", tools=()):
+        prefix = StaticPrefix(name, text, tools)
+        with self.lock:
+            self.prefixes[name] = prefix
+        return prefix
+
+    def __getitem__(self, name):
+        return self.prefixes[name]
+
+    def versions(self, *names):
+        """Versions of the named prefixes, e.g. for keying caches of answers that depend on them."""
+        return [self.prefixes[name].version for name in names]
+
+    def summary(self):
+        with self.lock:
+            prefixes = sorted(self.prefixes.values(), key=lambda prefix: prefix.name)
+        if not prefixes:
+            return ""
+        return "Prompt prefixes (sent as plain leading messages, no provider caching API): " + ", ".join(
+            f"{prefix.name} {prefix.version[:8]} {prefix.bytes / 1024:.1f} KB (~{prefix.tokens} tokens)" for prefix in prefixes
+        )
+
+    def render(self):
+        """Prefix sizes in the Prometheus text format, labelled with their versions."""
+        lines = ["# HELP agent_prompt_prefix_bytes Size of each static prompt prefix (system prompt and tool schemas)",
+                 "# TYPE agent_prompt_prefix_bytes gauge"]
+        with self.lock:
+            for name, prefix in sorted(self.prefixes.items()):
+                lines.append(f'agent_prompt_prefix_bytes{{name="{name}",version="{prefix.version}"}} {prefix.bytes}')
+        return "\n".join(lines) + "\n"
+
+
+prompt_prefixes = PromptPrefixes()
+
+
+class LocalPrefixCache:
+    """
+    Local stand-in for a provider's prompt-prefix cache, used by the offline benchmark: the first
+    call with a prefix writes it, later calls within the TTL read it. `usage` returns input token
+    details shaped like a provider's, marked "simulated" so the ledger labels them as such; the
+    real providers receive unchanged requests and report only what their implicit caching does.
+    """
+
+    def __init__(self, min_tokens=PROMPT_CACHE_MIN_TOKENS, ttl=PROMPT_CACHE_TTL):
+        self.min_tokens = min_tokens
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # prefix hash -> last use
+        self.entries = {}
+
+    def usage(self, prefix):
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            return {}
+        key = hashlib.sha256(prefix.encode()).hexdigest()
+        now = time.monotonic()
+        with self.lock:
+            last = self.entries.get(key)
+            self.entries[key] = now
+        if last is not None and now - last <= self.ttl:
+            return {"cache_read": tokens, "simulated": True}
+        return {"cache_creation": tokens, "simulated": True}
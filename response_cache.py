@@ -0,0 +1,190 @@
+# response_cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+
+from router import BLOCKCHAIN_PATTERN, TWITTER_PATTERN
+
+# Anything that could lead to a state-changing tool call is never cached.
+ACTION_PATTERN = re.compile(
+    r"\b(swap|approve|send|buy|sell|stake|add|create|mint|increase|fetch|get|my|wallet|address|0x[0-9a-f]+)\b",
+    re.IGNORECASE,
+)
+# Questions about the current conversation have no reusable answer.
+CONTEXT_PATTERN = re.compile(r"\b(it|this|that|these|those|previous|last|above|again|just)\b", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Near-duplicate lookups need a real embedding model ("provider:model"); without one only the
+# normalized query matches. Bag-of-words similarity served the Uniswap answer for the same
+# question about Curve, and a wrong cached answer is worse than none.
+RESPONSE_CACHE_EMBEDDINGS = os.getenv("RESPONSE_CACHE_EMBEDDINGS", "")
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    query TEXT NOT NULL,
+    vector TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def prompt_version(*prompts):
+    """Hash of the prompts an answer depends on; editing a prompt invalidates its answers."""
+    return hashlib.sha256("\x00".join(prompts).encode()).hexdigest()[:16]
+
+
+def normalize_query(query):
+    return " ".join(WORD_PATTERN.findall(query.lower()))
+
+
+def _google_embeddings(model):
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(model=model).embed_query
+
+
+# Available embedding providers for similarity lookups.
+EMBEDDINGS = {
+    "google": _google_embeddings,
+}
+
+
+def get_embeddings(spec):
+    """The embedding function for "provider:model", or None for exact matching only."""
+    if not spec:
+        return None
+    provider, _, model = spec.partition(":")
+    if provider not in EMBEDDINGS:
+        raise ValueError(f'Unsupported embedding provider: "{provider}". Supported providers are {list(EMBEDDINGS.keys())}')
+    return EMBEDDINGS[provider](model)
+
+
+def is_cacheable(query):
+    return not (
+        TWITTER_PATTERN.search(query)
+        or BLOCKCHAIN_PATTERN.search(query)
+        or ACTION_PATTERN.search(query)
+        or CONTEXT_PATTERN.search(query)
+    )
+
+
+class ResponseCache:
+    """
+    Cache of informational answers (capabilities, general DeFi questions).
+
+    Lookups match the normalized query. With an `embed` function (a real embedding model), a
+    query that misses falls back to the closest cached query whose cosine similarity reaches
+    `similarity`. Entries expire after `ttl` seconds, the least recently used are evicted beyond
+    `max_entries`, and everything is persisted to a SQLite file.
+    """
+
+    def __init__(self, version, path="response_cache.sqlite", ttl=24 * 3600, max_entries=512,
+                 similarity=RESPONSE_CACHE_SIMILARITY, embed=None):
+        self.version = version
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.embed = embed
+        self.entries = OrderedDict()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None) if path else None
+        if self.conn is not None:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("DELETE FROM responses WHERE prompt_version != ?", (version,))
+            rows = self.conn.execute(
+                "SELECT key, query, vector, answer, created_at FROM responses ORDER BY created_at"
+            ).fetchall()
+            for key, query, vector, answer, created_at in rows:
+                self.entries[key] = (query, json.loads(vector), answer, created_at)
+
+    def _key(self, normalized):
+        return hashlib.sha256(f"{self.version}:{normalized}".encode()).hexdigest()
+
+    def _expired(self, created_at):
+        return time.time() - created_at > self.ttl
+
+    def _delete(self, key):
+        self.entries.pop(key, None)
+        if self.conn is not None:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _vector(self, normalized):
+        """Unit-length embedding of a query ([] without an embedding model)."""
+        if self.embed is None:
+            return []
+        vector = self.embed(normalized)
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def get(self, query):
+        if not is_cacheable(query):
+            return None
+        normalized = normalize_query(query)
+        key = self._key(normalized)
+
+        if key not in self.entries:
+            if self.embed is None:
+                return None
+            vector = self._vector(normalized)
+            best, best_score = None, self.similarity
+            for candidate, (_, candidate_vector, _, _) in self.entries.items():
+                score = sum(a * b for a, b in zip(vector, candidate_vector))
+                if score >= best_score:
+                    best, best_score = candidate, score
+            key = best
+        if key is None:
+            return None
+
+        _, _, answer, created_at = self.entries[key]
+        if self._expired(created_at):
+            self._delete(key)
+            return None
+        self.entries.move_to_end(key)
+        return answer
+
+    def put(self, query, answer):
+        if not is_cacheable(query):
+            return
+        normalized = normalize_query(query)
+        key = self._key(normalized)
+        vector = self._vector(normalized)
+        created_at = time.time()
+        self.entries[key] = (normalized, vector, answer, created_at)
+        self.entries.move_to_end(key)
+        if self.conn is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.version, normalized, json.dumps(vector), answer, created_at),
+            )
+        while len(self.entries) > self.max_entries:
+            self._delete(next(iter(self.entries)))
+
+    def remember(self, messages):
+        """
+        Store the answer of the latest turn if only the assistant replied to the user,
+        i.e. no worker agent (and therefore no tool) took part.
+        """
+        last_user = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].name == "User"), None)
+        if last_user is None:
+            return
+        replies = messages[last_user + 1:]
+        if replies and all(msg.name == "assistant_agent" for msg in replies):
+            self.put(messages[last_user].content, replies[-1].content)
+
+
+def get_response_cache(*prompts):
+    embed = get_embeddings(RESPONSE_CACHE_EMBEDDINGS)
+    return ResponseCache(
+        # Vectors from another embedding model are not comparable, so the model is part of the version.
+        version=prompt_version(*prompts, RESPONSE_CACHE_EMBEDDINGS),
+        path=os.getenv("RESPONSE_CACHE_DB", "response_cache.sqlite"),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600))),
+        embed=embed,
+    )
@@ -0,0 +1,97 @@
+# router.py
+
+import re
+from collections import Counter
+
+from tokens import token_registry
+
+# Keyword sets mirror the "Routing Rules" section of AGENT_CAPABILITIES in agent.py.
+TWITTER_KEYWORDS = ["tweet", "tweets", "post", "search", "lookup", "delete", "twitter"]
+BLOCKCHAIN_KEYWORDS = [
+    "deploy", "transfer", "balance", "deposit", "withdraw", "nft",
+    "liquidity", "mint", "approve", "faucet", "price", "positions?", "portfolio",
+]
+
+TWITTER_PATTERN = re.compile(r"\b(" + "|".join(TWITTER_KEYWORDS) + r")\b", re.IGNORECASE)
+BLOCKCHAIN_PATTERN = re.compile(r"\b(" + "|".join(BLOCKCHAIN_KEYWORDS) + r")\b", re.IGNORECASE)
+CONFIRMATION_PATTERN = re.compile(r"^\s*yes,?\s+please\b", re.IGNORECASE)
+
+# Only requests to do something are routed locally; "what is a liquidity pool?" or "how does
+# approve work?" go to the supervisor LLM, which can answer them without a worker.
+ACTION_LEAD = r"^\s*(?:please\s+)?(?:(?:can|could|would|will)\s+you\s+(?:please\s+)?|i\s*(?:want|would like|'d like|need)\s+to\s+|let'?s\s+)?"
+TWITTER_ACTION_PATTERN = re.compile(ACTION_LEAD + r"(tweet|post|search|look\s*up|find|delete)\b", re.IGNORECASE)
+BLOCKCHAIN_ACTION_PATTERN = re.compile(
+    ACTION_LEAD + r"(add|provide|create|open|mint|approve|increase|deposit|withdraw|transfer|send|deploy|request|"
+    r"get|fetch|check|show|list|collect|remove)\b",
+    re.IGNORECASE,
+)
+AMOUNT_PATTERN = re.compile(r"(?<![\w.])\d[\d,]*(?:\.\d+)?\b")
+WORD_PATTERN = re.compile(r"0x[0-9a-fA-F]{40}|\b[A-Za-z]{2,10}\b")
+
+# Only messages from these senders are routed locally. Replies from the worker agents
+# need the full history to decide between FINISH, a confirmation or the next worker.
+ROUTABLE_SENDERS = ("User", "assistant_agent")
+
+
+def names_amount_or_token(content):
+    """True when `content` has a number or a token the registry knows (symbol, alias or address)."""
+    if AMOUNT_PATTERN.search(content):
+        return True
+    return any(word.upper() == "ETH" or token_registry.symbol(word) for word in WORD_PATTERN.findall(content))
+
+
+def fast_route(messages):
+    """
+    Decide the next worker from keywords when the answer is unambiguous: a user request to do
+    something (with an amount or token, for the blockchain agent) or the assistant confirming
+    an action. Returns the worker name, or None when the supervisor LLM should decide.
+    """
+    if not messages:
+        return None
+
+    last = messages[-1]
+    if getattr(last, "name", None) not in ROUTABLE_SENDERS:
+        return None
+
+    content = last.content if isinstance(last.content, str) else ""
+    # The assistant only hands work back to a worker when it confirms an action.
+    if last.name == "assistant_agent" and not CONFIRMATION_PATTERN.match(content):
+        return None
+
+    wants_twitter = TWITTER_PATTERN.search(content) is not None
+    wants_blockchain = BLOCKCHAIN_PATTERN.search(content) is not None
+
+    # Requests touching both agents need the LLM to sequence the steps.
+    if wants_twitter == wants_blockchain:
+        return None
+    if last.name == "User":
+        if wants_twitter and not TWITTER_ACTION_PATTERN.match(content):
+            return None
+        if wants_blockchain and not (BLOCKCHAIN_ACTION_PATTERN.match(content) and names_amount_or_token(content)):
+            return None
+    return "twitter_agent" if wants_twitter else "blockchain_agent"
+
+
+class RouteStats:
+    """Counts supervisor hops settled by the fast path versus the LLM."""
+
+    def __init__(self):
+        self.hops = Counter()
+
+    def record(self, path):
+        self.hops[path] += 1
+
+    def reset(self):
+        self.hops.clear()
+
+    def summary(self):
+        fast = self.hops["fast"]
+        policy = self.hops["policy"]
+        llm = self.hops["llm"]
+        total = fast + policy + llm
+        if total == 0:
+            return "Routing: no supervisor hops"
+        return f"Routing: {total} hops, {fast} fast-path, {policy} policy, {llm} LLM ({(fast + policy) / total:.0%} saved)"
+
+
+route_stats = RouteStats()
@@ -0,0 +1,82 @@
+# rpc.py
+
+import itertools
+import json
+import os
+import urllib.request
+
+# Read-only JSON-RPC endpoint for Base Sepolia. Transactions still go through the CDP wallet.
+RPC_URL = os.getenv("RPC_URL", "https://sepolia.base.org")
+
+_ids = itertools.count(1)
+
+
+class RpcError(Exception):
+    def __init__(self, error):
+        self.code = error.get("code")
+        self.data = error.get("data")
+        super().__init__(error.get("message", str(error)))
+
+
+def _post(payload, url=None, timeout=10):
+    request = urllib.request.Request(
+        url or RPC_URL,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def rpc_call(method, params, url=None):
+    response = _post({"jsonrpc": "2.0", "id": next(_ids), "method": method, "params": params}, url)
+    if "error" in response:
+        raise RpcError(response["error"])
+    return response["result"]
+
+
+def block_number(url=None):
+    return int(rpc_call("eth_blockNumber", [], url), 16)
+
+
+def eth_call(to, data, block="latest", sender=None, url=None):
+    call = {"to": to, "data": data}
+    if sender:
+        call["from"] = sender
+    if isinstance(block, int):
+        block = hex(block)
+    return rpc_call("eth_call", [call, block], url)
+
+
+def get_code(address, block="latest", url=None):
+    if isinstance(block, int):
+        block = hex(block)
+    return rpc_call("eth_getCode", [address, block], url)
+
+
+def rpc_batch(calls, url=None):
+    """
+    Send several (method, params) calls in one JSON-RPC batch request.
+    Results come back in call order; a failed call yields an RpcError instead of raising.
+    """
+    if not calls:
+        return []
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    responses = {response["id"]: response for response in _post(payload, url)}
+    results = []
+    for i in range(len(calls)):
+        response = responses.get(i, {"error": {"message": "No response for batched call"}})
+        results.append(RpcError(response["error"]) if "error" in response else response["result"])
+    return results
+
+
+def get_logs(address, topics, from_block, to_block, url=None):
+    return rpc_call("eth_getLogs", [{
+        "address": address,
+        "topics": topics,
+        "fromBlock": hex(from_block),
+        "toBlock": hex(to_block),
+    }], url)
@@ -0,0 +1,126 @@
+# server.py
+
+import asyncio
+import json
+import os
+import uuid
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+
+from budget import turn_budget
+from models import model_ledger
+from prompts import prompt_prefixes
+from tracing import tracer
+
+# Graph runs allowed at once in this worker. LLM and chain calls are capped separately in limits.py.
+MAX_CONCURRENT_CONVERSATIONS = int(os.getenv("MAX_CONCURRENT_CONVERSATIONS", "64"))
+
+
+class ChatRequest(BaseModel):
+    message: str
+
+
+def serialize_update(update):
+    """Turn one `stream_mode="updates"` chunk into JSON-friendly events."""
+    events = []
+    for node, values in update.items():
+        if not values:
+            continue
+        for msg in values.get("messages", []):
+            events.append({"type": "message", "node": node, "name": msg.name, "content": msg.content})
+        if "next" in values:
+            events.append({"type": "route", "node": node, "next": values["next"]})
+    return events
+
+
+class SessionManager:
+    """Maps each client session to its own LangGraph thread and runs them concurrently."""
+
+    def __init__(self, graph, max_concurrent=MAX_CONCURRENT_CONVERSATIONS, tracer=tracer, budget=turn_budget):
+        self.graph = graph
+        self.tracer = tracer
+        self.budget = budget
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self._locks = {}
+
+    def new_session(self):
+        return uuid.uuid4().hex
+
+    def config(self, session_id):
+        return {"configurable": {"thread_id": session_id, "user_id": session_id}, "callbacks": [self.tracer, self.budget]}
+
+    async def run(self, session_id, message):
+        """Run one user message through the graph, yielding events as nodes finish."""
+        # Messages within a session run in order; different sessions run in parallel.
+        # session id -> [lock, runs holding or waiting for it]; dropped when the last run leaves.
+        entry = self._locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0], self.slots:
+                initial_message = HumanMessage(content=message, name="User")
+                async for update in self.graph.astream(
+                    {"messages": [initial_message]},
+                    config=self.config(session_id),
+                    stream_mode="updates",
+                ):
+                    for event in serialize_update(update):
+                        yield event
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(session_id, None)
+        yield {"type": "done"}
+
+
+def create_app(graph, max_concurrent=MAX_CONCURRENT_CONVERSATIONS):
+    app = FastAPI(title="DeFi Guru")
+    sessions = SessionManager(graph, max_concurrent)
+    app.state.sessions = sessions
+
+    @app.post("/sessions")
+    async def create_session():
+        return {"session_id": sessions.new_session()}
+
+    @app.post("/sessions/{session_id}/messages")
+    async def post_message(session_id: str, request: ChatRequest):
+        async def stream():
+            try:
+                async for event in sessions.run(session_id, request.message):
+                    yield json.dumps(event) + "\n"
+            except Exception as e:
+                yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(sessions.tracer.metrics.render() + sessions.budget.render() + model_ledger.render() + prompt_prefixes.render(), media_type="text/plain; version=0.0.4")
+
+    @app.websocket("/ws/{session_id}")
+    async def websocket_chat(websocket: WebSocket, session_id: str):
+        await websocket.accept()
+        try:
+            while True:
+                message = await websocket.receive_text()
+                try:
+                    async for event in sessions.run(session_id, message):
+                        await websocket.send_json(event)
+                except Exception as e:
+                    await websocket.send_json({"type": "error", "error": str(e)})
+        except WebSocketDisconnect:
+            pass
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    from agent import async_graph
+    from positions import get_position_index
+
+    # Start indexing positions before the first request needs them.
+    get_position_index()
+    uvicorn.run(create_app(async_graph), host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", "8000")))
@@ -0,0 +1,124 @@
+# simulation.py
+
+import re
+
+from abi import decode_revert
+from allowance import allowance_cache, wallet_address
+from contracts import erc20, liquidity_contract
+from helpers import parse_token_amounts, TOKENS, CONTRACTS
+from rpc import RpcError, eth_call
+
+# Revert reasons seen from the liquidity contract, the position manager and the tokens.
+REVERT_PATTERNS = [
+    ("missing_allowance", re.compile(r"allowance", re.IGNORECASE)),
+    ("insufficient_balance", re.compile(r"exceeds balance|insufficient balance", re.IGNORECASE)),
+    ("pool_exists", re.compile(r"already (exists|initiali[sz]ed)|pool exists", re.IGNORECASE)),
+    ("bad_token_id", re.compile(r"invalid token id|nonexistent token|not approved|not owner|owner query", re.IGNORECASE)),
+]
+
+
+class SimulationError:
+    """Why a transaction would revert, in a form the agent can act on."""
+
+    HINTS = {
+        "missing_allowance": "Approve {symbol} for the liquidity contract with approve_token, then try again.",
+        "insufficient_balance": "The wallet does not hold enough {symbol}. Use a smaller amount.",
+        "pool_exists": "A pool for this token pair already exists. Add to an existing position with increase_liquidity instead.",
+        "bad_token_id": "Position {token_id} does not exist or is not owned by this wallet. Use list_positions to find one the wallet owns.",
+        "reverted": "The transaction would revert. No transaction was sent.",
+    }
+
+    def __init__(self, code, reason, symbol=None, token_id=None):
+        self.code = code
+        self.reason = reason
+        self.symbol = symbol
+        self.token_id = token_id
+
+    @property
+    def hint(self):
+        return self.HINTS[self.code].format(symbol=self.symbol, token_id=self.token_id)
+
+    def __str__(self):
+        return f"[{self.code}] {self.hint} (revert reason: {self.reason})"
+
+
+def revert_reason(error):
+    """Extract the revert reason from an eth_call error, if the node reported one."""
+    data = error.data.get("data") if isinstance(error.data, dict) else error.data
+    reason = decode_revert(data) if isinstance(data, str) else None
+    if reason:
+        return reason
+    message = str(error)
+    return message.split("execution reverted:", 1)[1].strip() if "execution reverted:" in message else message
+
+
+def read_balance(token_address, owner):
+    return int(erc20.at(token_address).balanceOf(owner).call(), 16)
+
+
+def classify(reason, owner, amounts, token_id=None):
+    for code, pattern in REVERT_PATTERNS:
+        if pattern.search(reason):
+            return SimulationError(code, reason, token_id=token_id, symbol=_shortfall_symbol(code, owner, amounts))
+    # Uniswap's TransferHelper reverts with a bare "STF" for both a missing allowance and a
+    # missing balance, so look at both to tell which one it is.
+    if reason.strip() == "STF" or "transfer" in reason.lower():
+        try:
+            for symbol, amount_wei in amounts:
+                if read_balance(TOKENS[symbol]['address'], owner) < amount_wei:
+                    return SimulationError("insufficient_balance", reason, symbol=symbol)
+            for symbol, amount_wei in amounts:
+                allowance_cache.invalidate(TOKENS[symbol]['address'], owner)
+                if allowance_cache.get(TOKENS[symbol]['address'], owner) < amount_wei:
+                    return SimulationError("missing_allowance", reason, symbol=symbol)
+        except Exception:
+            pass
+    return SimulationError("reverted", reason, token_id=token_id)
+
+
+def _shortfall_symbol(code, owner, amounts):
+    """Name the token behind an allowance or balance error."""
+    try:
+        for symbol, amount_wei in amounts:
+            token_address = TOKENS[symbol]['address']
+            if code == "missing_allowance" and allowance_cache.get(token_address, owner) < amount_wei:
+                return symbol
+            if code == "insufficient_balance" and read_balance(token_address, owner) < amount_wei:
+                return symbol
+    except Exception:
+        pass
+    return " and ".join(symbol for symbol, _ in amounts) if code in ("missing_allowance", "insufficient_balance") else None
+
+
+def _simulate(wallet, data, amounts, token_id=None):
+    owner = wallet_address(wallet)
+    try:
+        eth_call(CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"], data, sender=owner)
+        return None
+    except RpcError as e:
+        if e.code == 3 or "revert" in str(e).lower():
+            return classify(revert_reason(e), owner, amounts, token_id)
+        print(f"⚠️ Simulation skipped: {str(e)}")
+        return None
+    except Exception as e:
+        # If the node cannot be reached, send the transaction as before.
+        print(f"⚠️ Simulation skipped: {str(e)}")
+        return None
+
+
+def simulate_mint_new_position(wallet, tokenA_amount, tokenB_amount):
+    """Dry-run mintNewPosition from the wallet; returns a SimulationError or None if it would succeed."""
+    amounts = parse_token_amounts([tokenA_amount, tokenB_amount])
+    (symbolA, amountA), (symbolB, amountB) = amounts
+    data = liquidity_contract.mintNewPosition(TOKENS[symbolA]['address'], TOKENS[symbolB]['address'], amountA, amountB).data
+    return _simulate(wallet, data, amounts)
+
+
+def simulate_increase_liquidity(wallet, token_id, tokenA_amount, tokenB_amount):
+    """Dry-run increaseLiquidityCurrentRange from the wallet; returns a SimulationError or None."""
+    amounts = parse_token_amounts([tokenA_amount, tokenB_amount])
+    (symbolA, amountA), (symbolB, amountB) = amounts
+    data = liquidity_contract.increaseLiquidityCurrentRange(
+        TOKENS[symbolA]['address'], TOKENS[symbolB]['address'], token_id, amountA, amountB
+    ).data
+    return _simulate(wallet, data, amounts, token_id)
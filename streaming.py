@@ -0,0 +1,108 @@
+# streaming.py
+
+from helpers import print_message_nicely
+
+STREAM_MODES = ["messages", "updates", "custom"]
+
+NODE_LABELS = {
+    "blockchain_agent": "⛓️  Blockchain Agent:",
+    "twitter_agent": "🐦  Twitter Agent:",
+    "assistant_agent": "🤖  Assistant Agent:",
+}
+
+TOOL_STATUS_ICONS = {
+    "submitted": "📤",
+    "waiting for confirmation": "⏳",
+    "confirmed": "✅",
+    "failed": "❌",
+}
+
+
+class StreamRenderer:
+    """
+    Renders a `graph.stream(..., stream_mode=STREAM_MODES, subgraphs=True)` run as it happens:
+    LLM tokens, routing decisions and tool progress events.
+    """
+
+    def __init__(self):
+        self.current_node = None
+        self.streamed_nodes = set()
+
+    def handle(self, namespace, mode, data):
+        if mode == "messages":
+            self._on_token(namespace, *data)
+        elif mode == "updates" and not namespace:
+            self._on_update(data)
+        elif mode == "custom":
+            self._on_progress(data)
+
+    @staticmethod
+    def _top_level_node(namespace, metadata):
+        # Subgraph events carry the parent node in the namespace, e.g. ("blockchain_agent:<task id>",).
+        if namespace:
+            return namespace[0].split(":")[0]
+        return metadata.get("langgraph_node")
+
+    def _on_token(self, namespace, chunk, metadata):
+        node = self._top_level_node(namespace, metadata)
+        # The supervisor streams structured-output JSON and tool results arrive as whole messages.
+        if node not in NODE_LABELS or chunk.type == "tool":
+            return
+        if not isinstance(chunk.content, str) or not chunk.content:
+            return
+        if node != self.current_node:
+            print("\n" + "-"*50)
+            print(NODE_LABELS[node])
+            print("   ", end="")
+            self.current_node = node
+        self.streamed_nodes.add(node)
+        print(chunk.content, end="", flush=True)
+
+    def _on_update(self, update):
+        for node, values in update.items():
+            if not values:
+                continue
+            if node == "supervisor":
+                self._end_block()
+                # Cached answers and budget stops end the turn with a message from the supervisor itself.
+                for msg in values.get("messages", []):
+                    print_message_nicely(msg)
+                print(f"\n➡️  Routing to {values.get('next')}...")
+                continue
+            # The join node only re-adds the branch messages that were shown as each branch finished.
+            if node == "join":
+                continue
+            if node in self.streamed_nodes:
+                # The tokens are already on screen; just close the block.
+                self._end_block()
+                self.streamed_nodes.discard(node)
+            else:
+                for msg in values.get("messages", []) + [result["message"] for result in values.get("results") or []]:
+                    print_message_nicely(msg)
+
+    def _on_progress(self, event):
+        if not isinstance(event, dict) or "tool" not in event:
+            return
+        self._end_block()
+        icon = TOOL_STATUS_ICONS.get(event["status"], "•")
+        detail = f" ({event['tx_hash']})" if event.get("tx_hash") else ""
+        print(f"   {icon} {event['tool']}: {event['status']}{detail}", flush=True)
+
+    def _end_block(self):
+        if self.current_node is not None:
+            print("\n" + "-"*50)
+            self.current_node = None
+
+
+def stream_conversation(graph, inputs, config):
+    """Run the graph and render its output as it streams."""
+    renderer = StreamRenderer()
+    for namespace, mode, data in graph.stream(inputs, config=config, stream_mode=STREAM_MODES, subgraphs=True):
+        renderer.handle(namespace, mode, data)
+
+
+async def astream_conversation(graph, inputs, config):
+    """Async counterpart of `stream_conversation`."""
+    renderer = StreamRenderer()
+    async for namespace, mode, data in graph.astream(inputs, config=config, stream_mode=STREAM_MODES, subgraphs=True):
+        renderer.handle(namespace, mode, data)
@@ -0,0 +1,69 @@
+import asyncio
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+import add_liquidity
+from simulation import SimulationError
+
+
+class RecordingManager:
+    """Stands in for the transaction manager and confirms every submission at once."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, submit_fn, *args):
+        self.submitted.append(submit_fn.__name__)
+        future = Future()
+        future.set_result(SimpleNamespace(transaction=SimpleNamespace(transaction_hash=f"0x{len(self.submitted):064x}")))
+        return future
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    manager = RecordingManager()
+    state = SimpleNamespace(manager=manager, pool="0xpool", simulations=[])
+
+    def simulate(wallet, tokenA_amount, tokenB_amount, token_id):
+        return state.simulations.pop(0) if state.simulations else None
+
+    monkeypatch.setattr(add_liquidity, "get_transaction_manager", lambda wallet: manager)
+    monkeypatch.setattr(add_liquidity, "wallet_address", lambda wallet: "0x" + "11" * 20)
+    monkeypatch.setattr(add_liquidity, "plan_approvals", lambda wallet, a, b: [("VED", 10 ** 20)])
+    monkeypatch.setattr(add_liquidity, "record_approvals", lambda wallet, approvals: None)
+    monkeypatch.setattr(add_liquidity, "spend_liquidity_allowances", lambda wallet, *amounts: None)
+    monkeypatch.setattr(add_liquidity, "get_pool_address", lambda a, b, fee: state.pool)
+    monkeypatch.setattr(add_liquidity, "resolve_token_id", lambda owner, token_id, a, b: (token_id, None))
+    monkeypatch.setattr(add_liquidity, "get_position_index", lambda: SimpleNamespace(get=lambda token_id: {"token_id": token_id}))
+    monkeypatch.setattr(add_liquidity, "simulate_liquidity", simulate)
+    return state
+
+
+def test_missing_pool_sends_no_approval(chain):
+    chain.pool = None
+    result = add_liquidity.add_liquidity(None, "1 VED", "10 STK")
+    assert "no VED/STK pool" in result
+    assert chain.manager.submitted == []
+
+
+def test_reverting_increase_sends_no_approval(chain):
+    chain.simulations = [SimulationError("bad_token_id", "Invalid token ID", token_id=35)]
+    result = add_liquidity.add_liquidity(None, "1 VED", "10 STK", token_id=35)
+    assert "bad_token_id" in result
+    assert chain.manager.submitted == []
+
+
+def test_missing_allowance_is_expected_before_the_approvals(chain):
+    chain.simulations = [SimulationError("missing_allowance", "STF", symbol="VED"), None]
+    result = add_liquidity.add_liquidity(None, "1 VED", "10 STK")
+    assert "New liquidity position created" in result
+    assert chain.manager.submitted == ["submit_approval", "submit_liquidity"]
+
+
+def test_async_path_checks_before_the_approvals(chain):
+    chain.pool = None
+    result = asyncio.run(add_liquidity.aadd_liquidity(None, "1 VED", "10 STK"))
+    assert "no VED/STK pool" in result
+    assert chain.manager.submitted == []
@@ -0,0 +1,17 @@
+from contracts import erc20, factory, pool_contract
+
+TOKEN = "0x134B005F1502dcfe95C8b50Bf2e38B446FE7b9cC"
+OWNER = "0x1111111111111111111111111111111111111111"
+
+
+def test_at_reuses_the_binding_for_an_address():
+    assert erc20.at(TOKEN) is erc20.at(TOKEN.lower())
+    assert erc20.at(TOKEN).address == TOKEN
+    assert erc20.at(OWNER) is not erc20.at(TOKEN)
+
+
+def test_calls_encode_standard_selectors():
+    assert erc20.at(TOKEN).balanceOf(OWNER).data == "0x70a08231" + "0" * 24 + OWNER[2:]
+    assert factory.getPool(TOKEN, OWNER, 3000).data.startswith("0x1698ee82")
+    # int24 arguments are two's complement words.
+    assert pool_contract.ticks(-600).data == "0xf30dba93" + format(-600 % (1 << 256), "064x")
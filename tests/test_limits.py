@@ -0,0 +1,41 @@
+import asyncio
+
+from limits import LoopSemaphore
+
+
+def test_slots_work_across_separate_event_loops():
+    slots = LoopSemaphore(2)
+
+    async def hold():
+        async with slots():
+            await asyncio.sleep(0)
+        return slots()
+
+    async def contend():
+        # More waiters than slots, so the semaphore has to park and wake them.
+        return await asyncio.gather(*(hold() for _ in range(5)))
+
+    first = asyncio.run(contend())
+    second = asyncio.run(contend())
+    assert len(set(map(id, first))) == 1
+    assert first[0] is not second[0]
+    assert second[0]._value == 2
+
+
+def test_slots_cap_concurrency_within_a_loop():
+    slots = LoopSemaphore(3)
+    running = peak = 0
+
+    async def work():
+        nonlocal running, peak
+        async with slots():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(10)))
+
+    asyncio.run(main())
+    assert peak == 3
@@ -0,0 +1,69 @@
+import asyncio
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from models import ModelLedger, TieredChatModel
+from prompts import LocalPrefixCache
+
+
+class Counter(BaseCallbackHandler):
+    def __init__(self):
+        self.runs = 0
+        self.tokens = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.runs += 1
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+
+MESSAGES = [HumanMessage(content="hi")]
+
+
+def tiered():
+    inner = GenericFakeChatModel(messages=iter([AIMessage(content="one two three")] * 4))
+    return TieredChatModel(role="agent", names=["fake:model"], models=[inner], ledger=ModelLedger())
+
+
+# Graph nodes call the model with their config in the context, the way these lambdas do.
+def test_invoke_in_a_node_is_one_llm_run():
+    model, counter = tiered(), Counter()
+    message = RunnableLambda(lambda messages: model.invoke(messages)).invoke(MESSAGES, config={"callbacks": [counter]})
+    assert message.content == "one two three"
+    assert counter.runs == 1
+
+
+def test_stream_in_a_node_emits_each_token_once():
+    model, counter = tiered(), Counter()
+    node = RunnableLambda(lambda messages: "".join(chunk.content for chunk in model.stream(messages)))
+    assert node.invoke(MESSAGES, config={"callbacks": [counter]}) == "one two three"
+    assert counter.runs == 1
+    assert "".join(counter.tokens) == "one two three"
+
+
+def test_async_calls_in_a_node_are_one_llm_run_each():
+    model, counter = tiered(), Counter()
+
+    async def node(messages):
+        await model.ainvoke(messages)
+        return "".join([chunk.content async for chunk in model.astream(messages)])
+
+    assert asyncio.run(RunnableLambda(node).ainvoke(MESSAGES, config={"callbacks": [counter]})) == "one two three"
+    assert counter.runs == 2
+    assert "".join(counter.tokens) == "one two three"
+
+
+def test_ledger_labels_simulated_cache_reads():
+    cache = LocalPrefixCache(min_tokens=1)
+    ledger = ModelLedger()
+    for _ in range(2):
+        ledger.record("agent", "google:gemini-2.0-flash", 0.01, {"input_tokens": 100, "input_token_details": cache.usage("x" * 200)})
+    ledger.record("router", "google:gemini-2.0-flash-lite", 0.01, {"input_tokens": 100, "input_token_details": {"cache_read": 40}})
+    summary = ledger.summary()
+    assert "(50 cached, simulated)" in summary
+    assert "(40 cached)" in summary
+    assert 'agent_model_simulated_cached_tokens_total{role="agent",model="google:gemini-2.0-flash"} 50' in ledger.render()
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from langchain_core.messages import HumanMessage
+
+from policy import ConfirmationPolicy
+
+
+def ask(question):
+    return [HumanMessage(content="Add liquidity for me.", name="User"),
+            HumanMessage(content=question, name="blockchain_agent")]
+
+
+def test_amounts_keep_tokens_without_a_threshold():
+    policy = ConfirmationPolicy()
+    assert policy.amounts("5 WETH and 10 STK in the 3000 fee tier") == [("WETH", Decimal(5)), ("STK", Decimal(10))]
+
+
+def test_amounts_skip_token_ids_and_words():
+    policy = ConfirmationPolicy()
+    assert policy.amounts("increase liquidity for token ID 35 with 100 VED and 10,000 STK?") == [
+        ("VED", Decimal(100)), ("STK", Decimal(10000)),
+    ]
+    assert policy.amounts("add liquidity to position 4 using 1 VED and 10 STK?") == [("VED", Decimal(1)), ("STK", Decimal(10))]
+    assert policy.amounts("transfer 0.001 ETH to 0xabc") == [("ETH", Decimal("0.001"))]
+    assert policy.amounts("5 stake and 2 0x0C0Db17101D6b1Db59E16b05f648D74f0Abc743a") == [("STK", Decimal(5)), ("VED", Decimal(2))]
+
+
+def test_unknown_token_amount_is_asked_about():
+    policy = ConfirmationPolicy()
+    assert policy.verdict("add_liquidity", [("STK", Decimal(10))]) == "confirm"
+    assert policy.verdict("add_liquidity", [("WETH", Decimal(5)), ("STK", Decimal(10))]) == "ask"
+
+    decision = policy.decide(ask("Do you want me to add liquidity with 5 WETH and 10 STK?"))
+    assert decision.goto is None
+    assert decision.rule == "ask:add_liquidity"
+
+
+def test_liquidity_on_an_existing_position_is_confirmed():
+    policy = ConfirmationPolicy()
+    decision = policy.decide(ask("Do you want me to increase liquidity for token ID 35 with 100 VED and 10,000 STK?"))
+    assert decision.rule == "confirm:increase_liquidity"
+    decision = policy.decide(ask("Do you want me to add liquidity to position 4 using 1 VED and 10 STK?"))
+    assert decision.rule == "confirm:add_liquidity"
+
+
+def test_known_amounts_within_thresholds_are_confirmed():
+    decision = ConfirmationPolicy().decide(ask("Do you want me to add liquidity with 5 VED and 10 STK?"))
+    assert decision.goto == "blockchain_agent"
+    assert decision.rule == "confirm:add_liquidity"
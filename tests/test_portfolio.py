@@ -0,0 +1,69 @@
+import pytest
+
+import portfolio
+from abi import decode_words
+from contracts import pool_contract
+from multicall import ReadAggregator
+from pools import SLOT0_CALL
+from rpc import RpcError
+from v3math import Q128, get_sqrt_ratio_at_tick
+
+POOL = "0x00000000000000000000000000000000000000aa"
+OWNER = "0x1111111111111111111111111111111111111111"
+POSITION = {"token_id": 7, "owner": OWNER, "token0": "0x" + "0b" * 20, "token1": "0x" + "0c" * 20,
+            "fee": 3000, "tick_lower": -600, "tick_upper": 600, "liquidity": 10 ** 18}
+
+
+def word(value):
+    return format(value % (1 << 256), "064x")
+
+
+def test_uncollected_fees_include_growth_since_last_checkpoint():
+    liquidity = 10 ** 18
+    # positions(): nonce, operator, token0, token1, fee, tickLower, tickUpper, liquidity,
+    # feeGrowthInside0LastX128, feeGrowthInside1LastX128, tokensOwed0, tokensOwed1
+    words = [0, 0, 0, 0, 3000, -600 % (1 << 256), 600, liquidity, 5 * Q128, 0, 100, 200]
+    answers = {
+        (POOL, SLOT0_CALL): "0x" + word(get_sqrt_ratio_at_tick(0)) + word(0),
+        (POOL, pool_contract.feeGrowthGlobal0X128().data): "0x" + word(8 * Q128),
+        (POOL, pool_contract.feeGrowthGlobal1X128().data): "0x" + word(3 * Q128),
+        # ticks(): liquidityGross, liquidityNet, feeGrowthOutside0X128, feeGrowthOutside1X128
+        (POOL, pool_contract.ticks(-600).data): "0x" + word(1) + word(1) + word(Q128) + word(Q128),
+        (POOL, pool_contract.ticks(600).data): "0x" + word(1) + word(1) + word(Q128) + word(0),
+    }
+
+    fees0, fees1 = portfolio.uncollected_fees(words, POOL, answers)
+
+    # Inside growth is global - below - above: 8 - 1 - 1 = 6 and 3 - 1 - 0 = 2 per unit of liquidity.
+    assert fees0 == 100 + (6 - 5) * liquidity
+    assert fees1 == 200 + 2 * liquidity
+
+
+def test_uncollected_fees_unavailable_without_pool_data():
+    words = [0, 0, 0, 0, 3000, 0, 600, 1, 0, 0, 100, 200]
+    assert portfolio.uncollected_fees(words, POOL, {}) == (None, None)
+
+
+def test_multicall_missing_falls_back_to_batch(monkeypatch):
+    monkeypatch.setattr("multicall.eth_call", lambda to, data, *args, **kwargs: "0x")
+    monkeypatch.setattr("multicall.rpc_batch", lambda calls: ["0x10"] + ["0x" + word(42)] * (len(calls) - 1))
+    reader = ReadAggregator(mode="multicall")
+
+    results, block = reader.read([(POOL, SLOT0_CALL)])
+
+    assert block == 16
+    assert decode_words(results[0]) == [42]
+    assert reader.mode == "batch"
+
+
+def test_transient_multicall_errors_keep_the_multicall_mode(monkeypatch):
+    def eth_call(to, data, *args, **kwargs):
+        raise RpcError({"code": 429, "message": "rate limited"})
+
+    monkeypatch.setattr("multicall.eth_call", eth_call)
+    monkeypatch.setattr("multicall.rpc_batch", lambda calls: pytest.fail("fell back to a batch"))
+    reader = ReadAggregator(mode="multicall")
+
+    with pytest.raises(RpcError):
+        reader.read([(POOL, SLOT0_CALL)])
+    assert reader.mode == "multicall"
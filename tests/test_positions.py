@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import positions
+from helpers import CONTRACTS, TOKENS
+from positions import PositionIndex, find_deploy_block, position_owners
+
+LOGS_FILE = os.path.join(os.path.dirname(__file__), "data", "position_logs.json")
+SENDERS_FILE = os.path.join(os.path.dirname(__file__), "data", "position_senders.json")
+WALLET = "0x1111111111111111111111111111111111111111"
+OTHER = "0x2222222222222222222222222222222222222222"
+LATEST = 20_040_000
+DEPLOY_BLOCK = 20_000_000
+
+
+class RecordedChain:
+    """Serves recorded position manager logs by block range, like eth_getLogs."""
+
+    def __init__(self):
+        with open(LOGS_FILE) as f:
+            self.logs = json.load(f)
+        with open(SENDERS_FILE) as f:
+            self.senders = json.load(f)
+        self.ranges = []
+        self.positions_read = []
+        self.sender_lookups = []
+
+    def fetch_logs(self, from_block, to_block):
+        self.ranges.append((from_block, to_block))
+        return [log for log in self.logs if from_block <= int(log["blockNumber"], 16) <= to_block]
+
+    def read_senders(self, tx_hashes):
+        self.sender_lookups.append(tx_hashes)
+        return {tx_hash: self.senders[tx_hash] for tx_hash in tx_hashes if tx_hash in self.senders}
+
+    def read_position(self, token_id):
+        self.positions_read.append(token_id)
+        return {"token0": TOKENS["STK"]["address"].lower(), "token1": TOKENS["VED"]["address"].lower(),
+                "fee": 3000, "tick_lower": -600, "tick_upper": 600}
+
+
+@pytest.fixture
+def chain():
+    return RecordedChain()
+
+
+def make_index(path, chain, **kwargs):
+    kwargs.setdefault("find_start_block", lambda latest: DEPLOY_BLOCK)
+    return PositionIndex(path=str(path), fetch_logs=chain.fetch_logs, read_position=chain.read_position,
+                         read_senders=chain.read_senders, latest_block=lambda: LATEST, **kwargs)
+
+
+def test_sync_builds_positions_from_recorded_logs(tmp_path, chain):
+    index = make_index(tmp_path / "positions.sqlite", chain)
+    index.sync()
+
+    # Minted through the liquidity contract: +1000 +500 -300, held for the wallet that sent the mint.
+    assert index.get(1)["owner"] == CONTRACTS["UNISWAP_V3_LIQUIDITY_CONTRACT"].lower()
+    assert index.get(1)["depositor"] == WALLET
+    assert index.get(1)["liquidity"] == 1200
+    # Transferred to another wallet, and burned.
+    assert index.get(2)["owner"] == OTHER
+    assert index.get(3) is None
+
+    owned = [position["token_id"] for position in index.by_owners(*position_owners(WALLET))]
+    assert owned == [1, 4]
+    best = index.best_for_pair(TOKENS["VED"]["address"], TOKENS["STK"]["address"], position_owners(WALLET))
+    assert best["token_id"] == 4
+    # Another wallet's position in the same contract is not this wallet's.
+    assert [position["token_id"] for position in index.by_owners(*position_owners(OTHER))] == [2, 5]
+    # The pair is read once per surviving new position, never for the burned one.
+    assert sorted(chain.positions_read) == [1, 2, 4, 5]
+    # Only mints into the liquidity contract need their sender.
+    assert sorted(tx_hash for lookup in chain.sender_lookups for tx_hash in lookup) == sorted(chain.senders)
+
+
+def test_sync_starts_at_deploy_block_in_chunks(tmp_path, chain, monkeypatch):
+    monkeypatch.setattr(positions, "POSITION_INDEX_CHUNK", 10_000)
+    index = make_index(tmp_path / "positions.sqlite", chain)
+    index.sync()
+
+    assert chain.ranges[0] == (DEPLOY_BLOCK, DEPLOY_BLOCK + 9_999)
+    assert chain.ranges[-1][1] == LATEST
+    assert all(end - start < 10_000 for start, end in chain.ranges)
+    assert index.last_block == LATEST
+
+
+def test_resync_reads_only_new_blocks_and_reloads_from_disk(tmp_path, chain):
+    path = tmp_path / "positions.sqlite"
+    make_index(path, chain).sync(to_block=20_010_000)
+
+    reloaded = make_index(path, chain, find_start_block=lambda latest: pytest.fail("start block looked up again"))
+    assert reloaded.get(1)["liquidity"] == 1000
+    chain.ranges.clear()
+    reloaded.sync()
+
+    assert chain.ranges[0][0] == 20_010_001
+    assert reloaded.get(1)["liquidity"] == 1200
+    assert reloaded.get(2)["owner"] == OTHER
+
+
+def test_sync_reads_at_most_max_chunks(tmp_path, chain, monkeypatch):
+    monkeypatch.setattr(positions, "POSITION_INDEX_CHUNK", 10_000)
+    index = make_index(tmp_path / "positions.sqlite", chain)
+
+    assert index.sync(max_chunks=2) is False
+    assert chain.ranges == [(DEPLOY_BLOCK, DEPLOY_BLOCK + 9_999), (DEPLOY_BLOCK + 10_000, DEPLOY_BLOCK + 19_999)]
+    assert not index.caught_up
+    assert "still syncing" in index.sync_note()
+
+
+def test_refresh_hands_a_long_catch_up_to_the_backfill(tmp_path, chain, monkeypatch):
+    monkeypatch.setattr(positions, "POSITION_INDEX_CHUNK", 1_000)
+    monkeypatch.setattr(positions, "POSITION_INDEX_MAX_CHUNKS", 3)
+    index = make_index(tmp_path / "positions.sqlite", chain)
+    started = []
+    monkeypatch.setattr(index, "start_backfill", lambda: started.append(True))
+
+    index.refresh()
+
+    assert len(chain.ranges) == 3
+    assert started == [True]
+
+
+def test_backfill_catches_up_in_the_background(tmp_path, chain, monkeypatch):
+    monkeypatch.setattr(positions, "POSITION_INDEX_CHUNK", 1_000)
+    monkeypatch.setattr(positions, "POSITION_INDEX_MAX_CHUNKS", 3)
+    index = make_index(tmp_path / "positions.sqlite", chain)
+
+    index.start_backfill().join(timeout=10)
+
+    assert index.caught_up
+    assert index.last_block == LATEST
+    assert index.sync_note() == ""
+    assert index.get(1)["liquidity"] == 1200
+
+
+def test_index_without_depositors_is_rebuilt(tmp_path, chain):
+    path = tmp_path / "positions.sqlite"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE positions (token_id INTEGER PRIMARY KEY, owner TEXT NOT NULL, token0 TEXT, token1 TEXT,
+            fee INTEGER, tick_lower INTEGER, tick_upper INTEGER, liquidity TEXT NOT NULL, updated_block INTEGER NOT NULL);
+        CREATE TABLE position_index_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        INSERT INTO position_index_meta VALUES ('last_block', '20030000');
+    """)
+    conn.close()
+
+    index = make_index(path, chain)
+
+    assert index.last_block is None
+    index.sync()
+    assert index.get(1)["depositor"] == WALLET
+
+
+def test_find_deploy_block_binary_searches_code():
+    calls = []
+
+    def get_code(address, block):
+        calls.append(block)
+        return "0x6080" if block >= DEPLOY_BLOCK else "0x"
+
+    assert find_deploy_block(positions.POSITION_MANAGER, LATEST, get_code=get_code) == DEPLOY_BLOCK
+    assert len(calls) <= 26
+
+
+def test_find_deploy_block_errs_towards_earlier_blocks():
+    def get_code(address, block):
+        if block < 15_000_000:
+            raise RuntimeError("missing trie node")
+        return "0x6080" if block >= DEPLOY_BLOCK else "0x"
+
+    assert find_deploy_block(positions.POSITION_MANAGER, LATEST, get_code=get_code) <= DEPLOY_BLOCK
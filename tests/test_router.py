@@ -0,0 +1,48 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from router import fast_route
+
+
+def route(content, name="User"):
+    return fast_route([HumanMessage(content=content, name=name)])
+
+
+@pytest.mark.parametrize("content", [
+    "approve 100 STK",
+    "Create a new liquidity position with 1 VED and 10 STK",
+    "Can you approve 50 STK?",
+    "I want to provide liquidity with my STK soon.",
+    "Fetch the price of ETH",
+    "increase liquidity of position 4 with 10 stake",
+])
+def test_blockchain_actions_take_the_fast_route(content):
+    assert route(content) == "blockchain_agent"
+
+
+@pytest.mark.parametrize("content", ["Post a tweet about DeFi", "search recent tweets about DeFi", "delete tweet 123"])
+def test_twitter_actions_take_the_fast_route(content):
+    assert route(content) == "twitter_agent"
+
+
+@pytest.mark.parametrize("content", [
+    "what is a liquidity pool?",
+    "how does approve work?",
+    "What is the price of ETH?",
+    "Explain how my positions earn fees",
+    # An action without an amount or token is left to the supervisor.
+    "Show my portfolio",
+    # Both agents: the supervisor sequences the steps.
+    "Create a new liquidity position with 1 VED and 10 STK, then post a tweet about it.",
+])
+def test_questions_and_ambiguous_requests_go_to_the_llm(content):
+    assert route(content) is None
+
+
+def test_assistant_confirmations_route_by_keyword():
+    assert route("Yes, please approve the tokens.", name="assistant_agent") == "blockchain_agent"
+    assert route("The approval is done.", name="assistant_agent") is None
+
+
+def test_worker_replies_go_to_the_llm():
+    assert fast_route([AIMessage(content="approve 100 STK", name="blockchain_agent")]) is None
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from helpers import parse_token_amounts
+import multicall
+from tokens import TOKEN_CACHE_DB, TOKEN_REGISTRY_FILE, TokenRegistry, decode_symbol, read_token_metadata
+
+UNKNOWN = "0x" + "ab" * 20
+
+
+def test_parse_token_amounts_converts_to_wei_in_order():
+    assert parse_token_amounts(["1,000,000 STK", "0.5 ved", "2 STAKE"]) == [
+        ("STK", 10 ** 24), ("VED", 5 * 10 ** 17), ("STK", 2 * 10 ** 18),
+    ]
+
+
+def test_parse_token_amounts_rejects_unknown_symbols():
+    with pytest.raises(ValueError, match="Unsupported token symbol"):
+        parse_token_amounts(["5 STK", "5 NOPE"])
+
+
+def test_cache_file_created_only_when_a_token_is_loaded(tmp_path):
+    cache_path = str(tmp_path / "tokens.sqlite")
+    reads = []
+
+    def read_metadata(address):
+        reads.append(address)
+        return "NEW", 6
+
+    registry = TokenRegistry(TOKEN_REGISTRY_FILE, cache_path, read_metadata)
+    assert registry.resolve("STK") == "STK"
+    assert not os.path.exists(cache_path)
+
+    assert registry.resolve(UNKNOWN) == "NEW"
+    assert os.path.exists(cache_path)
+
+    reloaded = TokenRegistry(TOKEN_REGISTRY_FILE, cache_path, read_metadata)
+    assert reloaded.resolve(UNKNOWN) == "NEW"
+    assert reloaded.tokens["NEW"]["decimals"] == 6
+    assert reads == [UNKNOWN]
+
+
+def encode_string(text):
+    data = text.encode().hex()
+    return "0x" + format(32, "064x") + format(len(text), "064x") + data.ljust(-(-len(data) // 64) * 64, "0")
+
+
+class FakeReader:
+    def __init__(self, results):
+        self.results = results
+
+    def read(self, calls):
+        return self.results, None
+
+
+def test_cache_db_defaults_next_to_the_module():
+    if "TOKEN_CACHE_DB" not in os.environ:
+        assert os.path.dirname(TOKEN_CACHE_DB) == os.path.dirname(TOKEN_REGISTRY_FILE)
+
+
+def test_decode_symbol_reads_strings_and_bytes32():
+    assert decode_symbol(encode_string("STK")) == "STK"
+    assert decode_symbol("0x" + b"MKR".hex().ljust(64, "0")) == "MKR"
+
+
+@pytest.mark.parametrize("data", ["0x", "", "0x1234", "0x" + "00" * 40, encode_string("STK")[:-64]])
+def test_decode_symbol_returns_none_for_short_data(data):
+    assert decode_symbol(data) is None
+
+
+@pytest.mark.parametrize("symbol, decimals", [("0x", "0x" + format(18, "064x")), (encode_string("STK"), "0x"), (None, None)])
+def test_read_token_metadata_rejects_empty_results(monkeypatch, symbol, decimals):
+    monkeypatch.setattr(multicall, "reader", FakeReader([symbol, decimals]))
+    with pytest.raises(ValueError, match="does not look like an ERC20 token"):
+        read_token_metadata(UNKNOWN)
+
+
+def test_read_token_metadata_decodes_symbol_and_decimals(monkeypatch):
+    monkeypatch.setattr(multicall, "reader", FakeReader([encode_string("NEW"), "0x" + format(6, "064x")]))
+    assert read_token_metadata(UNKNOWN) == ("NEW", 6)
@@ -0,0 +1,137 @@
+from decimal import Decimal, getcontext
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from v3math import (
+    MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, Q96, Q128, Q256, fee_growth_inside, fees_owed,
+    get_amounts_for_liquidity, get_liquidity_for_amounts, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio,
+    quote_deposit,
+)
+
+MAX_UINT256 = Q256 - 1
+
+
+def encode_price_sqrt(reserve1, reserve0):
+    """floor(sqrt(reserve1 / reserve0) * 2**96), as the Uniswap test utilities compute it."""
+    getcontext().prec = 100
+    return int((Decimal(reserve1) / Decimal(reserve0)).sqrt() * Q96)
+
+
+# TickMath (v3-core TickMath.spec)
+
+def test_sqrt_ratio_at_the_tick_bounds():
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO == 4295128739
+    assert get_sqrt_ratio_at_tick(MIN_TICK + 1) == 4295343490
+    assert get_sqrt_ratio_at_tick(0) == Q96
+    assert get_sqrt_ratio_at_tick(MAX_TICK - 1) == 1461373636630004318706518188784493106690254656249
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+
+
+def test_tick_at_the_sqrt_ratio_bounds():
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK
+    assert get_tick_at_sqrt_ratio(4295343490) == MIN_TICK + 1
+    assert get_tick_at_sqrt_ratio(1461373636630004318706518188784493106690254656249) == MAX_TICK - 1
+    assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+
+
+@pytest.mark.parametrize("tick", [MIN_TICK + 1, -887200, -50000, -60, -1, 0, 1, 60, 50000, 887200, MAX_TICK - 1])
+def test_tick_round_trip(tick):
+    sqrt_ratio = get_sqrt_ratio_at_tick(tick)
+    assert get_tick_at_sqrt_ratio(sqrt_ratio) == tick
+    # Just below a tick's ratio is still the tick before it.
+    assert get_tick_at_sqrt_ratio(sqrt_ratio - 1) == tick - 1
+
+
+def test_tick_math_broadcasts_over_arrays():
+    ticks = np.array([MIN_TICK, -60, 0, 60, MAX_TICK])
+    ratios = get_sqrt_ratio_at_tick(ticks)
+    assert list(ratios) == [get_sqrt_ratio_at_tick(int(tick)) for tick in ticks]
+    assert list(get_tick_at_sqrt_ratio(ratios[:-1])) == [MIN_TICK, -60, 0, 60]
+
+
+def test_tick_math_rejects_out_of_range_values():
+    with pytest.raises(ValueError):
+        get_sqrt_ratio_at_tick(MAX_TICK + 1)
+    with pytest.raises(ValueError):
+        get_sqrt_ratio_at_tick(MIN_TICK - 1)
+    with pytest.raises(ValueError):
+        get_tick_at_sqrt_ratio(MAX_SQRT_RATIO)
+    with pytest.raises(ValueError):
+        get_tick_at_sqrt_ratio(MIN_SQRT_RATIO - 1)
+
+
+# LiquidityAmounts (v3-periphery LiquidityAmounts.spec)
+
+LOWER = encode_price_sqrt(100, 110)
+UPPER = encode_price_sqrt(110, 100)
+
+
+@pytest.mark.parametrize("sqrt_price, liquidity", [
+    (encode_price_sqrt(1, 1), 2148),      # inside the range
+    (encode_price_sqrt(99, 110), 1048),   # below: only token0 counts
+    (encode_price_sqrt(111, 100), 2097),  # above: only token1 counts
+    (LOWER, 1048),                        # at the lower bound
+    (UPPER, 2097),                        # at the upper bound
+])
+def test_liquidity_for_amounts(sqrt_price, liquidity):
+    assert get_liquidity_for_amounts(sqrt_price, LOWER, UPPER, 100, 200) == liquidity
+    # The bounds may come in either order.
+    assert get_liquidity_for_amounts(sqrt_price, UPPER, LOWER, 100, 200) == liquidity
+
+
+@pytest.mark.parametrize("sqrt_price, liquidity, amounts", [
+    (encode_price_sqrt(1, 1), 2148, (99, 99)),
+    (encode_price_sqrt(99, 110), 1048, (99, 0)),
+    (encode_price_sqrt(111, 100), 2097, (0, 199)),
+    (LOWER, 1048, (99, 0)),
+    (UPPER, 2097, (0, 199)),
+])
+def test_amounts_for_liquidity(sqrt_price, liquidity, amounts):
+    assert get_amounts_for_liquidity(sqrt_price, LOWER, UPPER, liquidity) == amounts
+
+
+def test_amounts_round_down_for_holdings_and_up_for_deposits():
+    sqrt_price, liquidity = encode_price_sqrt(1, 1), 2148
+    exact0 = Fraction(liquidity * Q96 * (UPPER - sqrt_price), UPPER * sqrt_price)
+    exact1 = Fraction(liquidity * (sqrt_price - LOWER), Q96)
+    down = get_amounts_for_liquidity(sqrt_price, LOWER, UPPER, liquidity)
+    up = get_amounts_for_liquidity(sqrt_price, LOWER, UPPER, liquidity, round_up=True)
+    assert down == (exact0.__floor__(), exact1.__floor__())
+    assert up == (exact0.__ceil__(), exact1.__ceil__())
+    assert up == (down[0] + 1, down[1] + 1)
+
+
+def test_quote_deposit_never_pulls_more_than_offered():
+    quote = quote_deposit(Q96, -600, 600, 10 ** 18, 10 ** 18)
+    assert 0 <= quote["amount0"] <= 10 ** 18 and 0 <= quote["amount1"] <= 10 ** 18
+    assert quote["refund0"] == 10 ** 18 - quote["amount0"]
+    assert min(quote["refund0"], quote["refund1"]) <= 1
+
+
+# Fee growth (v3-core Tick.spec getFeeGrowthInside, Position.update)
+
+def test_fee_growth_inside_for_uninitialized_ticks():
+    assert fee_growth_inside(0, -2, 2, 15, 0, 0) == 15
+    assert fee_growth_inside(4, -2, 2, 15, 0, 0) == 0
+    assert fee_growth_inside(-4, -2, 2, 15, 0, 0) == 0
+
+
+def test_fee_growth_inside_subtracts_the_outside_growth():
+    # Upper tick initialized with outside growth (2, 3): 15 - 2 and 15 - 3.
+    assert fee_growth_inside(0, -2, 2, 15, 0, 2) == 13
+    assert fee_growth_inside(0, -2, 2, 15, 0, 3) == 12
+
+
+def test_fee_growth_inside_wraps_around_on_underflow():
+    assert fee_growth_inside(0, -2, 2, 15, MAX_UINT256 - 3, 3) == 16
+    assert fee_growth_inside(0, -2, 2, 15, MAX_UINT256 - 2, 5) == 13
+
+
+def test_fees_owed_across_a_wrapped_fee_growth():
+    liquidity = 10 ** 18
+    assert fees_owed(liquidity, 5 * Q128, 3 * Q128) == 2 * liquidity
+    # Growth inside passed 2**256 since the last checkpoint.
+    assert fees_owed(liquidity, Q128, Q256 - Q128) == 2 * liquidity
+    assert fees_owed(liquidity, 7, 7) == 0
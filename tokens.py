@@ -0,0 +1,121 @@
+# tokens.py
+
+import json
+import os
+import sqlite3
+import threading
+
+# Known tokens, edited by hand; tokens met on-chain are cached in TOKEN_CACHE_DB.
+TOKEN_REGISTRY_FILE = os.getenv("TOKEN_REGISTRY_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tokens.json"))
+TOKEN_CACHE_DB = os.getenv("TOKEN_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tokens.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    address TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    decimals INTEGER NOT NULL
+);
+"""
+
+
+def is_empty(data):
+    """True for a missing eth_call result, including the "0x" of a call to an address without code."""
+    return not data or data in ("0x", "0X")
+
+
+def decode_symbol(data):
+    """symbol() as a string, or None if `data` is too short to hold one; a few old tokens return bytes32 instead."""
+    data = data[2:] if data.startswith(("0x", "0X")) else data
+    if len(data) == 64:
+        return bytes.fromhex(data).rstrip(b"\0").decode(errors="replace")
+    if len(data) < 128:
+        return None
+    length = int(data[64:128], 16)
+    if len(data) < 128 + length * 2:
+        return None
+    return bytes.fromhex(data[128:128 + length * 2]).decode(errors="replace")
+
+
+def read_token_metadata(address):
+    """symbol() and decimals() of an ERC20 in one aggregated read."""
+    from abi import function_selector
+    from multicall import reader
+
+    (symbol, decimals), _ = reader.read([
+        (address, function_selector("symbol", [])),
+        (address, function_selector("decimals", [])),
+    ])
+    symbol = None if is_empty(symbol) else decode_symbol(symbol)
+    if not symbol or is_empty(decimals):
+        raise ValueError(f"{address} does not look like an ERC20 token")
+    return symbol, int(decimals, 16)
+
+
+class TokenRegistry:
+    """
+    Tokens indexed by symbol, address and alias.
+
+    `tokens` maps symbol -> {"address", "decimals"} (the shape `TOKENS` always had). Unknown
+    addresses are looked up on-chain once and persisted, so they resolve offline afterwards.
+    """
+
+    def __init__(self, path=TOKEN_REGISTRY_FILE, cache_path=TOKEN_CACHE_DB, read_metadata=read_token_metadata):
+        self.read_metadata = read_metadata
+        self.tokens = {}
+        self.by_address = {}
+        self.by_alias = {}
+        self.lock = threading.Lock()
+        self.cache_path = cache_path
+        self._conn = None
+
+        with open(path) as f:
+            for entry in json.load(f):
+                self._add(entry["symbol"], entry["address"], entry["decimals"], entry.get("aliases", []))
+        # The cache file is only created once a token is loaded from the chain.
+        if os.path.exists(cache_path):
+            for address, symbol, decimals in self.conn.execute("SELECT address, symbol, decimals FROM tokens"):
+                if address not in self.by_address:
+                    self._add(symbol, address, decimals)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False, isolation_level=None)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _add(self, symbol, address, decimals, aliases=()):
+        symbol = symbol.upper()
+        # A second token with a taken symbol is still reachable by address.
+        if symbol in self.tokens:
+            symbol = f"{symbol}-{address[2:8].upper()}"
+        self.tokens[symbol] = {"address": address, "decimals": decimals}
+        self.by_address[address.lower()] = symbol
+        for alias in aliases:
+            self.by_alias[alias.upper()] = symbol
+        return symbol
+
+    def symbol(self, key):
+        """Canonical symbol for a symbol, alias or address; None if unknown."""
+        if key.lower().startswith("0x"):
+            return self.by_address.get(key.lower())
+        key = key.upper()
+        return key if key in self.tokens else self.by_alias.get(key)
+
+    def resolve(self, key):
+        """Canonical symbol for `key`, loading an unknown token address from the chain."""
+        symbol = self.symbol(key)
+        if symbol is not None or not key.lower().startswith("0x"):
+            return symbol
+        token_symbol, decimals = self.read_metadata(key)
+        with self.lock:
+            if key.lower() in self.by_address:
+                return self.by_address[key.lower()]
+            self.conn.execute("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)", (key.lower(), token_symbol, decimals))
+            return self._add(token_symbol, key, decimals)
+
+    def symbol_for_address(self, address, default=None):
+        return self.by_address.get(address.lower(), default if default is not None else address)
+
+
+token_registry = TokenRegistry()
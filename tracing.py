@@ -0,0 +1,321 @@
+# tracing.py
+# Per-hop tracing for the agent graphs. Summarize an exported trace file with:
+#   python tracing.py traces.jsonl
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Finished traces are appended here as OpenTelemetry-style span JSON, one span per line.
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Serve Prometheus metrics on this port from the CLI (the API server exposes GET /metrics).
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+
+def _now_ns():
+    return time.time_ns()
+
+
+def _span_id():
+    return uuid.uuid4().hex[:16]
+
+
+class Tracer(BaseCallbackHandler):
+    """
+    LangChain callback handler that turns one graph run into a trace.
+
+    Spans are recorded for each graph node (wall time per step), each LLM call (latency and
+    prompt/completion tokens), each tool call and each on-chain confirmation (from the tools'
+    progress events). Every span is attributed to the top-level node it ran under, so the
+    summary can say where a conversation turn spent its time.
+    """
+
+    def __init__(self, trace_file=TRACE_FILE):
+        self.trace_file = trace_file
+        self.lock = threading.Lock()
+        # run id -> {"trace", "span", "node"}: where a run's children belong.
+        self.runs = {}
+        self.open_spans = {}
+        self.traces = defaultdict(list)
+        self.submitted = {}
+        self.last_trace = []
+        self.metrics = Metrics()
+
+    # Run bookkeeping
+
+    def _context(self, run_id, parent_run_id):
+        parent = self.runs.get(parent_run_id) if parent_run_id else None
+        if parent is None:
+            return {"trace": uuid.uuid4().hex, "span": None, "node": None, "root": run_id}
+        return dict(parent)
+
+    def _start(self, run_id, parent_run_id, name, kind, attributes, node=None):
+        with self.lock:
+            context = self._context(run_id, parent_run_id)
+            # A node with no enclosing node is a top-level hop; nested nodes (e.g. a ReAct
+            # agent's "agent"/"tools") are attributed to it.
+            if node is not None and context["node"] is None:
+                context["node"] = node
+                attributes["graph.top_level"] = True
+            span = {
+                "traceId": context["trace"],
+                "spanId": _span_id(),
+                "parentSpanId": context["span"],
+                "name": name,
+                "startTimeUnixNano": _now_ns(),
+                "attributes": {"agent.span_kind": kind, "agent.node": context["node"], **attributes},
+            }
+            self.open_spans[run_id] = span
+            self.runs[run_id] = {**context, "span": span["spanId"]}
+
+    def _passthrough(self, run_id, parent_run_id):
+        with self.lock:
+            self.runs[run_id] = self._context(run_id, parent_run_id)
+
+    def _end(self, run_id, error=None, **attributes):
+        with self.lock:
+            span = self.open_spans.pop(run_id, None)
+            context = self.runs.pop(run_id, None)
+            self.submitted.pop(run_id, None)
+            if span is not None:
+                span["endTimeUnixNano"] = _now_ns()
+                span["status"] = {"code": "ERROR", "message": str(error)} if error else {"code": "OK"}
+                span["attributes"].update(attributes)
+                self.traces[span["traceId"]].append(span)
+                self.metrics.observe(span)
+            finished = context is not None and context.get("root") == run_id
+            spans = self.traces.pop(context["trace"], []) if finished else None
+        if spans is not None:
+            self._finish(spans)
+
+    def _finish(self, spans):
+        self.last_trace = spans
+        if self.trace_file:
+            with open(self.trace_file, "a") as f:
+                for span in spans:
+                    f.write(json.dumps(span) + "\n")
+
+    # Graph nodes (and everything else that runs as a chain)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        if parent_run_id is None or parent_run_id not in self.runs:
+            self._start(run_id, None, name or "graph", "graph", {})
+        elif name and name == metadata.get("langgraph_node") and name != "__start__":
+            self._start(run_id, parent_run_id, name, "node", {"graph.step": metadata.get("langgraph_step")}, node=name)
+        else:
+            self._passthrough(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # LLM calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name", "llm")
+        self._start(run_id, parent_run_id, "llm", "llm", {"llm.model": model})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name", "llm")
+        self._start(run_id, parent_run_id, "llm", "llm", {"llm.model": model})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        self._end(run_id, **{
+            "gen_ai.usage.input_tokens": prompt_tokens,
+            "gen_ai.usage.output_tokens": completion_tokens,
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # Tools and chain confirmations
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, parent_run_id, f"tool {name}", "tool", {"tool.name": name})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        """Progress events from helpers.emit_progress; "submitted" to "confirmed" is the chain time."""
+        if name != "tool_progress" or not isinstance(data, dict):
+            return
+        status = data.get("status")
+        if status == "submitted":
+            with self.lock:
+                self.submitted[run_id] = _now_ns()
+        elif status in ("confirmed", "failed"):
+            with self.lock:
+                started = self.submitted.pop(run_id, None)
+                context = self.runs.get(run_id)
+                if started is None or context is None:
+                    return
+                span = {
+                    "traceId": context["trace"],
+                    "spanId": _span_id(),
+                    "parentSpanId": context["span"],
+                    "name": "chain confirm",
+                    "startTimeUnixNano": started,
+                    "endTimeUnixNano": _now_ns(),
+                    "status": {"code": "OK" if status == "confirmed" else "ERROR"},
+                    "attributes": {
+                        "agent.span_kind": "confirm",
+                        "agent.node": context["node"],
+                        "tool.name": data.get("tool"),
+                        "tx.hash": data.get("tx_hash"),
+                    },
+                }
+                self.traces[span["traceId"]].append(span)
+                self.metrics.observe(span)
+
+    def summary(self):
+        return summarize(self.last_trace)
+
+
+def _seconds(span):
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+
+
+def summarize(spans):
+    """One block per conversation turn: total time and, per node, LLM, token, tool and confirm time."""
+    if not spans:
+        return ""
+    totals = [_seconds(span) for span in spans if span["attributes"]["agent.span_kind"] == "graph"]
+    nodes = {}
+    for span in sorted(spans, key=lambda span: span["startTimeUnixNano"]):
+        attributes = span["attributes"]
+        node = attributes.get("agent.node")
+        if node is None:
+            continue
+        stats = nodes.setdefault(node, {"steps": 0, "wall": 0.0, "llm": 0.0, "llm_calls": 0, "in": 0, "out": 0,
+                                        "tools": defaultdict(float), "confirm": 0.0})
+        kind = attributes["agent.span_kind"]
+        if kind == "node" and attributes.get("graph.top_level"):
+            stats["steps"] += 1
+            stats["wall"] += _seconds(span)
+        elif kind == "llm":
+            stats["llm"] += _seconds(span)
+            stats["llm_calls"] += 1
+            stats["in"] += attributes.get("gen_ai.usage.input_tokens", 0)
+            stats["out"] += attributes.get("gen_ai.usage.output_tokens", 0)
+        elif kind == "tool":
+            stats["tools"][attributes["tool.name"]] += _seconds(span)
+        elif kind == "confirm":
+            stats["confirm"] += _seconds(span)
+
+    lines = [f"⏱️  {sum(totals):.2f}s total"]
+    for node, stats in sorted(nodes.items(), key=lambda item: -item[1]["wall"]):
+        parts = []
+        if stats["llm_calls"]:
+            parts.append(f"LLM {stats['llm']:.2f}s ({stats['llm_calls']} calls, {stats['in']}+{stats['out']} tokens)")
+        parts += [f"{tool} {seconds:.2f}s" for tool, seconds in stats["tools"].items()]
+        if stats["confirm"]:
+            parts.append(f"confirm {stats['confirm']:.2f}s")
+        steps = f" ×{stats['steps']}" if stats["steps"] > 1 else ""
+        lines.append(f"   {node}{steps}: {stats['wall']:.2f}s" + (" | " + ", ".join(parts) if parts else ""))
+    return "\n".join(lines)
+
+
+class Metrics:
+    """Running sums and counts per span kind, rendered in the Prometheus text format."""
+
+    NAMES = {
+        "node": ("agent_node_seconds", "Wall time per graph step", "node"),
+        "llm": ("agent_llm_seconds", "LLM call latency", "node"),
+        "tool": ("agent_tool_seconds", "Tool call duration", "tool"),
+        "confirm": ("agent_tx_confirm_seconds", "Time from submission to on-chain confirmation", "tool"),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sums = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.tokens = defaultdict(int)
+
+    def observe(self, span):
+        attributes = span["attributes"]
+        kind = attributes["agent.span_kind"]
+        if kind not in self.NAMES:
+            return
+        if kind == "node" and not attributes.get("graph.top_level"):
+            return
+        label = attributes.get("agent.node") if self.NAMES[kind][2] == "node" else attributes.get("tool.name")
+        key = (kind, label or "unknown")
+        with self.lock:
+            self.sums[key] += _seconds(span)
+            self.counts[key] += 1
+            if kind == "llm":
+                self.tokens[(label or "unknown", "prompt")] += attributes.get("gen_ai.usage.input_tokens", 0)
+                self.tokens[(label or "unknown", "completion")] += attributes.get("gen_ai.usage.output_tokens", 0)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for kind, (name, help_text, label_name) in self.NAMES.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+                for (key_kind, label), total in sorted(self.sums.items()):
+                    if key_kind == kind:
+                        lines.append(f'{name}_sum{{{label_name}="{label}"}} {total:.6f}')
+                        lines.append(f'{name}_count{{{label_name}="{label}"}} {self.counts[(key_kind, label)]}')
+            lines += ["# HELP agent_llm_tokens_total LLM tokens by node", "# TYPE agent_llm_tokens_total counter"]
+            for (node, kind), count in sorted(self.tokens.items()):
+                lines.append(f'agent_llm_tokens_total{{node="{node}",kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+tracer = Tracer()
+
+
+def serve_metrics(port=METRICS_PORT, metrics=None):
+    """Serve /metrics from a background thread (for the CLI; server.py has its own route)."""
+    metrics = metrics or tracer.metrics
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def summarize_file(path):
+    traces = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            span = json.loads(line)
+            traces[span["traceId"]].append(span)
+    return "\n\n".join(summarize(spans) for spans in traces.values())
+
+
+if __name__ == "__main__":
+    print(summarize_file(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE or "traces.jsonl"))
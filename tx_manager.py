@@ -0,0 +1,133 @@
+# tx_manager.py
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from rpc import RpcError, rpc_batch
+
+TX_POLL_INTERVAL = float(os.getenv("TX_POLL_INTERVAL", "1.0"))
+TX_CONFIRM_TIMEOUT = float(os.getenv("TX_CONFIRM_TIMEOUT", "120"))
+
+
+class TransactionFailed(Exception):
+    pass
+
+
+def fetch_receipts(tx_hashes):
+    """Receipts for `tx_hashes` in one JSON-RPC batch (None while a transaction is pending)."""
+    results = rpc_batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes])
+    return {
+        tx_hash: None if isinstance(result, RpcError) else result
+        for tx_hash, result in zip(tx_hashes, results)
+    }
+
+
+class PendingTransaction:
+    """A submitted transaction; `sequence` is its local submission order (CDP assigns the nonce)."""
+
+    def __init__(self, sequence, invocation):
+        self.sequence = sequence
+        self.invocation = invocation
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+    @property
+    def tx_hash(self):
+        return self.invocation.transaction.transaction_hash
+
+
+class TransactionManager:
+    """
+    Submits and confirms every transaction of one wallet.
+
+    Submissions are serialized and given a local sequence number, so concurrent sessions on the
+    same wallet reach the CDP API one at a time, in a fixed order, instead of racing for the
+    next nonce (which CDP assigns). A single background
+    poller then checks all pending transactions with one batched receipt request per tick and
+    resolves each caller's future with its invocation.
+    """
+
+    def __init__(self, wallet, poll_interval=TX_POLL_INTERVAL, timeout=TX_CONFIRM_TIMEOUT, fetch_receipts=fetch_receipts):
+        self.wallet = wallet
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.fetch_receipts = fetch_receipts
+        self.sequence = itertools.count()
+        self.submit_lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = []
+        self.poller = None
+
+    def submit(self, submit_fn, *args):
+        """Call `submit_fn(wallet, *args)` in wallet order and return a future for its confirmation."""
+        with self.submit_lock:
+            sequence = next(self.sequence)
+            invocation = submit_fn(self.wallet, *args)
+        pending = PendingTransaction(sequence, invocation)
+        with self.pending_lock:
+            self.pending.append(pending)
+            if self.poller is None or not self.poller.is_alive():
+                self.poller = threading.Thread(target=self._poll, name="tx-poller", daemon=True)
+                self.poller.start()
+        return pending.future
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self.pending_lock:
+                if not self.pending:
+                    self.poller = None
+                    return
+                batch = list(self.pending)
+
+            # Transactions CDP has not broadcast yet have no hash; reload those individually.
+            for pending in batch:
+                if not pending.tx_hash:
+                    try:
+                        pending.invocation.reload()
+                    except Exception:
+                        pass
+            broadcast = [pending for pending in batch if pending.tx_hash]
+            try:
+                receipts = self.fetch_receipts([pending.tx_hash for pending in broadcast])
+            except Exception as e:
+                print(f"⚠️ Receipt poll failed: {str(e)}")
+                receipts = {}
+
+            now = time.monotonic()
+            done = []
+            for pending in batch:
+                receipt = receipts.get(pending.tx_hash) if pending.tx_hash else None
+                if receipt is not None:
+                    if int(receipt.get("status", "0x1"), 16) == 1:
+                        pending.future.set_result(pending.invocation)
+                    else:
+                        pending.future.set_exception(TransactionFailed(f"Transaction reverted: {pending.tx_hash}"))
+                    done.append(pending)
+                elif now - pending.submitted_at > self.timeout:
+                    pending.future.set_exception(TimeoutError(f"Transaction not confirmed after {self.timeout:.0f}s"))
+                    done.append(pending)
+            with self.pending_lock:
+                self.pending = [pending for pending in self.pending if pending not in done]
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_transaction_manager(wallet):
+    """One manager per wallet address, shared by every tool and session."""
+    key = wallet.default_address.address_id
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = TransactionManager(wallet)
+        return _managers[key]
+
+
+def register_transaction_manager(manager):
+    """Use a custom manager for its wallet (e.g. a stub receipt source in loadtest.py)."""
+    with _managers_lock:
+        _managers[manager.wallet.default_address.address_id] = manager
@@ -0,0 +1,205 @@
+# v3math.py
+
+"""
+Uniswap V3 position math (TickMath, SqrtPriceMath, LiquidityAmounts and fee growth), exact on
+integers like the contracts.
+
+Every function accepts Python ints or array-likes and broadcasts like NumPy. Values are kept in
+object arrays so uint160/uint256 intermediates never overflow; scalars in give scalars out.
+"""
+
+import math
+
+import numpy as np
+
+Q96 = 1 << 96
+Q128 = 1 << 128
+Q256 = 1 << 256
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+# TickMath.getSqrtRatioAtTick: 1 / sqrt(1.0001) ** (2 ** i) as Q128.128, for bit i of |tick|.
+TICK_RATIO_FACTORS = [
+    0xfffcb933bd6fad37aa2d162d1a594001, 0xfff97272373d413259a46990580e213a,
+    0xfff2e50f5f656932ef12357cf3c7fdcc, 0xffe5caca7e10e4e61c3624eaa0941cd0,
+    0xffcb9843d60f6159c9db58835c926644, 0xff973b41fa98c081472e6896dfb254c0,
+    0xff2ea16466c96a3843ec78b326b52861, 0xfe5dee046a99a2a811c461f1969c3053,
+    0xfcbe86c7900a88aedcffc83b479aa3a4, 0xf987a7253ac413176f2b074cf7815e54,
+    0xf3392b0822b70005940c7a398e4b70f3, 0xe7159475a2c29b7443b29c7fa6e889d9,
+    0xd097f3bdfd2022b8845ad8f792aa5825, 0xa9f746462d870fdf8a65dc1f90e061e5,
+    0x70d869a156d2a1b890bb3df62baf32f7, 0x31be135f97d08fd981231505542fcfa6,
+    0x9aa508b5b7a84e1c677de54f3e99bc9, 0x5d6af8dedb81196699c329225ee604,
+    0x2216e584f5fa1ea926041bedfe98, 0x48a170391f7dc42444e8fa2,
+]
+
+
+def _unwrap(value):
+    # Object-array arithmetic on 0-d inputs already yields plain ints.
+    if not isinstance(value, np.ndarray):
+        return value
+    return value.item() if value.ndim == 0 else value.astype(object)
+
+
+def _ints(*values):
+    return np.broadcast_arrays(*(np.asarray(value, dtype=object) for value in values))
+
+
+def _where(condition, x, y):
+    # np.where would coerce plain ints to int64; keep every branch in object arrays.
+    x, y = np.asarray(x, dtype=object), np.asarray(y, dtype=object)
+    return np.where(np.asarray(condition, dtype=bool), x, y).astype(object)
+
+
+def _div_up(a, b):
+    return -(-a // b)
+
+
+def _sqrt_ratio_at_tick(tick):
+    tick = int(tick)
+    if not MIN_TICK <= tick <= MAX_TICK:
+        raise ValueError(f"Tick out of range: {tick}")
+    abs_tick = abs(tick)
+    ratio = 0x100000000000000000000000000000000
+    for bit, factor in enumerate(TICK_RATIO_FACTORS):
+        if abs_tick & (1 << bit):
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = (Q256 - 1) // ratio
+    # Q128.128 to Q64.96, rounding up so the result never undershoots the tick.
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def _tick_at_sqrt_ratio(sqrt_price_x96):
+    sqrt_price_x96 = int(sqrt_price_x96)
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError(f"sqrtPriceX96 out of range: {sqrt_price_x96}")
+    # A float estimate is within a tick of the answer; the exact ratio settles it.
+    tick = math.floor(2 * math.log(sqrt_price_x96 / Q96) / math.log(1.0001))
+    tick = max(MIN_TICK, min(MAX_TICK, tick))
+    while tick > MIN_TICK and _sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and _sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+_sqrt_ratio_at_tick_ufunc = np.frompyfunc(_sqrt_ratio_at_tick, 1, 1)
+_tick_at_sqrt_ratio_ufunc = np.frompyfunc(_tick_at_sqrt_ratio, 1, 1)
+
+
+def get_sqrt_ratio_at_tick(tick):
+    """sqrt(1.0001 ** tick) as a Q64.96, bit-for-bit like TickMath.getSqrtRatioAtTick."""
+    return _unwrap(_sqrt_ratio_at_tick_ufunc(np.asarray(tick, dtype=object)))
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96):
+    """The greatest tick whose sqrt ratio is <= sqrt_price_x96 (TickMath.getTickAtSqrtRatio)."""
+    return _unwrap(_tick_at_sqrt_ratio_ufunc(np.asarray(sqrt_price_x96, dtype=object)))
+
+
+def nearest_usable_tick(tick, tick_spacing):
+    tick, tick_spacing = _ints(tick, tick_spacing)
+    rounded = (tick + tick_spacing // 2) // tick_spacing * tick_spacing
+    rounded = _where(rounded < MIN_TICK, rounded + tick_spacing, rounded)
+    rounded = _where(rounded > MAX_TICK, rounded - tick_spacing, rounded)
+    return _unwrap(rounded)
+
+
+def price_from_sqrt_price(sqrt_price_x96, decimals0=18, decimals1=18):
+    """Human price of token0 in token1 (for display only; floating point)."""
+    sqrt_price_x96 = np.asarray(sqrt_price_x96, dtype=object)
+    price = np.asarray(sqrt_price_x96 * sqrt_price_x96, dtype=object).astype(float) / float(Q96 * Q96)
+    price = price * 10.0 ** (decimals0 - decimals1)
+    return price.item() if price.ndim == 0 else price
+
+
+def _clamp(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b):
+    sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b = _ints(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b)
+    lower = _where(sqrt_ratio_a > sqrt_ratio_b, sqrt_ratio_b, sqrt_ratio_a)
+    upper = _where(sqrt_ratio_a > sqrt_ratio_b, sqrt_ratio_a, sqrt_ratio_b)
+    current = _where(sqrt_price_x96 < lower, lower, _where(sqrt_price_x96 > upper, upper, sqrt_price_x96))
+    return current, lower, upper
+
+
+def get_liquidity_for_amounts(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b, amount0, amount1):
+    """
+    The most liquidity amount0 and amount1 can provide in [sqrt_ratio_a, sqrt_ratio_b] at the
+    current price (LiquidityAmounts.getLiquidityForAmounts).
+    """
+    current, lower, upper = _clamp(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b)
+    amount0, amount1, _ = _ints(amount0, amount1, current)
+    # Above the range only token1 counts, below it only token0, inside both.
+    span0 = upper - current
+    span1 = current - lower
+    safe_span0 = _where(span0 == 0, 1, span0)
+    safe_span1 = _where(span1 == 0, 1, span1)
+    liquidity0 = amount0 * (current * upper // Q96) // safe_span0
+    liquidity1 = amount1 * Q96 // safe_span1
+    liquidity = _where(
+        span0 == 0, liquidity1,
+        _where(span1 == 0, liquidity0, _where(liquidity0 < liquidity1, liquidity0, liquidity1)),
+    )
+    return _unwrap(liquidity)
+
+
+def get_amounts_for_liquidity(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b, liquidity, round_up=False):
+    """
+    Token amounts held by `liquidity` in the range at the current price. Rounded down like
+    LiquidityAmounts.getAmountsForLiquidity, or up like SqrtPriceMath when the pool pulls a deposit.
+    """
+    current, lower, upper = _clamp(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b)
+    liquidity, _ = _ints(liquidity, current)
+    numerator0 = (liquidity << 96) * (upper - current)
+    numerator1 = liquidity * (current - lower)
+    if round_up:
+        amount0 = _div_up(_div_up(numerator0, upper), current)
+        amount1 = _div_up(numerator1, Q96)
+    else:
+        amount0 = numerator0 // upper // current
+        amount1 = numerator1 // Q96
+    return _unwrap(amount0), _unwrap(amount1)
+
+
+def fee_growth_inside(tick_current, tick_lower, tick_upper, fee_growth_global, fee_growth_outside_lower, fee_growth_outside_upper):
+    """Fee growth per unit of liquidity inside a tick range (Tick.getFeeGrowthInside), mod 2**256."""
+    tick_current, tick_lower, tick_upper, fee_growth_global, outside_lower, outside_upper = _ints(
+        tick_current, tick_lower, tick_upper, fee_growth_global, fee_growth_outside_lower, fee_growth_outside_upper
+    )
+    below = _where(tick_current >= tick_lower, outside_lower, fee_growth_global - outside_lower)
+    above = _where(tick_current < tick_upper, outside_upper, fee_growth_global - outside_upper)
+    return _unwrap((fee_growth_global - below - above) % Q256)
+
+
+def fees_owed(liquidity, fee_growth_inside_now, fee_growth_inside_last):
+    """Uncollected fees since the last checkpoint (Position.update), in token units."""
+    liquidity, now, last = _ints(liquidity, fee_growth_inside_now, fee_growth_inside_last)
+    return _unwrap(((now - last) % Q256) * liquidity // Q128)
+
+
+def position_amounts(sqrt_price_x96, tick_lower, tick_upper, liquidity):
+    """Token amounts of many positions in one pass (tick ranges and liquidity as arrays)."""
+    return get_amounts_for_liquidity(
+        sqrt_price_x96, get_sqrt_ratio_at_tick(tick_lower), get_sqrt_ratio_at_tick(tick_upper), liquidity
+    )
+
+
+def quote_deposit(sqrt_price_x96, tick_lower, tick_upper, amount0, amount1):
+    """
+    What a deposit of up to (amount0, amount1) into [tick_lower, tick_upper] does at the current
+    price: the liquidity minted, the amounts the pool pulls and what is left over.
+    """
+    amount0, amount1 = _ints(amount0, amount1)
+    sqrt_ratio_a = get_sqrt_ratio_at_tick(tick_lower)
+    sqrt_ratio_b = get_sqrt_ratio_at_tick(tick_upper)
+    liquidity = get_liquidity_for_amounts(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b, amount0, amount1)
+    used0, used1 = get_amounts_for_liquidity(sqrt_price_x96, sqrt_ratio_a, sqrt_ratio_b, liquidity, round_up=True)
+    return {
+        "liquidity": liquidity,
+        "amount0": used0,
+        "amount1": used1,
+        "refund0": _unwrap(amount0 - used0),
+        "refund1": _unwrap(amount1 - used1),
+    }